@@ -157,7 +157,7 @@ def main(ctx, configfile: str, verbose: bool = False) -> int:
         log.log.debug("Initialized cli context")
     # configure a variable translator object with information from Fieldlist tables
     var_translator = translation.VariableTranslator(ctx.config.CODE_ROOT)
-    var_translator.read_conventions(ctx.config.CODE_ROOT)
+    var_translator.read_conventions(ctx.config.CODE_ROOT, cache_dir=ctx.config.get('table_cache_dir', ''))
 
     # initialize the preprocessor (dummy pp object if run_pp=False)
     data_pp = preprocessor.init_preprocessor(model_paths,
@@ -167,6 +167,17 @@ def verify_runtime_config_options(config: util.NameSpace):
         new_output_dir = verify_dirpath(config.OUTPUT_DIR, config.CODE_ROOT)
         update_config(config, 'OUTPUT_DIR', new_output_dir)
     verify_case_atts(config.case_list)
+    verify_output_format(config)
+
+
+def verify_output_format(config: util.NameSpace):
+    output_formats = {'netcdf', 'zarr'}
+    output_format = config.get('output_format', 'netcdf')
+    if output_format not in output_formats:
+        raise util.exceptions.MDTFBaseException(
+            f"output_format '{output_format}' not supported; use one of {', '.join(sorted(output_formats))}"
+        )
+
 
 def verify_conda_envs(config: util.NameSpace, filename: str):
     m_exists = os.path.exists(config['micromamba_exe'])
@@ -266,11 +266,11 @@ class HTMLPodOutputManager(HTMLSourceFileMixin):
                 os.remove(f)
 
     def cleanup_pp_data(self):
-        """Removes nc files found in catalog if the ``save_pp_data`` data 
+        """Removes nc files (or Zarr stores) found in catalog if the ``save_pp_data`` data 
         is set to false.
 
         This is done by looping through the ``case_info.yml`` file found in each 
-        POD. If the .nc file exists, it is then deleted.
+        POD. If the .nc file or .zarr store exists, it is then deleted.
         """
         if not self.save_nc:
             for f in util.find_files(self.WORK_DIR, 'case_info.yml'):
@@ -279,8 +279,8 @@ class HTMLPodOutputManager(HTMLSourceFileMixin):
                     for k in case_info_yml['CASE_LIST'][case]:
                         if k.endswith('FILE') or k.endswith('FILES'):
                             v = case_info_yml['CASE_LIST'][case][k]
-                            if v != '' and os.path.exists(v) and v.endswith('.nc'):
-                                os.remove(v)
+                            if v != '' and os.path.exists(v) and v.endswith(('.nc', '.zarr')):
+                                util.remove_path(v)
 
     def make_output(self, config: util.NameSpace):
         """Top-level method to make POD-specific output, post-init. Split off
@@ -4,18 +4,29 @@ once it's been downloaded`.
 import os
 import shutil
 import abc
+import concurrent.futures
 import dataclasses
 import datetime
+import functools
 import importlib
+import inspect
 import pandas as pd
 from src import util, varlist_util, translation, xr_parser, units
 from src.util import datelabel as dl
 import cftime
+import dask
+import dask.array
+import dask.callbacks
+from dask.delayed import Delayed
 import intake
+import netCDF4
 import numpy as np
 import xarray as xr
+from xarray.backends.locks import NETCDFC_LOCK
 import collections
 import re
+import threading
+import time
 
 
 # TODO: Make the following lines a unit test
@@ -29,7 +40,106 @@ import re
 import logging
 
 _log = logging.getLogger(__name__)
-write_times = []
+# netCDF-C/HDF5 aren't thread-safe when opening or closing files, so preprocessing
+# worker threads open their catalog assets and write their output files one at a time
+_netcdf_file_lock = threading.RLock()
+# variable encoding settings that carry over from netCDF input to Zarr output
+_zarr_encoding_keys = ('dtype', '_FillValue', 'missing_value', 'units', 'calendar',
+                       'scale_factor', 'add_offset')
+# encoding of variables in a netCDF output file that data appended to it is written with
+_append_encoding_keys = ('units', 'calendar', '_FillValue', 'missing_value',
+                         'scale_factor', 'add_offset')
+# modules defining the preprocessing done by the framework; outputs in the pp
+# cache are redone if these change
+_pp_code_paths = (__file__, units.__file__, xr_parser.__file__, translation.__file__)
+# settings of the output_encoding runtime option and VarlistEntry attribute
+_output_encoding_keys = ('complevel', 'shuffle', 'chunks', 'dtype',
+                         'least_significant_digit', 'unlimited_time')
+
+
+class _WriteTimer(dask.callbacks.Callback):
+    """Dask callback recording when the last task of each of several delayed
+    writes finished; *final_keys* maps the key of each write to its index.
+    """
+
+    def __init__(self, final_keys: dict):
+        super().__init__()
+        self.final_keys = final_keys
+        self.start_time = time.monotonic()
+        self.write_seconds = [None] * len(final_keys)
+
+    def _start(self, dsk):
+        self.start_time = time.monotonic()
+
+    def _posttask(self, key, result, dsk, state, worker_id):
+        i = self.final_keys.get(key, None)
+        if i is not None:
+            self.write_seconds[i] = time.monotonic() - self.start_time
+
+
+def _call_with_netcdf_lock(func, *args):
+    with NETCDFC_LOCK:
+        return func(*args)
+
+
+def lock_file_close(delayed_write):
+    """Return a copy of the Delayed *delayed_write* returned by xarray's
+    ``to_netcdf(compute=False)`` whose final task, which closes the output file,
+    holds xarray's global netCDF-C lock. xarray closes output files under a
+    per-file lock only, which crashes netCDF-C/HDF5 if another file is read or
+    written at the same time. Returns None, with a warning, if the graph doesn't
+    have the expected form.
+
+    Neither xarray nor dask exposes the store being closed, or a hook that runs
+    in the thread executing a task, so the final task is wrapped using only the
+    public dask collection protocol (``__dask_graph__``) and the documented
+    graph specification, in which a task is a tuple whose first element is a
+    callable; ``test_lock_file_close`` checks this holds for the pinned
+    versions of dask and xarray.
+
+    Only ``NETCDFC_LOCK`` is taken here and when reading input files (see
+    :attr:`MDTFPreprocessorBase.open_dataset_kwargs`): xarray's combined
+    netCDF locks don't acquire their component locks in a consistent order, so
+    holding them while the output files are written can deadlock.
+    """
+    dsk = dict(delayed_write.__dask_graph__())
+    task = dsk.get(delayed_write.key, None)
+    if not (isinstance(task, tuple) and task and callable(task[0])):
+        _log.warning("Unexpected dask graph for the delayed write %s (dask %s, xarray %s); "
+                     "the output file will be written on its own, and closed without the "
+                     "netCDF-C lock.", delayed_write.key, dask.__version__, xr.__version__)
+        return None
+    dsk[delayed_write.key] = (_call_with_netcdf_lock,) + task
+    return Delayed(delayed_write.key, dsk)
+
+
+# number of seconds in each time unit used in "{unit} since {date}" time units
+_seconds_in_time_unit = {
+    "seconds": 1.0,
+    "minutes": 60.0,
+    "hours": 3600.0,
+    "days": 86400.0,
+    "weeks": 604800.0,  # these are rarer and vague cases (they could be problematic)
+    "months": 2628000.0,  # seconds in common year (365 days) / 12
+    "years": 31536000.0  # common year (365 days)
+}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_time_units(units: str, calendar: str) -> tuple:
+    """Parse a CF time units string of the form "{unit} since {date}" into the
+    name of the unit and a cftime datetime for the reference date. Results are
+    cached, since the same units string is shared by many files.
+    """
+    unit = units.split(" ")[0].lower()
+    if unit not in _seconds_in_time_unit and unit + 's' in _seconds_in_time_unit:
+        unit = unit + 's'
+    ref_str = " ".join(units.split(" ")[2:])
+    ref_cft = dl.str_to_cftime(
+        ref_str.replace(" ", "").replace(":", "").replace("-", ""),
+        calendar=calendar
+    )
+    return unit, ref_cft
 
 
 def copy_as_alternate(old_v, **kwargs):
@@ -67,6 +177,12 @@ class PreprocessorFunctionBase(abc.ABC):
       describing additional potential types of data which the preprocessor
       function is capable of converting into the format requested by the POD.
     - :meth:`process`, which actually implements the data format conversion.
+
+    Functions that only keep part of the data they're given can also implement
+    :meth:`select_on_read`, which is applied to each file as it's opened.
+
+    Functions must not read the data of the variable they're given: see
+    :meth:`execute`.
     """
 
     def __init__(self, *args):
@@ -83,6 +199,15 @@ class PreprocessorFunctionBase(abc.ABC):
         """
         return v
 
+    def select_on_read(self, var: varlist_util.VarlistEntry, xr_dataset):
+        """Select the part of *xr_dataset*, the lazily opened contents of one
+        catalog asset for *var*, that :meth:`execute` would keep, before the
+        assets are joined. Called on each asset as it's opened, so the data
+        that is dropped is never read. The default passes *xr_dataset* through
+        unaltered.
+        """
+        return xr_dataset
+
     @abc.abstractmethod
     def execute(self, var: varlist_util.VarlistEntry,
                 xr_dataset,
@@ -90,6 +215,15 @@ class PreprocessorFunctionBase(abc.ABC):
         """Apply the format conversion implemented in this PreprocessorFunction
         to the input dataset *dataset*, according to the request made in *var*.
 
+        The data of *xr_dataset* is held in dask arrays that haven't been read
+        yet, and must stay that way: the data is only read, chunk by chunk, when
+        the output file is written. Functions may read coordinates, but must
+        transform data variables with elementwise operations on their dask
+        arrays (affine transformations of the dependent variable's values are
+        planned instead, by subclassing :class:`AffineFunctionBase`), and leave any values
+        the transformation depends on as lazy (0-d) reductions rather than
+        computing them with ``.values``, ``.item()`` or ``bool()``.
+
         Args:
             var: dictionary of variable information
             xr_dataset: xarray dataset with information from ESM intake catalog
@@ -100,7 +234,124 @@ class PreprocessorFunctionBase(abc.ABC):
         pass
 
 
-class PercentConversionFunction(PreprocessorFunctionBase):
+@dataclasses.dataclass(frozen=True)
+class AffineTransform:
+    """Elementwise transformation ``x -> scale * x + offset`` of the values of a
+    variable. *scale* and *offset* are numbers, or lazy (0-d dask array)
+    values that depend on the data.
+    """
+    scale: float = 1.0
+    offset: float = 0.0
+
+    @staticmethod
+    def _is_constant(x, value) -> bool:
+        return not isinstance(x, dask.array.Array) and x == value
+
+    @property
+    def is_identity(self) -> bool:
+        return self._is_constant(self.scale, 1.0) and self._is_constant(self.offset, 0.0)
+
+    def then(self, scale=1.0, offset=0.0):
+        """Return the transformation that applies this one, followed by
+        ``x -> scale * x + offset``.
+        """
+        if self._is_constant(scale, 1.0) and self._is_constant(offset, 0.0):
+            return self
+        return AffineTransform(scale * self.scale, scale * self.offset + offset)
+
+    def apply(self, da: xr.DataArray) -> xr.DataArray:
+        """Return a copy of the DataArray *da* with the transformation applied to
+        its values. The data stays lazy: each chunk is transformed in a single
+        pass when it's read, with the product as the only temporary array.
+        Encoding attributes describing packed values are dropped, since they
+        don't apply to the transformed values.
+        """
+        if self.is_identity:
+            return da
+        dtype = np.promote_types(da.dtype, np.float32)
+        add_offset = not self._is_constant(self.offset, 0.0)
+
+        def _affine(x, scale, offset):
+            out = np.multiply(x, scale, dtype=dtype)
+            if add_offset:
+                np.add(out, offset, out=out, casting='same_kind')
+            return out
+
+        if any(isinstance(x, dask.array.Array) for x in (da.data, self.scale, self.offset)):
+            data = dask.array.map_blocks(
+                _affine, dask.array.asarray(da.data), self.scale, self.offset, dtype=dtype
+            )
+        else:
+            data = _affine(da.values, self.scale, self.offset)
+        da = da.copy(data=data)
+        for key in ('scale_factor', 'add_offset'):
+            da.encoding.pop(key, None)
+        if not np.issubdtype(da.encoding.get('dtype', dtype), np.floating):
+            da.encoding.pop('dtype', None)
+        return da
+
+
+class AffineFunctionBase(PreprocessorFunctionBase):
+    """Base class for PreprocessorFunctions whose only change to the values of
+    the dependent variable is an :class:`AffineTransform`, such as unit
+    conversions.
+
+    Instead of transforming the data themselves, these functions implement
+    :meth:`plan_transform`, which updates the metadata and composes the
+    function's transformation with those planned by the functions that ran
+    before it. :meth:`MDTFPreprocessorBase.execute_pp_functions` applies the
+    composition of consecutive planned transformations as a single
+    ``a * x + b`` operation, so the data is traversed once instead of once per
+    function.
+    """
+
+    @abc.abstractmethod
+    def plan_transform(self, var: varlist_util.VarlistEntry,
+                       xr_dataset,
+                       transform: AffineTransform,
+                       **kwargs):
+        """Update the metadata of *xr_dataset* and *var* for the conversion
+        implemented by this function, without changing the values of the
+        dependent variable.
+
+        Args:
+            var: dictionary of variable information
+            xr_dataset: xarray dataset with information from ESM intake catalog
+            transform: transformation of the dependent variable's values planned
+                by the preceding functions, which hasn't been applied to
+                *xr_dataset* yet.
+
+        Returns:
+            Tuple of the modified *dataset* and the composition of *transform*
+            with this function's transformation of the dependent variable.
+        """
+        pass
+
+    def execute(self, var: varlist_util.VarlistEntry,
+                xr_dataset,
+                **kwargs):
+        """Apply the conversion implemented in this PreprocessorFunction on its
+        own, by planning it with :meth:`plan_transform` and applying it to the
+        dependent variable.
+        """
+        xr_dataset, transform = self.plan_transform(
+            self, var, xr_dataset, AffineTransform(), **kwargs
+        )
+        return apply_transform(var, xr_dataset, transform)
+
+
+def apply_transform(var: varlist_util.VarlistEntry, xr_dataset, transform: AffineTransform):
+    """Apply the :class:`AffineTransform` *transform* to the values of the
+    dependent variable of *var* in *xr_dataset*.
+    """
+    if transform.is_identity:
+        return xr_dataset
+    tv_name = var.translation.name
+    xr_dataset[tv_name] = transform.apply(xr_dataset[tv_name])
+    return xr_dataset
+
+
+class PercentConversionFunction(AffineFunctionBase):
     """A PreprocessorFunction which convers the dependent variable's units and values,
     for the specific case of percentages. ``0-1`` are not defined in the UDUNITS-2
     library. So, this function handles the case where we have to convert from
@@ -109,29 +360,26 @@ class PercentConversionFunction(PreprocessorFunctionBase):
 
     _std_name_tuple = ('0-1', '%')
 
-    def execute(self, var, ds, **kwargs):
+    def plan_transform(self, var, ds, transform, **kwargs):
         var_unit = getattr(var, "units", "")
         tv = var.translation  # abbreviate
         tv_unit = getattr(tv, "units", "")
         # 0-1 to %
         if str(tv_unit) == self._std_name_tuple[0] and str(var_unit) == self._std_name_tuple[1]:
             ds[tv.name].attrs['units'] = '%'
-            ds[tv.name].values = ds[tv.name].values * 100
-            return ds
+            return ds, transform.then(100.)
         # % to 0-1
         if str(tv_unit) == self._std_name_tuple[1] and str(var_unit) == self._std_name_tuple[0]:
             ds[tv.name].attrs['units'] = '0-1'
-            # sometimes % is [0,1] already
-            if ds[tv.name].values[:, :, 3].max() < 1.5:
-                return ds
-            else:
-                ds[tv.name].values = ds[tv.name].values / 100
-                return ds
+            # sometimes % is [0,1] already; the check is a lazy reduction,
+            # computed along with the transformed data
+            scale = xr.where(transform.apply(ds[tv.name][:, :, 3]).max() < 1.5, 1., 0.01)
+            return ds, transform.then(scale.data)
 
-        return ds
+        return ds, transform
 
 
-class PrecipRateToFluxFunction(PreprocessorFunctionBase):
+class PrecipRateToFluxFunction(AffineFunctionBase):
     """A PreprocessorFunction which converts the dependent variable's units, for
     the specific case of precipitation. Flux and precip rate differ by a factor
     of the density of water, so can't be handled by the udunits2 implementation
@@ -218,7 +466,7 @@ class PrecipRateToFluxFunction(PreprocessorFunctionBase):
             v.translation.long_name = new_tv.long_name
         return v
 
-    def execute(self, var, ds, **kwargs):
+    def plan_transform(self, var, ds, transform, **kwargs):
         """Convert units of dependent variable *ds* between precip rate and
         precip flux, as specified by the desired units given in *var*. If the
         ``standard_name`` of *ds* is not in the recognized list, return it
@@ -227,10 +475,10 @@ class PrecipRateToFluxFunction(PreprocessorFunctionBase):
         std_name = getattr(var, 'standard_name', "")
         if std_name not in self._rate_d and std_name not in self._flux_d:
             # logic not applicable to this VE; do nothing
-            return ds
+            return ds, transform
         if units.units_equivalent(var.units, var.translation.units):
             # units can be converted by ConvertUnitsFunction; do nothing
-            return ds
+            return ds, transform
 
         # var.translation.units set by edit_request will have been overwritten by
         # DefaultDatasetParser to whatever they are in ds. Change them back.
@@ -251,11 +499,11 @@ class PrecipRateToFluxFunction(PreprocessorFunctionBase):
         tv.units = new_units
         tv.standard_name = var.standard_name
         # actual conversion done by ConvertUnitsFunction; this assures
-        # units.convert_dataarray is called with correct parameters.
-        return ds
+        # it's planned with the correct parameters.
+        return ds, transform
 
 
-class ConvertUnitsFunction(PreprocessorFunctionBase):
+class ConvertUnitsFunction(AffineFunctionBase):
     """Convert units on the dependent variable of var, as well as its
     (non-time) dimension coordinate axes, from what's specified in the dataset
     attributes to what's requested in the :class:`~src.diagnostic.VarlistEntry`.
@@ -265,18 +513,21 @@ class ConvertUnitsFunction(PreprocessorFunctionBase):
     :doc:`src.units`.
     """
 
-    def execute(self, var, ds, **kwargs):
+    def plan_transform(self, var, ds, transform, **kwargs):
         """Convert units on the dependent variable and coordinates of var from
         what's specified in the dataset attributes to what's given in the
         VarlistEntry *var*. Units attributes are updated on the
-        :class:`~src.core.TranslatedVarlistEntry`.
+        :class:`~src.core.TranslatedVarlistEntry`. Coordinates are converted
+        here; the conversion of the dependent variable is returned as part of
+        the planned transform.
         """
         tv = var.translation  # abbreviate
-        # convert dependent variable
+        # plan conversion of dependent variable
         # Note: may need to define src_unit = ds[tv.name].units or similar
-        ds = units.convert_dataarray(
+        _, scale, offset = units.plan_dataarray_conversion(
             ds, tv.name, src_unit=None, dest_unit=var.units.units, log=var.log
         )
+        transform = transform.then(scale, offset)
         tv.units = var.units
 
         # convert coordinate dimensions and bounds
@@ -308,7 +559,7 @@ class ConvertUnitsFunction(PreprocessorFunctionBase):
                     log=var.log
                 )
                 c.value = None
-                if len(ds[c.name]) > 1:
+                if ds[c.name].size > 1:
                     for v in ds[c.name].values:
                         if int(v) / dest_c.value == 100:  # v = dest_c in Pa
                             c.value = dest_c.value
@@ -319,7 +570,7 @@ class ConvertUnitsFunction(PreprocessorFunctionBase):
                 c.units = dest_c.units
 
         var.log.info("Converted units on %s.", var.full_name)
-        return ds
+        return ds, transform
 
 
 class RenameVariablesFunction(PreprocessorFunctionBase):
@@ -445,7 +696,12 @@ class ExtractLevelFunction(PreprocessorFunctionBase):
        parametric vertical coordinates and coordinate interpolation are not.
        If a pressure level is requested that isn't present in the data,
        :meth:`process` raises a KeyError.
+
+    The level is selected from each file as it's opened (:meth:`select_on_read`),
+    so only the requested level of the 4D data is read; :meth:`execute` then
+    only needs to rename the variable.
     """
+    _atol = 1.0e-3  # absolute tolerance for floating-point equality
 
     def edit_request(self, v: varlist_util.VarlistEntry, **kwargs):
         """ Create an 4-D alternate for a scalar variable.
@@ -482,14 +738,13 @@ class ExtractLevelFunction(PreprocessorFunctionBase):
         if v.use_exact_name:
             new_tv_name = v.name
         else:
-            new_tv_dict = translation.VariableTranslator().from_CF_name(
-                data_convention, v.standard_name, v.realm, v.modifier
-            )
             # CMIP CV will return multiple values for same standard name (e.g., ua250, ua10, ua)
             # so choose the 4-D value (assumes that 4-D vars from same realm do not share the same standard name)
+            new_tv_dict = translation.VariableTranslator().from_CF_name(
+                data_convention, v.standard_name, v.realm, v.modifier, ndim=4
+            )
             for var_dict in new_tv_dict.values():
-                if var_dict['ndim'] == 4:
-                    new_tv_name = var_dict['name']
+                new_tv_name = var_dict['name']
         new_tv = tv.remove_scalar(
             'Z',
             name=new_tv_name,
@@ -503,12 +758,51 @@ class ExtractLevelFunction(PreprocessorFunctionBase):
 
         return v
 
+    def select_on_read(self, var, xr_dataset):
+        """If *var* requests a Z level and *xr_dataset*, the contents of one
+        catalog asset, has a Z dimension, return the slice of *xr_dataset* on
+        that level. The selection is lazy and keeps the level as a scalar
+        coordinate, so the other levels are never read. *xr_dataset* hasn't been
+        parsed yet, so its Z dimension is identified by the name of the
+        translated scalar coordinate or by its ``axis`` or ``positive``
+        attribute. *xr_dataset* is passed through unaltered if the level can't be
+        identified unambiguously, leaving it to :meth:`execute`.
+        """
+        our_z = var.get_scalar('Z')
+        tv = var.translation
+        if not our_z or not our_z.value or tv is None:
+            return xr_dataset
+        tv_z = tv.get_scalar('Z')
+        if tv_z is not None and tv_z.name in xr_dataset.dims:
+            z_dims = [tv_z.name]
+        else:
+            z_dims = [d for d in xr_dataset.dims if d in xr_dataset.coords
+                      and (xr_dataset[d].attrs.get('axis', '').upper() == 'Z'
+                           or xr_dataset[d].attrs.get('positive', '').lower() in ('up', 'down'))]
+        if len(z_dims) != 1 or 'units' not in xr_dataset[z_dims[0]].attrs:
+            return xr_dataset
+        z_name = z_dims[0]
+        z_units = xr_dataset[z_name].attrs['units']
+        try:
+            z_value = units.convert_scalar_coord(our_z, z_units, log=var.log)
+        except Exception:
+            return xr_dataset
+        idx = np.flatnonzero(np.isclose(xr_dataset[z_name].values, z_value, rtol=0., atol=self._atol))
+        if len(idx) != 1:
+            # not found; execute() reports the error with the parsed axis values
+            return xr_dataset
+        var.log.debug("Selecting %s %s level from Z axis ('%s') of %s on read.",
+                      z_value, z_units, z_name, var.full_name)
+        # execute() renames the variable once the data has been parsed
+        tv.requires_level_extraction = True
+        return xr_dataset.isel({z_name: int(idx[0])})
+
     def execute(self, var, ds, **kwargs):
         """Determine if level extraction is needed (if *var* has a scalar Z
         coordinate and Dataset *ds* is 3D). If so, return the appropriate 2D
         slice of *ds*, otherwise pass through *ds* unaltered.
         """
-        _atol = 1.0e-3  # absolute tolerance for floating-point equality
+        _atol = self._atol
 
         tv_name = var.name_in_model
         our_z = var.get_scalar('Z')
@@ -524,6 +818,14 @@ class ExtractLevelFunction(PreprocessorFunctionBase):
                                "provided in scalar coordinate information; assuming correct."),
                               self.__class__.__name__, var.full_name, our_z.value, our_z.units)
                 return ds
+            elif var.translation.requires_level_extraction and tv_name != var.name:
+                # level was selected from the 4D data by select_on_read
+                var.log.info("Extracted %s %s level from Z axis ('%s') of %s.",
+                             our_z.value, our_z.units, ds_z.name, var.full_name,
+                             tags=util.ObjectLogTag.NC_HISTORY
+                             )
+                var.translation.name = var.name
+                return ds.rename({tv_name: var.name})
             else:
                 # value (on var.translation) has already been checked by
                 # xr_parser.DefaultDatasetParser
@@ -571,7 +873,186 @@ class ExtractLevelFunction(PreprocessorFunctionBase):
                               f"level from '{ds_z_name}' coord of {var.full_name}.")) from exc
 
 
-class ApplyScaleAndOffsetFunction(PreprocessorFunctionBase):
+class ExtractRegionFunction(PreprocessorFunctionBase):
+    """Subset a Dataset to the latitude and longitude bounds requested for the
+    variable, which are stored in the ``range`` of its Y and X coordinates (set
+    from the ``region``, ``lat_bounds`` and ``lon_bounds`` entries in the POD's
+    settings file). The subset is taken with ``isel`` on the lazily loaded data,
+    so only the data in the region is read.
+
+    Longitude bounds are taken modulo 360 degrees: the longitudes in the region
+    are returned in increasing order starting from the first bound, shifted
+    (along with their bounds, if present) by multiples of 360 degrees as needed.
+    For example, bounds of ``[-180, 180]`` convert data on a 0 to 360 degree grid
+    to -180 to 180.
+
+    . note::
+
+       Only rectilinear grids (1D latitude and longitude dimension coordinates)
+       are supported; data on other grids is passed through unaltered.
+    """
+
+    @staticmethod
+    def requested_region(var) -> tuple:
+        """Return the (lat_bounds, lon_bounds) requested for *var*, with None
+        for bounds that weren't set.
+        """
+        bounds = (getattr(getattr(var, ax, None), 'range', None) for ax in ('Y', 'X'))
+        return tuple(None if b is None else tuple(float(x) for x in b) for b in bounds)
+
+    def execute(self, var, ds, **kwargs):
+        """Return the part of *ds* in the region requested for *var*, or pass
+        through *ds* unaltered if no region was requested.
+        """
+        lat_bounds, lon_bounds = self.requested_region(var)
+        if lat_bounds is None and lon_bounds is None:
+            return ds
+        tv_name = var.name_in_model
+        dim_axes = ds[tv_name].cf.dim_axes()
+        for ax, bounds, std_name in (('Y', lat_bounds, 'latitude'), ('X', lon_bounds, 'longitude')):
+            if bounds is None:
+                continue
+            c_name = dim_axes.get(ax, None)
+            if c_name is None or ds[c_name].attrs.get('standard_name', '') != std_name:
+                var.log.warning("Not subsetting %s to %s bounds %s: data has no 1D %s coordinate.",
+                                var.full_name, std_name, list(bounds), std_name)
+                continue
+            c_values = ds[c_name].values
+            lo, hi = bounds
+            if ax == 'Y':
+                idx = np.flatnonzero((c_values >= lo) & (c_values <= hi))
+                new_values = c_values[idx]
+            else:
+                width = (hi - lo) % 360. or 360.
+                offset = (c_values - lo) % 360.
+                idx = np.flatnonzero(offset <= width)
+                # order longitudes eastward from the first bound
+                idx = idx[np.argsort(offset[idx], kind='stable')]
+                new_values = c_values[idx] + 360. * np.round((lo + offset[idx] - c_values[idx]) / 360.)
+            if len(idx) == 0:
+                raise ValueError((f"No {std_name} values of {var.full_name} within the "
+                                  f"requested bounds {list(bounds)}.\n"
+                                  f"(Axis values ({ds[c_name].attrs.get('units', '')}): {c_values})"))
+            if np.all(np.diff(idx) == 1):
+                ds = ds.isel({c_name: slice(idx[0], idx[-1] + 1)})
+            else:
+                ds = ds.isel({c_name: idx})
+            shift = new_values - c_values[idx]
+            if np.any(shift != 0):
+                ds = ds.assign_coords({c_name: ds[c_name].copy(data=new_values)})
+                bounds_name = ds[c_name].attrs.get('bounds', None)
+                if bounds_name in ds:
+                    ds[bounds_name] = (ds[bounds_name] + xr.DataArray(shift, dims=[c_name])).assign_attrs(
+                        ds[bounds_name].attrs)
+            var.log.info("Extracted %s %s to %s (%d points) from '%s' of %s.",
+                         std_name, lo, hi, len(idx), c_name, var.full_name,
+                         tags=util.ObjectLogTag.NC_HISTORY
+                         )
+        return ds
+
+
+class ResampleFunction(PreprocessorFunctionBase):
+    """Resample a variable to the frequency requested by the POD when the data
+    catalog only has it at a higher frequency (e.g. daily means from 6-hourly
+    data.) The values in each period are reduced with the ``time`` method in the
+    variable's ``cell_methods`` (``mean`` if not given), using xarray's
+    calendar-aware ``resample``, which keeps the data lazy.
+
+    . note::
+
+       Periods start on the natural boundaries of the requested frequency (the
+       start of each day, month, etc.) and are labelled with their start time.
+       The time bounds are reset to the start and end of each period.
+    """
+    # catalog frequencies queried for higher-frequency data, lowest first
+    _catalog_frequencies = ('mon', 'day', '6hr', '3hr', '1hr')
+    # encoding kept from the input data
+    _encoding_keys = ('units', 'calendar', '_FillValue', 'missing_value')
+    # CF cell_methods time methods -> xarray reductions
+    _time_methods = {'mean': 'mean', 'sum': 'sum', 'maximum': 'max', 'minimum': 'min', 'point': 'first'}
+
+    @staticmethod
+    def time_method(var) -> str:
+        """Return the ``time`` method in the ``cell_methods`` requested for
+        *var*, or ``mean`` if none was given.
+        """
+        match = re.search(r'\btime\s*:\s*(\w+)', getattr(var, 'cell_methods', '') or '')
+        return 'mean' if match is None else match.group(1).lower()
+
+    @staticmethod
+    def resample_rule(freq: util.DateFrequency) -> str:
+        """Return the pandas/cftime offset alias for the DateFrequency *freq*."""
+        q = freq.quantity
+        rules = {'min': f'{q}min', 'hr': f'{q}h', 'day': f'{q}D', 'wk': f'{7 * q}D',
+                 'mon': f'{q}MS', 'season': f'{q}QS-DEC', 'yr': f'{q}YS'}
+        if freq.unit not in rules:
+            raise ValueError(f"Can't resample to frequency '{freq}'.")
+        return rules[freq.unit]
+
+    def edit_request(self, v: varlist_util.VarlistEntry, **kwargs):
+        """Add alternates for the translation of *v* at each of the catalog
+        frequencies higher than the one requested, lowest first, so that data
+        at the requested frequency is used if available, and otherwise the
+        highest-frequency data that has to be reduced least.
+        """
+        tv = v.translation
+        if tv is None or v.is_static or tv.T is None or not hasattr(tv.T, 'frequency'):
+            return v
+        freq = v.T.frequency
+        if not isinstance(freq, util.DateFrequency):
+            return v
+        for f in self._catalog_frequencies:
+            new_freq = util.DateFrequency(f)
+            if new_freq < freq:
+                new_dims = [dataclasses.replace(c, frequency=new_freq) if c.axis == 'T' else c
+                            for c in tv.dims]
+                v.alternates.append(dataclasses.replace(tv, coords=(new_dims + tv.scalar_coords)))
+        return v
+
+    def execute(self, var, ds, **kwargs):
+        """If the time step of *ds* is less than half of the frequency requested
+        for *var*, return *ds* resampled to that frequency, otherwise pass
+        through *ds* unaltered.
+        """
+        if var.is_static:
+            return ds
+        freq = var.T.frequency
+        tv_name = var.name_in_model
+        t_name = ds[tv_name].cf.dim_axes().get('T', None)
+        if not isinstance(freq, util.DateFrequency) or t_name is None or ds.sizes[t_name] < 2:
+            return ds
+        step = pd.to_timedelta(np.diff(ds[t_name].values)).median()
+        if 2 * step > freq:
+            return ds
+        method = self.time_method(var)
+        if method not in self._time_methods:
+            raise ValueError((f"Can't resample {var.full_name} to {freq}: unsupported time "
+                              f"method '{method}' in cell_methods '{var.cell_methods}'."))
+        rule = self.resample_rule(freq)
+        t_attrs = ds[t_name].attrs.copy()
+        bounds_name = t_attrs.get('bounds', None)
+        new_ds = ds.drop_vars(bounds_name) if bounds_name in ds else ds
+        new_ds = getattr(new_ds.resample({t_name: rule}), self._time_methods[method])(keep_attrs=True)
+        new_ds[t_name].attrs.update(t_attrs)
+        for name in new_ds.variables:
+            if name in ds.variables:
+                new_ds[name].encoding.update({k: v for k, v in ds[name].encoding.items()
+                                              if k in self._encoding_keys})
+        if bounds_name in ds:
+            # each period runs from its label to the next one
+            labels = new_ds.indexes[t_name]
+            new_ds[bounds_name] = xr.Variable(
+                ds[bounds_name].dims, np.stack([labels, labels.shift(1, rule)], axis=1),
+                ds[bounds_name].attrs
+            )
+        var.log.info("Resampled %s from time steps of %s to %s (time: %s).",
+                     var.full_name, step, freq, method,
+                     tags=util.ObjectLogTag.NC_HISTORY
+                     )
+        return new_ds
+
+
+class ApplyScaleAndOffsetFunction(AffineFunctionBase):
     """If the Dataset has ``scale_factor`` and ``add_offset`` attributes set,
     apply the corresponding constant linear transformation to the dependent
     variable's values and unset these attributes. See `CF convention documentation
@@ -631,7 +1112,7 @@ class ApplyScaleAndOffsetFunction(PreprocessorFunctionBase):
         new_v.translation = new_tv
         return new_v
 
-    def execute(self, var, ds, **kwargs):
+    def plan_transform(self, var, ds, transform, **kwargs):
         """Retrieve the ``scale_factor`` and ``add_offset`` attributes from the
         dependent variable of *ds*, and if set, apply the linear transformation
         to the dependent variable. If both are set, the scaling is applied first
@@ -643,7 +1124,7 @@ class ApplyScaleAndOffsetFunction(PreprocessorFunctionBase):
         # CF standard says to scale first
         if ds_var.attrs.get('scale_factor', ''):
             scale_factor = float(ds_var.attrs['scale_factor'])
-            ds_var *= scale_factor
+            transform = transform.then(scale_factor)
             del ds_var.attrs['scale_factor']
             var.log.info("Scaled values of '%s' variable in %s by a factor of %f.",
                          tv_name, var.full_name, scale_factor,
@@ -652,14 +1133,14 @@ class ApplyScaleAndOffsetFunction(PreprocessorFunctionBase):
 
         if ds_var.attrs.get('add_offset', ''):
             add_offset = float(ds_var.attrs['add_offset'])
-            ds_var += add_offset
+            transform = transform.then(1.0, add_offset)
             del ds_var.attrs['add_offset']
             var.log.info("Added an offset of %f to values of '%s' variable in %s.",
                          add_offset, tv_name, var.full_name,
                          tags=(util.ObjectLogTag.NC_HISTORY, util.ObjectLogTag.BANNER)
                          )
 
-        return ds
+        return ds, transform
 
 
 class UserDefinedPreprocessorFunction(PreprocessorFunctionBase):
@@ -703,6 +1184,13 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
     output_to_ncl: bool = False
     nc_format: str
     user_pp_scripts: list
+    per_variable_datasets: bool = False
+    preprocess_workers: int = 1
+    write_workers: int = 4
+    output_format: str = "netcdf"
+    zarr_chunk_bytes: int = 64 * 1024 ** 2
+    output_encoding: dict
+    time_block_years: int = 0
 
     def __init__(self,
                  model_paths: util.ModelDataPathManager,
@@ -710,12 +1198,89 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         self.WORK_DIR = model_paths.MODEL_WORK_DIR
         # initialize PreprocessorFunctionBase objects
         self.file_preproc_functions = []
-        # initialize xarray parser
-        self.parser = self._XarrayParserClass(config)
+        # initialize xarray parser; worker threads create their own in :attr:`parser`
+        self._parser_config = config
+        self._parser_local = threading.local()
+        self._parser_local.parser = self._XarrayParserClass(config)
         if config.large_file:
             self.nc_format = "NETCDF4_CLASSIC"
         else:
             self.nc_format = "NETCDF4"
+        # keep one Dataset per variable instead of merging each case into one Dataset
+        self.per_variable_datasets = config.get('per_variable_datasets', False)
+        # number of (case, variable) pairs to preprocess concurrently
+        self.preprocess_workers = max(int(config.get('preprocess_workers', 1) or 1), 1)
+        # content-addressed cache of preprocessed files, shared between runs
+        self.pp_cache = None
+        self.pp_cache_keys = dict()
+        self.pp_cache_hits = set()
+        # Datasets opened from the catalog assets, keyed by their paths; see open_assets
+        self.opened_assets = dict()
+        # (catalog, query plan) for each data catalog; see catalog_query_plan
+        self.query_plans = dict()
+        # requests for data products already requested under another name;
+        # (case name, variable name) -> VarlistEntry that is processed for both
+        self.duplicate_vars = dict()
+        # directory for the cache of parsed CMOR tables; see util.CompiledCache
+        self.table_cache_dir = config.get('table_cache_dir', '')
+        if config.get('pp_cache_dir', ''):
+            max_size = float(config.get('pp_cache_max_size', 50) or 0)
+            self.pp_cache = util.PPDataCache(config.pp_cache_dir,
+                                             max_size=int(max_size * 1024 ** 3), log=_log)
+            if not self.per_variable_datasets:
+                # cache entries hold one variable each
+                _log.info("Setting per_variable_datasets for pp_cache_dir = '%s'.",
+                          self.pp_cache.cache_dir)
+                self.per_variable_datasets = True
+        # number of threads used to compute the batched netCDF writes
+        self.write_workers = max(int(config.get('write_workers', self.write_workers) or 1), 1)
+        # file format of the preprocessed data: 'netcdf' or 'zarr'
+        self.output_format = config.get('output_format', self.output_format) or self.output_format
+        # encoding policy for the output files of all variables; see output_encoding_policy
+        self.output_encoding = dict(config.get('output_encoding', None) or dict())
+        # number of years of data written at a time; 0 writes each variable whole
+        self.time_block_years = max(int(config.get('time_block_years', 0) or 0), 0)
+        if self.time_block_years and not self.per_variable_datasets:
+            # blocks are taken from each variable's own Dataset
+            _log.info("Setting per_variable_datasets for time_block_years = %d.",
+                      self.time_block_years)
+            self.per_variable_datasets = True
+        if self.preprocess_workers > 1 and not self.per_variable_datasets:
+            # variables can only be processed independently if they don't share a Dataset
+            _log.info("preprocess_workers = %d only applies if per_variable_datasets is set.",
+                      self.preprocess_workers)
+
+    @property
+    def parser(self):
+        """Metadata parser (instance of ``_XarrayParserClass``) for the calling
+        thread. The parser keeps state for the Dataset it's working on, so
+        each preprocessing worker thread gets its own instance.
+        """
+        parser = getattr(self._parser_local, 'parser', None)
+        if parser is None:
+            parser = self._XarrayParserClass(self._parser_config)
+            self._parser_local.parser = parser
+        return parser
+
+    def run_var_tasks(self, func, tasks: list) -> list:
+        """Call *func* with the arguments in each tuple of *tasks*, using up to
+        ``preprocess_workers`` threads, and return the results in the order of
+        *tasks*. The first exception raised by a task is re-raised after the
+        running tasks finish; tasks that haven't started are cancelled. Tasks
+        are run one at a time unless ``per_variable_datasets`` is set, since
+        the variables of a case otherwise share one Dataset.
+        """
+        if self.preprocess_workers <= 1 or not self.per_variable_datasets or len(tasks) <= 1:
+            return [func(*args) for args in tasks]
+        pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.preprocess_workers, len(tasks)),
+            thread_name_prefix='mdtf_preprocess'
+        )
+        try:
+            futures = [pool.submit(func, *args) for args in tasks]
+            return [f.result() for f in futures]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
 
     @property
     def _functions(self):
@@ -728,9 +1293,9 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         """
         # normal operation: run all functions
         return [
-            AssociatedVariablesFunction, PercentConversionFunction,
+            AssociatedVariablesFunction, ExtractRegionFunction, PercentConversionFunction,
             PrecipRateToFluxFunction, ConvertUnitsFunction,
-            ExtractLevelFunction, RenameVariablesFunction
+            ExtractLevelFunction, ResampleFunction, RenameVariablesFunction
         ]
 
     def cast_to_cftime(self, dt: datetime.datetime, calendar):
@@ -761,18 +1326,20 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         """
 
         dt_range = var.T.range
-        ds_decode = xr.decode_cf(ds, use_cftime=True)
-        t_coord = ds_decode[var.T.name]
+        t_coord = ds[var.T.name]
         # time coordinate will be a list if variable has
         # multiple coordinates/coordinate attributes
-        if hasattr(t_coord, 'calendar'):
-            cal = t_coord.calendar
+        if 'calendar' in t_coord.attrs:
+            cal = t_coord.attrs['calendar']
         elif 'calendar' in t_coord.encoding:
             cal = t_coord.encoding['calendar']
         else:
             raise ValueError(f'calendar attribute not found for catalog time coord')
-        t_start = t_coord.values[0]
-        t_end = t_coord.values[-1]
+        # only decode the endpoints of the time axis
+        t_start, t_end = t_coord.values[0], t_coord.values[-1]
+        if np.issubdtype(t_coord.dtype, np.number):
+            units, _ = self.get_time_units_calendar(t_coord)
+            t_start, t_end = cftime.num2date([t_start, t_end], units, calendar=cal)
         # lower/upper are earliest/latest datetimes consistent with the date we
         # were given, up to the precision that was specified (eg lower for "2000"
         # would be Jan 1, 2000, and upper would be Dec 31).
@@ -829,18 +1396,30 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
                 var.log.error(err_str)
                 raise IndexError(err_str)
 
-    def normalize_group_time_vals(self, time_vals: np.ndarray) -> np.ndarray:
-        """Apply logic to format time_vals lists found in
-        check_group_daterange and convert them into str type.
-        This function also handles missing leading zeros
+    def sort_by_catalog_order(self, cat_subset, subset_dict: dict) -> list:
+        """Return the keys of the dataset dictionary *subset_dict* returned by
+        ``to_dataset_dict(aggregate=False)`` in the order of the corresponding
+        entries in the catalog subset *cat_subset*. Datasets are matched to
+        catalog entries through the asset path that intake-esm records in each
+        dataset's attributes, so no time values need to be read.
+        """
+        path_col = cat_subset.esmcat.assets.column_name
+        order = {path: i for i, path in enumerate(cat_subset.df[path_col])}
+        return sorted(subset_dict.keys(),
+                      key=lambda k: order.get(subset_dict[k].attrs.get(f'intake_esm_attrs:{path_col}', None),
+                                              len(order)))
+
+    def concat_time_chunks(self, ds_list: list, time_dim: str) -> xr.Dataset:
+        """Join the per-file datasets in *ds_list*, which must already be sorted
+        in time order, along the time dimension *time_dim*.
+
+        All chunks are passed to a single :py:func:`xarray.concat` call, so the
+        cost is linear in the number of files; concatenating them one at a time
+        copies the growing dataset at each step.
         """
-        poss_digits = list(range(4, 15, 2))
-        for i in range(len(time_vals)):
-            if isinstance(time_vals[i], str):
-                time_vals[i] = time_vals[i].replace(' ', '').replace('-', '').replace(':', '')
-                while len(time_vals[i]) not in poss_digits:
-                    time_vals[i] = '0' + time_vals[i]
-        return time_vals
+        if len(ds_list) == 1:
+            return ds_list[0]
+        return xr.concat(ds_list, time_dim)
 
     def drop_attributes(self, xr_ds: xr.Dataset) -> xr.Dataset:
         """ Drop attributes that cause conflicts with xarray dataset merge"""
@@ -890,73 +1469,129 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
             group_df = group_df[group_df['chunk_freq'] == grabbed_chunk]
         return pd.DataFrame.from_dict(group_df).reset_index()
 
-    def crop_date_range(self, case_date_range: util.DateRange, xr_ds, time_coord) -> xr.Dataset:
-        xr_ds = xr.decode_cf(xr_ds,
-                             decode_coords=True,  # parse coords attr
-                             decode_times=True,
-                             use_cftime=True  # use cftime instead of np.datetime6
-                             )
+    def get_time_units_calendar(self, time_var) -> tuple:
+        """Return the units and calendar of the (decoded or undecoded) time
+        coordinate *time_var*, from its attributes or encoding.
+        """
+        units = time_var.attrs.get('units', time_var.encoding.get('units', None))
         cal = 'noleap'
-        if 'calendar' in xr_ds[time_coord.name].attrs:
-            cal = xr_ds[time_coord.name].attrs['calendar']
-        elif 'calendar' in xr_ds[time_coord.name].encoding:
-            cal = xr_ds[time_coord.name].encoding['calendar']
-
-        ds_date_time = xr_ds[time_coord.name].values
-        ds_start_time = ds_date_time[0]
-        ds_end_time = ds_date_time[-1]
-        # force hours in dataset to match date range if frequency is daily, monthly, annual
-        if ds_start_time.hour != case_date_range.start_datetime.hour and case_date_range.precision < 4:
-            dt_start_new = datetime.datetime(ds_start_time.year,
-                                             ds_start_time.month,
-                                             ds_start_time.day,
-                                             ds_start_time.hour,
-                                             ds_start_time.minute,
-                                             ds_start_time.second)
-            ds_start = self.cast_to_cftime(dt_start_new, cal)
-        else:
-            ds_start = self.cast_to_cftime(ds_start_time, cal)
-        if ds_end_time.hour != case_date_range.end_datetime.hour and case_date_range.precision < 4:
-            dt_end_new = datetime.datetime(ds_end_time.year,
-                                           ds_end_time.month,
-                                           ds_end_time.day,
-                                           ds_end_time.hour,
-                                           ds_end_time.minute,
-                                           ds_end_time.second)
-            ds_end = self.cast_to_cftime(dt_end_new, cal)
-        else:
-            ds_end = self.cast_to_cftime(ds_end_time, cal)
-        date_range_cf_start = self.cast_to_cftime(case_date_range.start.lower, cal)
-        date_range_cf_end = self.cast_to_cftime(case_date_range.end.lower, cal)
-
-        # dataset has no overlap with the user-specified date range
-        if ds_start < date_range_cf_start and ds_end < date_range_cf_start or \
-                ds_end > date_range_cf_end and ds_start > date_range_cf_end:
-            new_xr_ds = None
-        # dataset falls entirely within user-specified date range
-        elif ds_start >= date_range_cf_start and ds_end <= date_range_cf_end:
-            new_xr_ds = xr_ds.sel({time_coord.name: slice(ds_start, ds_end)})
-        # dataset overlaps user-specified date range start (corrected)
-        elif ds_start <= date_range_cf_start <= ds_end <= date_range_cf_end:
-            new_xr_ds = xr_ds.sel({time_coord.name: slice(date_range_cf_start, ds_end)})
-        # dataset overlaps user-specified date range start (orig)
-        elif date_range_cf_start < ds_start and \
-                date_range_cf_start <= ds_end <= date_range_cf_end:
-            new_xr_ds = xr_ds.sel({time_coord.name: slice(date_range_cf_start, ds_end)})
-        # dataset overlaps user-specified date range end
-        elif date_range_cf_start < ds_start <= date_range_cf_end <= ds_end:
-            new_xr_ds = xr_ds.sel({time_coord.name: slice(ds_start, date_range_cf_end)})
-        # dataset contains all of requested date range
-        elif date_range_cf_start >= ds_start and date_range_cf_end <= ds_end:
-            new_xr_ds = xr_ds.sel({time_coord.name: slice(date_range_cf_start, date_range_cf_end)})
-        else:
-            print(f'ERROR: new_xr_ds is unset because of incompatibility of time:')
-            print(f'       Dataset   start: {ds_start=}')
-            print(f'       Dataset   end  : {ds_end=}')
-            print(f'       Requested start: {date_range_cf_start=}')
-            print(f'       Requested end  : {date_range_cf_end=}')
+        if 'calendar' in time_var.attrs:
+            cal = time_var.attrs['calendar']
+        elif 'calendar' in time_var.encoding:
+            cal = time_var.encoding['calendar']
+        return units, cal
+
+    def time_bounds_as_values(self, time_var, dates: list) -> list:
+        """Convert the datetimes in *dates* to values comparable with those of the
+        time coordinate *time_var*: numbers in the coordinate's own units and
+        calendar if it hasn't been decoded, or cftime datetimes if it has.
+        """
+        units, cal = self.get_time_units_calendar(time_var)
+        cf_dates = [self.cast_to_cftime(dt, cal) for dt in dates]
+        if np.issubdtype(time_var.dtype, np.number):
+            if units is None or 'since' not in units:
+                raise util.DataRequestError(f"Unable to parse units '{units}' of time coordinate "
+                                            f"'{time_var.name}'.")
+            return list(cftime.date2num(cf_dates, units, calendar=cal))
+        return cf_dates
+
+    def crop_date_range(self, case_date_range: util.DateRange, xr_ds, time_coord) -> xr.Dataset:
+        """Return the part of the per-file dataset *xr_ds* that falls within
+        *case_date_range*, or None if the file doesn't overlap it.
+
+        The requested start and end dates are converted into the units and
+        calendar of the file's own time coordinate, and compared with its raw
+        values, so the crop is an index slice: no variables in *xr_ds* are
+        decoded, and data variables stay lazy.
+        """
+        tn = time_coord.name
+        t_vals = np.asarray(xr_ds[tn].values)
+        if t_vals.size == 0:
+            return None
+        t_lower, t_upper = self.time_bounds_as_values(
+            xr_ds[tn], [case_date_range.start.lower, case_date_range.end.lower]
+        )
+        # requested range is inclusive at both ends
+        i_start = int(np.searchsorted(t_vals, t_lower, side='left'))
+        i_end = int(np.searchsorted(t_vals, t_upper, side='right'))
+        if i_start >= i_end:
+            # dataset has no overlap with the user-specified date range
+            return None
+        if i_start == 0 and i_end == t_vals.size:
+            # dataset falls entirely within user-specified date range
+            return xr_ds
+        return xr_ds.isel({tn: slice(i_start, i_end)})
+
+    def decode_time_coord(self, xr_ds: xr.Dataset, time_coord) -> xr.Dataset:
+        """Decode only the time coordinate of *xr_ds* (and its bounds variable, if
+        present) into cftime datetimes. Other variables are left undecoded for
+        :meth:`~src.xr_parser.DefaultDatasetParser.parse`.
+        """
+        tn = time_coord.name
+        if not np.issubdtype(xr_ds[tn].dtype, np.number):
+            return xr_ds  # already decoded
+        time_vars = [tn]
+        bounds = xr_ds[tn].attrs.get('bounds', None)
+        if bounds in xr_ds.variables:
+            time_vars.append(bounds)
+        time_ds = xr.decode_cf(xr_ds[time_vars].drop_vars([v for v in xr_ds[time_vars].coords if v != tn]),
+                               decode_coords=False,
+                               decode_times=True,
+                               use_cftime=True)
+        xr_ds = xr_ds.assign_coords({tn: time_ds[tn]})
+        if bounds in time_ds.variables:
+            xr_ds[bounds] = time_ds[bounds]
+        return xr_ds
+
+    # digits filled in when encoding catalog dates with less than second precision;
+    # matches the defaults used by datetime.strptime
+    _date_key_fill = '00000101000000'
+    # numpy datetime unit corresponding to the precision (number of digits) of a date string
+    _date_key_units = {4: 'Y', 6: 'M', 8: 'D', 10: 'h', 12: 'm', 14: 's'}
+
+    def encode_group_time_vals(self, time_vals: pd.Series) -> tuple:
+        """Vectorized conversion of date strings from the catalog (YYYY[MM[DD[hh[mm[ss]]]]],
+        possibly missing leading zeros) into int64 keys of the form YYYYMMDDhhmmss,
+        which sort in time order.
+
+        Returns:
+            tuple of the int64 keys and an int array of the number of digits
+            (precision) in each input string.
 
-        return new_xr_ds
+        Raises:
+            ValueError: if any of the strings isn't a valid date.
+        """
+        vals = time_vals.astype(str)
+        lens = vals.str.len()
+        # add missing leading zeros: pad to an even number of digits, and at least a 4-digit year
+        vals = vals.where(lens % 2 == 0, '0' + vals).str.zfill(4)
+        lens = vals.str.len().to_numpy()
+        if not vals.str.isdigit().all() or lens.max() > 14:
+            raise ValueError(f"Malformed dates in catalog: {list(vals[~vals.str.isdigit()])}")
+        keys = pd.Series(vals + pd.Series([self._date_key_fill[n:] for n in lens], index=vals.index))
+        return keys.astype(np.int64).to_numpy(), lens
+
+    def _date_keys_to_datetime64(self, keys: np.ndarray) -> np.ndarray:
+        """Convert int64 YYYYMMDDhhmmss keys to numpy datetime64[s] values. Raises
+        ValueError for dates that aren't valid in the proleptic Gregorian calendar."""
+        k = keys.astype(np.int64)
+        iso = np.char.add(np.char.zfill((k // 10 ** 10).astype(str), 4), '-')
+        for div, sep in ((10 ** 8, '-'), (10 ** 6, 'T'), (10 ** 4, ':'), (100, ':'), (1, '')):
+            iso = np.char.add(np.char.add(iso, np.char.zfill((k // div % 100).astype(str), 2)), sep)
+        return iso.astype('datetime64[s]')
+
+    def _next_date_keys(self, end_keys: np.ndarray, precision: np.ndarray) -> np.ndarray:
+        """Return the start of the period immediately following each of *end_keys*,
+        where the length of the period is set by the *precision* of each key, as
+        datetime64[s] values.
+        """
+        end_dt = self._date_keys_to_datetime64(end_keys)
+        next_dt = np.empty_like(end_dt)
+        for n_digits, unit in self._date_key_units.items():
+            mask = precision == n_digits
+            if mask.any():
+                next_dt[mask] = (end_dt[mask].astype(f'datetime64[{unit}]') + 1).astype('datetime64[s]')
+        return next_dt
 
     def check_group_daterange(self, df: pd.DataFrame, date_range: util.DateRange,
                               log=_log) -> pd.DataFrame:
@@ -964,192 +1599,200 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         the date ranges contained in the files are contiguous in time and that
         the date range of the files spans the query date range.
 
+        Start and end dates are parsed from the catalog ``time_range`` column and
+        encoded as int64 YYYYMMDDhhmmss keys, so that sorting, the contiguity
+        check and the overlap filtering are done with array operations rather
+        than per-row Python objects.
+
         Args:
             df (Pandas Dataframe):
             date_range: requested daterange of POD
             log: log file
         """
-        date_col = "date_range"
-        if hasattr(df, 'time_range'):
-            start_times = []
-            end_times = []
-            for tr in df['time_range'].values:
-                tr = tr.replace(' ', '').replace('-', '').replace(':', '')
-                start_times.append(tr[0:len(tr) // 2])
-                end_times.append(tr[len(tr) // 2:])
-            df['start_time'] = pd.Series(start_times)
-            df['end_time'] = pd.Series(end_times)
-        else:
+        if not hasattr(df, 'time_range'):
             raise AttributeError('Data catalog is missing the attribute `time_range`;'
                                  ' this is a required entry.')
+        df = df.reset_index(drop=True)
         try:
-            start_time_vals = self.normalize_group_time_vals(df['start_time'].values.astype(str))
-            end_time_vals = self.normalize_group_time_vals(df['end_time'].values.astype(str))
-            if not isinstance(start_time_vals[0], datetime.date):
-                date_format = dl.date_fmt(start_time_vals[0])
-                # convert start_times to date_format for all files in query
-                df['start_time'] = start_time_vals
-                df['start_time'] = df['start_time'].apply(lambda x:
-                                                          datetime.datetime.strptime(x, date_format))
-                # convert end_times to date_format for all files in query
-                df['end_time'] = end_time_vals
-                df['end_time'] = df['end_time'].apply(lambda x:
-                                                      datetime.datetime.strptime(x, date_format))
-            # method throws ValueError if ranges aren't contiguous
-            dates_df = df.loc[:, ['start_time', 'end_time']]
-            date_range_vals = []
-            for idx, x in enumerate(df.values):
-                st = dates_df.at[idx, 'start_time']
-                en = dates_df.at[idx, 'end_time']
-                date_range_vals.append(util.DateRange(st, en))
-            group_df = df.assign(date_range=date_range_vals)
-            sorted_df = group_df.sort_values(by=date_col)
-
-            files_date_range = util.DateRange.from_contiguous_span(
-                *(sorted_df[date_col].to_list())
-            )
-            # throws AssertionError if we don't span the query range
-            # assert files_date_range.contains(self.attrs.date_range)
+            df = df[df['time_range'].notna()].reset_index(drop=True)
+            time_range = df['time_range'].astype(str).str.replace(r'[ \-:]', '', regex=True)
+            tr_lens = time_range.str.len()
+            start_times = pd.Series('', index=time_range.index)
+            end_times = pd.Series('', index=time_range.index)
+            for tr_len in tr_lens.unique():
+                mask = tr_lens == tr_len
+                start_times[mask] = time_range[mask].str.slice(0, tr_len // 2)
+                end_times[mask] = time_range[mask].str.slice(tr_len // 2)
+            start_keys, _ = self.encode_group_time_vals(start_times)
+            end_keys, end_prec = self.encode_group_time_vals(end_times)
+
+            sort_idx = np.argsort(start_keys, kind='stable')
+            start_keys = start_keys[sort_idx]
+            end_keys = end_keys[sort_idx]
+            end_prec = end_prec[sort_idx]
+            sorted_df = df.iloc[sort_idx].assign(start_time=start_keys, end_time=end_keys)
+
+            # the start of each file should be the start of the period following the end of
+            # the previous file; also allow for Feb 29 missing in calendars without leap days
+            if len(sort_idx) > 1:
+                expected_dt = self._next_date_keys(end_keys[:-1], end_prec[:-1])
+                start_dt = self._date_keys_to_datetime64(start_keys[1:])
+                contiguous = (start_dt == expected_dt) | \
+                    ((start_dt == expected_dt + np.timedelta64(1, 'D'))
+                     & (expected_dt.astype('datetime64[D]').astype(str) == np.char.add(
+                        expected_dt.astype('datetime64[Y]').astype(str), '-02-29')))
+                for i in np.flatnonzero(~contiguous):
+                    log.warning("Intervals %s and %s may not be contiguous and nonoverlapping.",
+                                sorted_df['time_range'].iloc[i], sorted_df['time_range'].iloc[i + 1])
+
             # throw out df entries not in date_range
-            return_df = []
-            for i in sorted_df.index:
-                cat_row = sorted_df.iloc[i]
-                if pd.isnull(cat_row['start_time']):
-                    continue
-                else:
-                    ds_st = cat_row['start_time']
-                    ds_et = cat_row['end_time']
-                # date range includes entire or part of dataset
-                if ds_st >= date_range.start.lower and ds_et < date_range.end.upper or \
-                        ds_st < date_range.end.lower and ds_et >= date_range.start.lower or \
-                        ds_st <= date_range.end.lower < ds_et:
-                    return_df.append(cat_row)
-
-            return pd.DataFrame.from_dict(return_df)
+            dr_start = self.date_to_key(date_range.start.lower)
+            dr_end = self.date_to_key(date_range.end.lower)
+            dr_end_upper = self.date_to_key(date_range.end.upper)
+            # date range includes entire or part of dataset
+            overlaps = ((start_keys >= dr_start) & (end_keys < dr_end_upper)) | \
+                ((start_keys < dr_end) & (end_keys >= dr_start)) | \
+                ((start_keys <= dr_end) & (dr_end < end_keys))
+            return sorted_df[overlaps]
         except ValueError:
-            log.error("Non-contiguous or malformed date range in files:", group_df["path"].values)
-        except AssertionError:
-            log.debug(("Eliminating expt_key since date range of files (%s) doesn't "
-                       "span query range (%s)."), files_date_range, self.attrs.date_range)
+            log.error("Non-contiguous or malformed date range in files: %s", df["path"].values)
         except Exception as exc:
             log.warning(f"Caught exception {repr(exc)}")
         # hit an exception; return empty DataFrame to signify failure
-        return pd.DataFrame(columns=group_df.columns)
+        return pd.DataFrame(columns=df.columns)
+
+    @staticmethod
+    def date_to_key(dt: datetime.datetime) -> int:
+        """Encode *dt* as an int64 YYYYMMDDhhmmss key (see :meth:`encode_group_time_vals`)."""
+        return (((((dt.year * 100 + dt.month) * 100 + dt.day) * 100 + dt.hour) * 100
+                 + dt.minute) * 100 + dt.second)
 
     def normalize_time_units(self, subset_dict: dict, time_coord, log=_log) -> dict:
         """
         Some datasets will have the time units that are different in each individual file.
-        This function updates each time unit to rely on the earliest year grabbed in the
-        query stage.
+        This function updates each time unit to rely on the earliest reference date grabbed
+        in the query stage.
 
         This function assumes the time coord units attr will be of the form "{unit} since ????".
+        The time values (and time bounds, if present) of each file are rebased with a single
+        array-wide affine transformation, which stays lazy for dask-backed variables.
         """
-
-        time_units = np.sort([subset_dict[f].time.units for f in list(subset_dict)])
         tn = time_coord.name  # abbreviate
+        time_units = {f: subset_dict[f][tn].attrs.get('units', '') for f in subset_dict}
+        if len(set(time_units.values())) <= 1:
+            return subset_dict
+        # check if time coord units are in the form "{unit} since {date}"
+        # they can be different units as this function converts to the earliest case
+        if not all("since" in u for u in time_units.values()):
+            raise AttributeError("Different units were found for time coord in each file. "
+                                 "We were unable to normalize due to the units not being in '{unit} since ' format")
 
         # assumes each dataset has the same calendar
-        cal = 'noleap'
-        if 'calendar' in subset_dict[list(subset_dict)[0]][tn].attrs:
-            cal = subset_dict[list(subset_dict)[0]][tn].attrs['calendar']
-        elif 'calendar' in subset_dict[list(subset_dict)[0]][tn].encoding:
-            cal = subset_dict[list(subset_dict)[0]][tn].encoding['calendar']
-
-        if len(set(time_units)) > 1:  # check if each dataset has the different time coord units
-            # check if time coord units are in the form "{unit} since {date}"
-            # they can be different units as this function converts to the earliest case
-            if all(["since" in u for u in time_units]):
-                start_unit = time_units[0].split(" ")[0]
-                start_str = " ".join(time_units[0].split(" ")[2:])
-                start_cft = dl.str_to_cftime(
-                    start_str.replace(" ", "").replace(":", "").replace("-", ""),
-                    calendar=cal
-                )
-                new_unit_str = f"{start_unit} since {start_str}"
-
-                # dictionary of how many seconds are in each time unit
-                seconds_in = {
-                    "seconds": 1.0,
-                    "minutes": 60.0,
-                    "hours": 3600.0,
-                    "days": 86400.0,
-                    "weeks": 604800.0,  # these are rarer and vague cases (they could be problematic)
-                    "months": 2628000.0,  # seconds in common year (365 days) / 12
-                    "years": 31536000.0  # common year (365 days)
-                }
-
-                for f in list(subset_dict):
-                    current_unit = subset_dict[f][time_coord.name].units.split(" ")[0].lower()
-                    current_str = " ".join(subset_dict[f][tn].units.split(" ")[2:])
-                    current_cft = dl.str_to_cftime(
-                        current_str.replace(" ", "").replace(":", "").replace("-", ""),
-                        calendar=cal
-                    )
-
-                    # TODO: add logic to add year values for different calendars
-
-                    if current_cft > start_cft:
-                        # get difference between current files unit reference point and earliest found
-                        diff = ((current_cft - start_cft).total_seconds()) / seconds_in[start_unit]
-
-                        subset_dict[f].coords['time'] = subset_dict[f][tn].assign_attrs(
-                            units=new_unit_str
-                        )
-
-                        # convert current unit if it is not the same as the earliest reference
-                        if current_unit != start_unit:
-                            factor = seconds_in[current_unit] / seconds_in[start_unit]
-                        else:
-                            factor = 1.0
+        _, cal = self.get_time_units_calendar(subset_dict[list(subset_dict)[0]][tn])
+        parsed_units = {u: parse_time_units(u, cal) for u in set(time_units.values())}
+        new_unit_str = min(parsed_units, key=lambda u: (parsed_units[u][1], u))
+        start_unit, start_cft = parsed_units[new_unit_str]
+        for f, units in time_units.items():
+            if units == new_unit_str:
+                continue
+            current_unit, current_cft = parsed_units[units]
+            # convert current unit if it is not the same as the earliest reference
+            factor = _seconds_in_time_unit[current_unit] / _seconds_in_time_unit[start_unit]
+            # get difference between current files unit reference point and earliest found
+            diff = (current_cft - start_cft).total_seconds() / _seconds_in_time_unit[start_unit]
+            log.debug("Rebasing time values in %s from '%s' to '%s'", f, units, new_unit_str)
+            subset_dict[f] = self.rebase_time_values(subset_dict[f], tn, factor, diff, new_unit_str)
+        return subset_dict
 
-                        # change the values in the dataset
-                        for i, v in enumerate(subset_dict[f][tn].values):
-                            subset_dict[f].coords[tn].values[i] = factor * v + diff
+    def rebase_time_values(self, xr_ds: xr.Dataset, time_name: str, factor: float, offset: float,
+                           new_units: str) -> xr.Dataset:
+        """Apply the affine transformation ``factor * t + offset`` to the (undecoded)
+        time coordinate *time_name* of *xr_ds* and its bounds variable, if present,
+        and set their units to *new_units*. Integer time values stay integers if
+        the transformation is an integer shift.
+        """
+        def _rebase(da):
+            if np.issubdtype(da.dtype, np.integer) and factor == 1 and float(offset).is_integer():
+                new_da = da + int(offset)
             else:
-                raise AttributeError("Different units were found for time coord in each file. "
-                                     "We were unable to normalize due to the units not being in '{unit} since ' format")
+                new_da = factor * da + offset
+            return new_da.assign_attrs(da.attrs)
+
+        new_time = _rebase(xr_ds[time_name])
+        new_time.attrs['units'] = new_units
+        xr_ds = xr_ds.assign_coords({time_name: new_time})
+        bounds = xr_ds[time_name].attrs.get('bounds', None)
+        if bounds in xr_ds.variables:
+            new_bounds = _rebase(xr_ds[bounds])
+            if 'units' in new_bounds.attrs:
+                new_bounds.attrs['units'] = new_units
+            xr_ds[bounds] = new_bounds
+        return xr_ds
 
-        return subset_dict
+    def catalog_query_plan(self, case_dict: dict, data_catalog: str) -> tuple:
+        """Return the intake-esm catalog opened from *data_catalog* and the
+        :meth:`plan_catalog_queries` for *case_dict*. Both are computed once per
+        catalog, so that :meth:`process` can look at the plan before the data is
+        opened.
+        """
+        if data_catalog not in self.query_plans:
+            # open the csv file using information provided by the catalog definition file;
+            # the parsed entries are cached in a sidecar index next to the csv file
+            cat = util.open_esm_catalog(data_catalog, log=_log, columns=self._catalog_query_columns,
+                                        filters=self.catalog_filters(case_dict))
+            self.query_plans[data_catalog] = (cat, self.plan_catalog_queries(case_dict, cat, data_catalog))
+        return self.query_plans[data_catalog]
+
+    # catalog columns used by plan_catalog_queries and select_var_assets, read in
+    # addition to the ones declared in the catalog header
+    _catalog_query_columns = ('path', 'standard_name', 'variable_id', 'frequency', 'realm',
+                              'modeling_realm', 'chunk_freq', 'time_range')
+
+    def catalog_filters(self, case_dict: dict):
+        """Return a filter for :func:`~src.util.catalog.open_esm_catalog` that
+        loads only the catalog entries :meth:`plan_catalog_queries` can match:
+        every query requires the asset path to match a case name. Returns None
+        if a case name contains regex metacharacters, so that the filter can't
+        be expressed as a substring match.
+        """
+        case_names = list(case_dict)
+        if not case_names or not all(re.fullmatch(r'[\w\-]+', c) for c in case_names):
+            return None
+        return util.catalog_substring_filter('path', case_names)
 
-    def query_catalog(self,
-                      case_dict: dict,
-                      data_catalog: str,
-                      *args) -> dict:
-        """Apply the format conversion implemented in this PreprocessorFunction
-        to the input dataset *dataset*, according to the request made in *var*.
+    def plan_catalog_queries(self, case_dict: dict, cat, data_catalog: str) -> dict:
+        """Resolve the catalog queries for every variable (and its alternates) in
+        every case in *case_dict* in a single batch.
+
+        Queries are evaluated with a :class:`~src.util.catalog.CatalogSearchIndex`
+        built once for the catalog, so the catalog dataframe is scanned once per
+        distinct query term (e.g. per frequency, realm or case path regex) rather
+        than once per variable, alternate and refinement.
 
         Args:
             case_dict: dictionary of case names
+            cat: intake-esm catalog object
             data_catalog: path to data catalog header file
 
         Returns:
-            Dictionary of xarray datasets with catalog information for each case
+            Nested dictionary, keyed by case name and then by variable name, of
+            (query dict, DataFrame of matching catalog entries) tuples.
         """
-
-        try_new_query = False
-        # open the csv file using information provided by the catalog definition file
-        cat = intake.open_esm_datastore(data_catalog)
-        # create filter lists for POD variables
-        cat_dict = {}
-        # Instantiate dataframe to hold catalog subset information
-        cols = list(cat.df.columns.values)
-        if 'date_range' not in [c.lower() for c in cols]:
-            cols.append('date_range')
-
+        index = util.CatalogSearchIndex.from_datastore(cat)
+        use_modeling_realm = cat.df.get('modeling_realm', None) is not None
+        plan = dict()
         for case_name, case_d in case_dict.items():
             # path_regex = re.compile(r'(?i)(?<!\\S){}(?!\\S+)'.format(case_name))
             path_regex = [re.compile(r'({})'.format(case_name))]
-
-            for var in case_d.varlist.iter_vars():
-                if not var.is_static:
-                    date_range = var.T.range
-
+            plan[case_name] = dict()
+            for var in self.iter_product_vars(case_name, case_d):
+                try_new_query = False
                 # define initial query dictionary with variable settings requirements that do not change if
                 # the variable is translated
                 case_d.set_query(var, path_regex)
 
                 # change realm key name if necessary
-                if cat.df.get('modeling_realm', None) is not None:
+                if use_modeling_realm:
                     case_d.query['modeling_realm'] = case_d.query.pop('realm')
 
                 # search catalog for convention specific query object
@@ -1157,11 +1800,13 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
                              data_catalog,
                              var.name,
                              case_name)
-                cat_subset = cat.search(**case_d.query)
-                if cat_subset.df.empty:
-                    # check whether there is an alternate variable to substitute
+                subset_df = index.search(**case_d.query)
+                if subset_df.empty:
+                    # check whether there is an alternate variable to substitute;
+                    # alternates are queried in order until one is found
                     if any(var.alternates):
                         try_new_query = True
+                        var_freq = case_d.query.get('frequency', None)
                         for a in var.alternates:
                             if hasattr(a, 'translation'):
                                 if a.translation is not None:
@@ -1170,22 +1815,24 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
                             else:
                                 case_d.query.update({'variable_id': a.name})
                                 case_d.query.update({'standard_name': a.standard_name})
+                            # alternates added by ResampleFunction request a higher frequency
+                            case_d.query['frequency'] = var_freq
+                            a_freq = getattr(getattr(a, 'T', None), 'frequency', None)
+                            if isinstance(a_freq, util.DateFrequency) and a_freq != var.T.frequency:
+                                a_freq = a_freq.format_local()
+                                case_d.query['frequency'] = '1hr' if a_freq == 'hr' else a_freq
                             if any(var.translation.scalar_coords):
-                                found_z_entry = False
                                 # check for vertical coordinate to determine if level extraction is needed
                                 for c in a.scalar_coords:
                                     if c.axis == 'Z':
                                         var.translation.requires_level_extraction = True
-                                        found_z_entry = True
                                         break
-                                    else:
-                                        continue
-                                if found_z_entry:
-                                    break
+                            subset_df = index.search(**case_d.query)
+                            if not subset_df.empty:
+                                var.translation.requires_resampling = (case_d.query['frequency'] != var_freq)
+                                break
                     if try_new_query:
-                        # search catalog for convention specific query object
-                        cat_subset = cat.search(**case_d.query)
-                        if cat_subset.df.empty:
+                        if subset_df.empty:
                             raise util.DataRequestError(
                                 f"No assets matching query requirements found for {var.translation.name} for"
                                 f" case {case_name} in {data_catalog}. The input catalog may missing entries for the"
@@ -1200,111 +1847,407 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
                 # if multiple entries exist, refine with variable_id
                 # this will solve issues where standard_id is not enough to uniquely ID a variable
                 # e.g. for catalogs with variables defined at individual levels
-                if len(set(cat_subset.df.variable_id)) > 1:
+                if len(set(subset_df.variable_id)) > 1:
                     var.log.info(f"Query for case {case_name} variable {var.name} in {data_catalog} returned multiple"
                                  f"entries. Refining query using variable_id")
                     if var.translation is not None:
                         case_d.query.update({'variable_id': var.translation.name})
                     else:
                         case_d.query.update({'variable_id': var.name})
-                    cat_subset = cat.search(**case_d.query)
-                    if len(set(cat_subset.df.variable_id)) > 1:
+                    subset_df = index.search(**case_d.query)
+                    if len(set(subset_df.variable_id)) > 1:
                         raise util.DataRequestError(
                             f"Unable to find unique entry for {case_d.query['variable_id']}"
                             f" for case {case_name} in {data_catalog}")
+                    plan[case_name][var.name] = (dict(case_d.query), subset_df)
                     case_d.query.pop('variable_id', None)
-                # Get files in specified date range
-                # https://intake-esm.readthedocs.io/en/stable/how-to/modify-catalog.html
-                if not var.is_static:
-                    if "chunk_freq" in cat_subset.df:
-                        cat_subset.esmcat._df = self.check_multichunk(cat_subset.df, date_range, var.log)
-                    cat_subset.esmcat._df = self.check_group_daterange(cat_subset.df, date_range, var.log)
-                if cat_subset.df.empty:
-                    raise util.DataRequestError(
-                        f"check_group_daterange returned empty data frame for {var.name}"
-                        f" case {case_name} in {data_catalog}, indicating issues with data continuity")
-                var.log.info(f"Converting {var.name} catalog subset to dataset dictionary")
-                # convert subset catalog to an xarray dataset dict
-                # and concatenate the result with the final dict
-                cat_subset_dict = cat_subset.to_dataset_dict(
-                    progressbar=False,
-                    xarray_open_kwargs=self.open_dataset_kwargs,
-                    aggregate=False
-                )
-                # NOTE: The time_range of each file in cat_subset_df must be in a specific
-                # order in order for xr.concat() to work correctly. In the current implementation,
-                # we sort by the first value of the time coordinate of each file.
-                # This assumes the unit of said coordinate is homogeneous for each file, which could
-                # easily be problematic in the future.
-                # tl;dr hic sunt dracones
-                var_xr = []
-                if not var.is_static:
-                    cat_subset_dict = self.normalize_time_units(cat_subset_dict, var.T)
-                    time_sort_dict = {f: cat_subset_dict[f].time.values[0]
-                                      for f in list(cat_subset_dict)}
-                    time_sort_dict = dict(sorted(time_sort_dict.items(), key=lambda item: item[1]))
-
-                    for k in list(time_sort_dict):
-                        cat_subset_dict[k] = self.crop_date_range(date_range,
-                                                                  cat_subset_dict[k],
-                                                                  var.T)
-                        if cat_subset_dict[k] is None:
-                            continue
-                        else:
-                            if not var_xr:
-                                var_xr = cat_subset_dict[k]
-                            else:
-                                var_xr = xr.concat([var_xr, cat_subset_dict[k]], var.T.name)
                 else:
-                    # get xarray dataset for static variable
-                    cat_index = [k for k in cat_subset_dict.keys()][0]
-                    if not var_xr:
-                        var_xr = cat_subset_dict[cat_index]
-                    else:
-                        if var.Y is not None:
-                            var_xr = xr.concat([var_xr, cat_subset_dict[cat_index]], var.Y.name)
-                        elif var.X is not None:
-                            var_xr = xr.concat([var_xr, cat_subset_dict[cat_index]], var.X.name)
-                        else:
-                            var_xr = xr.concat([var_xr, cat_subset_dict.values[cat_index]], var.N.name)
-                var_xr = self.drop_attributes(var_xr)
-                # grab only the requested static variable
-                if var.is_static:
-                    del_list = []
-                    for vname in var_xr.variables:
-                        if vname != var.name:
-                            del_list.append(vname)
-                    for del_name in del_list:
-                        del var_xr[del_name]
-                # add standard_name to the variable xarray dataset if it is not defined
-                for vname in var_xr.variables:
-                    if (not isinstance(var_xr.variables[vname], xr.IndexVariable)
-                            and var_xr[vname].attrs.get('standard_name', None) is None):
-                        case_query_standard_name = case_d.query.get('standard_name')
-                        if isinstance(case_query_standard_name, list):
-                            new_standard_name = \
-                            [name for name in case_query_standard_name if name == var.translation.standard_name][0]
-                        else:
-                            new_standard_name = case_query_standard_name
-                        var_xr[vname].attrs['standard_name'] = new_standard_name
-                        var_xr[vname].attrs['name'] = vname
-
-                var.log.info(f'Merging {var.name}')
-                if case_name not in cat_dict:
-                    cat_dict[case_name] = var_xr
+                    plan[case_name][var.name] = (dict(case_d.query), subset_df)
+        return plan
+
+    def query_catalog(self,
+                      case_dict: dict,
+                      data_catalog: str,
+                      *args) -> dict:
+        """Apply the format conversion implemented in this PreprocessorFunction
+        to the input dataset *dataset*, according to the request made in *var*.
+
+        Args:
+            case_dict: dictionary of case names
+            data_catalog: path to data catalog header file
+
+        Returns:
+            Dictionary of xarray datasets with catalog information for each case
+        """
+
+        # open the catalog and resolve the queries for all cases and variables in one batch
+        cat, query_plan = self.catalog_query_plan(case_dict, data_catalog)
+        # create filter lists for POD variables
+        cat_dict = {}
+        # Instantiate dataframe to hold catalog subset information
+        cols = list(cat.df.columns.values)
+        if 'date_range' not in [c.lower() for c in cols]:
+            cols.append('date_range')
+
+        for case_name, case_d in case_dict.items():
+            for var in self.iter_product_vars(case_name, case_d):
+                var_xr = self.query_var(case_name, var, cat, query_plan, data_catalog)
+                if self.per_variable_datasets:
+                    cat_dict.setdefault(case_name, dict())
+                    var_xr = self.share_coords(cat_dict[case_name], var_xr)
+                    cat_dict[case_name][var.name] = var_xr
                 else:
-                    cat_dict[case_name] = xr.merge([cat_dict[case_name], var_xr], compat='no_conflicts')
+                    var.log.info(f'Merging {var.name}')
+                    if case_name not in cat_dict:
+                        cat_dict[case_name] = var_xr
+                    else:
+                        cat_dict[case_name] = xr.merge([cat_dict[case_name], var_xr], compat='no_conflicts')
                 # check that the trimmed variable data in the merged dataset matches the desired date range
-                if not var.is_static:
-                    try:
-                        var.log.info(f'Calling check_time_bounds for {var.name}')
-                        self.check_time_bounds(cat_dict[case_name], var.translation, var.T.frequency)
-                    except LookupError:
-                        var.log.error(f'Time bounds in trimmed dataset for {var.name} in case {case_name} do not match'
-                                      f'requested date_range.')
-                        raise SystemExit("Terminating program")
+                self.check_var_time_bounds(case_name, var, self.get_var_dataset(cat_dict[case_name], var))
+        self.opened_assets.clear()
         return cat_dict
 
+    def query_var(self, case_name: str, var: varlist_util.VarlistEntry, cat, query_plan: dict,
+                  data_catalog: str) -> xr.Dataset:
+        """Open the catalog assets found for *var* of case *case_name* by
+        :meth:`plan_catalog_queries` and return them as a single Dataset cropped
+        to the requested date range.
+        """
+        cat_subset = self.select_var_assets(case_name, var, cat, query_plan, data_catalog)
+        return self.open_var_assets(case_name, var, cat_subset, query_plan[case_name][var.name][0],
+                                    data_catalog)
+
+    def select_var_assets(self, case_name: str, var: varlist_util.VarlistEntry, cat, query_plan: dict,
+                          data_catalog: str):
+        """Return the subset of the catalog *cat* holding the assets for *var*
+        of case *case_name* that overlap the requested date range, sorted by
+        start time.
+        """
+        if not var.is_static:
+            date_range = var.T.range
+        var_query, var_df = query_plan[case_name][var.name]
+        cat_subset = util.subset_esm_catalog(cat, var_df)
+        # Get files in specified date range
+        # https://intake-esm.readthedocs.io/en/stable/how-to/modify-catalog.html
+        if not var.is_static:
+            if "chunk_freq" in cat_subset.df:
+                cat_subset.esmcat._df = self.check_multichunk(cat_subset.df, date_range, var.log)
+            cat_subset.esmcat._df = self.check_group_daterange(cat_subset.df, date_range, var.log)
+        if cat_subset.df.empty:
+            raise util.DataRequestError(
+                f"check_group_daterange returned empty data frame for {var.name}"
+                f" case {case_name} in {data_catalog}, indicating issues with data continuity")
+        return cat_subset
+
+    def open_var_assets(self, case_name: str, var: varlist_util.VarlistEntry, cat_subset, var_query: dict,
+                        data_catalog: str) -> xr.Dataset:
+        """Open the catalog assets in *cat_subset* selected by
+        :meth:`select_var_assets` and join them into a single Dataset for *var*.
+        """
+        if not var.is_static:
+            date_range = var.T.range
+        var.log.info(f"Converting {var.name} catalog subset to dataset dictionary")
+        # convert subset catalog to an xarray dataset dict
+        # and concatenate the result with the final dict
+        with _netcdf_file_lock:
+            cat_subset_dict = self.open_assets(cat_subset)
+        # let the preprocessing functions drop data they won't use (e.g. other
+        # Z levels) before anything is read
+        for k in cat_subset_dict:
+            for func in self.file_preproc_functions:
+                cat_subset_dict[k] = func.select_on_read(func, var, cat_subset_dict[k])
+        var_xr = []
+        if not var.is_static:
+            cat_subset_dict = self.normalize_time_units(cat_subset_dict, var.T)
+            # collect the cropped datasets in time order and join them in one pass;
+            # check_group_daterange already sorted the catalog entries by the start
+            # of their time_range and dropped files outside the requested date range
+            time_chunks = []
+            for k in self.sort_by_catalog_order(cat_subset, cat_subset_dict):
+                cat_subset_dict[k] = self.crop_date_range(date_range,
+                                                          cat_subset_dict[k],
+                                                          var.T)
+                if cat_subset_dict[k] is not None:
+                    time_chunks.append(cat_subset_dict[k])
+            if not time_chunks:
+                raise util.DataRequestError(
+                    f"No data for {var.name} for case {case_name} in {data_catalog} "
+                    f"overlaps the requested date range {date_range}")
+            var_xr = self.concat_time_chunks(time_chunks, var.T.name)
+            var_xr = self.decode_time_coord(var_xr, var.T)
+        else:
+            # get xarray dataset for static variable
+            cat_index = [k for k in cat_subset_dict.keys()][0]
+            if not var_xr:
+                var_xr = cat_subset_dict[cat_index]
+            else:
+                if var.Y is not None:
+                    var_xr = xr.concat([var_xr, cat_subset_dict[cat_index]], var.Y.name)
+                elif var.X is not None:
+                    var_xr = xr.concat([var_xr, cat_subset_dict[cat_index]], var.X.name)
+                else:
+                    var_xr = xr.concat([var_xr, cat_subset_dict.values[cat_index]], var.N.name)
+        var_xr = self.drop_attributes(var_xr)
+        # grab only the requested static variable
+        if var.is_static:
+            del_list = []
+            for vname in var_xr.variables:
+                if vname != var.name:
+                    del_list.append(vname)
+            for del_name in del_list:
+                del var_xr[del_name]
+        # add standard_name to the variable xarray dataset if it is not defined
+        for vname in var_xr.variables:
+            if (not isinstance(var_xr.variables[vname], xr.IndexVariable)
+                    and var_xr[vname].attrs.get('standard_name', None) is None):
+                case_query_standard_name = var_query.get('standard_name')
+                if isinstance(case_query_standard_name, list):
+                    new_standard_name = \
+                    [name for name in case_query_standard_name if name == var.translation.standard_name][0]
+                else:
+                    new_standard_name = case_query_standard_name
+                var_xr[vname].attrs['standard_name'] = new_standard_name
+                var_xr[vname].attrs['name'] = vname
+
+        return var_xr
+
+    def open_assets(self, cat_subset) -> dict:
+        """Return the Datasets opened from the catalog assets in *cat_subset*
+        by ``to_dataset_dict(aggregate=False)``. Each set of assets is opened
+        once per run: requests for several levels of the same 4D variable get
+        shallow copies of the same lazily loaded Datasets. Callers must hold
+        ``_netcdf_file_lock``.
+        """
+        path_col = cat_subset.esmcat.assets.column_name
+        key = tuple(cat_subset.df[path_col])
+        if key not in self.opened_assets:
+            self.opened_assets[key] = cat_subset.to_dataset_dict(
+                progressbar=False,
+                xarray_open_kwargs=self.open_dataset_kwargs,
+                aggregate=False
+            )
+        return {k: ds.copy() for k, ds in self.opened_assets[key].items()}
+
+    def check_var_time_bounds(self, case_name: str, var: varlist_util.VarlistEntry, xr_ds: xr.Dataset):
+        """Check that the trimmed data for *var* in *xr_ds* matches the
+        requested date range; static variables are skipped.
+        """
+        if var.is_static:
+            return
+        try:
+            var.log.info(f'Calling check_time_bounds for {var.name}')
+            self.check_time_bounds(xr_ds, var.translation, var.T.frequency)
+        except LookupError:
+            var.log.error(f'Time bounds in trimmed dataset for {var.name} in case {case_name} do not match'
+                          f'requested date_range.')
+            raise SystemExit("Terminating program")
+
+    def share_coords(self, var_datasets: dict, xr_ds: xr.Dataset) -> xr.Dataset:
+        """Replace the dimension coordinates of *xr_ds* with equal coordinates
+        already held by one of the Datasets in *var_datasets*, so that variables on
+        the same grid and time axis reference a single copy of their coordinates.
+        """
+        shared_vars = dict()
+        shared_indexes = dict()
+        for name, index in xr_ds.xindexes.items():
+            for other_ds in var_datasets.values():
+                if name in other_ds.xindexes \
+                        and other_ds[name].attrs == xr_ds[name].attrs \
+                        and other_ds.xindexes[name].equals(index):
+                    shared_vars[name] = other_ds[name].variable
+                    shared_indexes[name] = other_ds.xindexes[name]
+                    break
+        if not shared_vars:
+            return xr_ds
+        return xr_ds.assign_coords(xr.Coordinates(coords=shared_vars, indexes=shared_indexes))
+
+    def get_var_dataset(self, case_ds, var: varlist_util.VarlistEntry) -> xr.Dataset:
+        """Return the Dataset containing *var* from *case_ds*, the entry for
+        *var*'s case in the dictionary returned by :meth:`query_catalog`: either
+        the merged Dataset for the case, or a dict of per-variable Datasets
+        keyed by variable name if ``per_variable_datasets`` is set.
+        """
+        if isinstance(case_ds, xr.Dataset):
+            return case_ds
+        return case_ds[var.name]
+
+    def data_product_key(self, var: varlist_util.VarlistEntry):
+        """Return a tuple identifying the data that preprocessing produces for
+        *var*: the model variable it's read from and the frequency (and time
+        method, if resampled), date range, units, vertical level and region it's
+        converted to. Requests for *var* under different names (by different
+        PODs) with the same key are processed once. Returns None if *var*
+        wasn't translated.
+        """
+        def _coord_key(c):
+            return None if c is None else (str(c.standard_name), str(c.value), str(c.units))
+
+        tv = var.translation
+        if tv is None:
+            return None
+        if var.is_static:
+            time_key = None
+        else:
+            time_key = (str(var.T.frequency), str(var.T.range), ResampleFunction.time_method(var))
+        return (tv.convention, tv.name, str(tv.units), _coord_key(tv.get_scalar('Z')),
+                str(var.standard_name), str(var.units), _coord_key(var.get_scalar('Z')), time_key,
+                ExtractRegionFunction.requested_region(var))
+
+    def coalesce_requests(self, case_list: dict):
+        """Group the variables requested for each case in *case_list* by
+        :meth:`data_product_key`, so that each distinct data product is queried,
+        parsed and preprocessed only once, for the first variable requesting it;
+        the others are recorded in :attr:`duplicate_vars` and receive the result
+        in :meth:`fan_out_products`.
+        """
+        self.duplicate_vars = dict()
+        n_requests = 0
+        for case_name, case_d in case_list.items():
+            products = dict()
+            for var in case_d.varlist.iter_vars():
+                n_requests += 1
+                key = self.data_product_key(var)
+                if key is None:
+                    continue
+                product_var = products.setdefault(key, var)
+                if product_var is not var:
+                    var.log.info("Using data processed for %s for %s.",
+                                 product_var.full_name, var.full_name)
+                    self.duplicate_vars[(case_name, var.name)] = product_var
+        _log.info("Coalesced %d variable requests into %d data products (%d deduplicated).",
+                  n_requests, n_requests - len(self.duplicate_vars), len(self.duplicate_vars))
+
+    def iter_product_vars(self, case_name: str, case_d):
+        """Iterate over the variables of case *case_name* whose data is
+        processed, skipping requests coalesced into another variable's data
+        product by :meth:`coalesce_requests`.
+        """
+        for var in case_d.varlist.iter_vars():
+            if (case_name, var.name) not in self.duplicate_vars:
+                yield var
+
+    def fan_out_products(self, case_list: dict, cat_subset: dict) -> dict:
+        """Point each request coalesced by :meth:`coalesce_requests` to the
+        processed data of the variable it was coalesced into, so that its output
+        file is written from the same data.
+        """
+        for case_name, case_d in case_list.items():
+            for var in case_d.varlist.iter_vars():
+                product_var = self.duplicate_vars.get((case_name, var.name), None)
+                if product_var is None:
+                    continue
+                # preprocessing functions may have renamed the product's model variable
+                var.translation.name = product_var.translation.name
+                if not isinstance(cat_subset[case_name], xr.Dataset):
+                    # share the data, but not the attrs and encoding, which are
+                    # edited when each output file is written
+                    cat_subset[case_name][var.name] = cat_subset[case_name][product_var.name].copy(deep=False)
+        return cat_subset
+
+    def pp_cache_key(self, var: varlist_util.VarlistEntry, cat_subset):
+        """Return the key of the preprocessed data for *var* in :attr:`pp_cache`:
+        a hash of the path, size and modification time of the catalog assets in
+        *cat_subset*, the requested date range, units, vertical level and region,
+        the ordered list of preprocessing functions and user scripts, the path,
+        size and modification time of the modules defining them and the rest of
+        the preprocessing, and the output file settings. Returns None if the
+        assets aren't local files.
+        """
+        def _coord_key(c):
+            return None if c is None else [str(c.name), str(c.value), str(c.units)]
+
+        path_col = cat_subset.esmcat.assets.column_name
+        try:
+            assets = [util.file_signature(p) for p in cat_subset.df[path_col]]
+            user_scripts = [
+                util.file_signature(os.path.join(self.module_root, s))
+                if os.path.exists(os.path.join(self.module_root, s)) else s
+                for s in (getattr(self, 'user_pp_scripts', None) or [])
+            ]
+            code_paths = set(_pp_code_paths)
+            for f in self.file_preproc_functions:
+                try:
+                    code_paths.add(inspect.getsourcefile(f if isinstance(f, type) else type(f)))
+                except TypeError:
+                    # built-in
+                    pass
+            code = [util.file_signature(p) for p in sorted(p for p in code_paths if p)]
+        except OSError:
+            return None
+        tv = var.translation
+        return util.hash_key({
+            'version': 2,
+            'assets': assets,
+            'date_range': None if var.is_static else str(var.T.range),
+            'frequency': None if var.is_static else str(var.T.frequency),
+            'time_method': None if var.is_static else ResampleFunction.time_method(var),
+            'name': var.name,
+            'units': str(var.units),
+            'level': _coord_key(var.get_scalar('Z')),
+            'region': ExtractRegionFunction.requested_region(var),
+            'translation': None if tv is None else [
+                tv.convention, tv.name, str(tv.units), _coord_key(tv.get_scalar('Z'))
+            ],
+            'pp_functions': [f"{f.__module__}.{f.__qualname__}" for f in self.file_preproc_functions],
+            'code': code,
+            'user_pp_scripts': user_scripts,
+            'output_format': self.output_format,
+            'output_encoding': self.output_encoding_policy(var),
+            'save_kwargs': self.save_dataset_kwargs
+        })
+
+    def load_cached_var(self, case_name: str, var: varlist_util.VarlistEntry, cat_subset):
+        """If :attr:`pp_cache` holds the preprocessed data for *var*, link it to
+        ``var.dest_path`` and return it as a Dataset. Otherwise, remember the
+        cache key so that :meth:`write_ds` can add the data once it's written,
+        and return None.
+        """
+        if self.pp_cache is None:
+            return None
+        key = self.pp_cache_key(var, cat_subset)
+        if key is None:
+            var.log.debug("Not caching %s: catalog assets aren't local files.", var.full_name)
+            return None
+        metadata = self.pp_cache.get(key)
+        if metadata is None:
+            self.pp_cache_keys[(case_name, var.name)] = key
+            return None
+        link_type = self.pp_cache.link(key, metadata, var.dest_path)
+        var.log.info("Using cached preprocessed data for %s (%s to '%s').",
+                     var.full_name, link_type, var.dest_path, tags=util.ObjectLogTag.OUT_FILE)
+        if self.output_format == 'zarr':
+            ds = xr.open_dataset(var.dest_path, engine='zarr', use_cftime=True, chunks={})
+        else:
+            with _netcdf_file_lock:
+                ds = xr.open_dataset(var.dest_path, use_cftime=True, lock=NETCDFC_LOCK)
+        # output file stores the data under the POD's name for the variable;
+        # restore the state that rename_dataset_vars and write_pp_catalog expect
+        var.translation.name = metadata.get('translation_name', var.name)
+        if var.translation.name != var.name:
+            ds = ds.rename_vars({var.name: var.translation.name})
+        ds.attrs.update(metadata.get('attrs', dict()))
+        self.pp_cache_hits.add((case_name, var.name))
+        return ds
+
+    def add_to_pp_cache(self, written: list):
+        """Add the output files of the variables in *written*, a list of
+        (case name, :class:`~src.varlist_util.VarlistEntry`, Dataset) tuples,
+        to :attr:`pp_cache`, then evict old entries if the cache is over its
+        size limit.
+        """
+        if self.pp_cache is None:
+            return
+        for case_name, var, ds in written:
+            key = self.pp_cache_keys.pop((case_name, var.name), None)
+            if key is None:
+                continue
+            self.pp_cache.put(key, var.dest_path, {
+                'var': var.full_name,
+                'translation_name': var.translation.name,
+                'attrs': {k: v for k, v in ds.attrs.items() if k.startswith('intake_esm_attrs:')}
+            })
+        self.pp_cache.evict()
+
     def edit_request(self, v: varlist_util.VarlistEntry, **kwargs):
         """Top-level method to edit *pod*\'s data request, based on the child
         class's functionality. Calls the :meth:`~PreprocessorFunctionBase.edit_request`
@@ -1317,13 +2260,25 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
     def execute_pp_functions(self, v: varlist_util.VarlistEntry,
                              xarray_ds: xr.Dataset,
                              **kwargs):
-        """Method to launch pp routines on xarray datasets associated with required variables"""
+        """Method to launch pp routines on xarray datasets associated with required variables.
+        The transformations planned by consecutive :class:`AffineFunctionBase`
+        functions are fused, and applied before the next function that may
+        depend on the values of the data.
+        """
+        transform = AffineTransform()
         for func in self.file_preproc_functions:
-            xarray_ds = func.execute(func, v, xarray_ds, **kwargs)
+            if isinstance(func, type) and issubclass(func, AffineFunctionBase):
+                xarray_ds, transform = func.plan_transform(func, v, xarray_ds, transform, **kwargs)
+            else:
+                xarray_ds = apply_transform(v, xarray_ds, transform)
+                transform = AffineTransform()
+                xarray_ds = func.execute(func, v, xarray_ds, **kwargs)
             # append custom preprocessing scripts
 
             if hasattr(self, 'user_pp_scripts'):
                 if self.user_pp_scripts and len(self.user_pp_scripts) > 0:
+                    xarray_ds = apply_transform(v, xarray_ds, transform)
+                    transform = AffineTransform()
                     for s in self.user_pp_scripts:
                         script_name, script_ext = os.path.splitext(s)
                         full_module_name = "user_scripts." + script_name
@@ -1332,7 +2287,7 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
                         # user_scripts.example_pp_script.main(xarray_ds, v)
                         xarray_ds = user_module.main(xarray_ds, v.name)
 
-        return xarray_ds
+        return apply_transform(v, xarray_ds, transform)
 
     def setup(self, pod):
         """Method to do additional configuration immediately before :meth:`process`
@@ -1355,15 +2310,27 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
             "decode_coords": False,  # so disable it here
             "decode_times": False,
             "use_cftime": False,
-            "chunks": "auto"
-
+            "chunks": "auto",
+            # serializes netCDF-C calls with the writes in compute_writes without
+            # risking a lock-order deadlock; see lock_file_close
+            "lock": NETCDFC_LOCK
         }
 
     @property
     def save_dataset_kwargs(self):
         """Arguments passed to xarray `to_netcdf()
-        <https://xarray.pydata.org/en/stable/generated/xarray.Dataset.to_netcdf.html>`__.
+        <https://xarray.pydata.org/en/stable/generated/xarray.Dataset.to_netcdf.html>`__,
+        or `to_zarr()
+        <https://xarray.pydata.org/en/stable/generated/xarray.Dataset.to_zarr.html>`__
+        if ``output_format`` is 'zarr'.
         """
+        if self.output_format == 'zarr':
+            # v2 stores with consolidated metadata can be read by older zarr
+            # and intake-esm versions, and opened with a single metadata read
+            return {
+                "zarr_format": 2,
+                "consolidated": True
+            }
         return {
             "engine": "netcdf4",
             "format": self.nc_format
@@ -1387,10 +2354,21 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         """Rename variables in dataset to conform with variable names requested by the POD"""
         case_names = [c for c in case_list.keys()]
         for c in case_names:
+            if not isinstance(ds[c], xr.Dataset):
+                for var in case_list[c].varlist.iter_vars():
+                    var_ds = ds[c][var.name]
+                    if var.translation.name in var_ds.variables and var.translation.name != var.name:
+                        ds[c][var.name] = var_ds.rename_vars(name_dict={var.translation.name: var.name})
+                continue
             name_dict = {}
-            for var in case_list[c].varlist.iter_vars():
+            for var in self.iter_product_vars(c, case_list[c]):
                 name_dict[var.translation.name] = var.name
             ds[c] = ds[c].rename_vars(name_dict=name_dict)
+            # data for duplicate requests is stored under each requested name
+            for var in case_list[c].varlist.iter_vars():
+                product_var = self.duplicate_vars.get((c, var.name), None)
+                if product_var is not None:
+                    ds[c][var.name] = ds[c][product_var.name]
         return ds
 
     def clean_nc_var_encoding(self, var, name, ds_obj):
@@ -1517,16 +2495,45 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
     def write_dataset(self, var: varlist_util.VarlistEntry, ds: xr.Dataset):
         """Writes processed Dataset *ds* to location specified by the
         ``dest_path`` attribute of *var*, using xarray `to_netcdf()
-        <https://xarray.pydata.org/en/stable/generated/xarray.Dataset.to_netcdf.html>`__.
-        May be overwritten by child classes.
+        <https://xarray.pydata.org/en/stable/generated/xarray.Dataset.to_netcdf.html>`__,
+        or :meth:`write_zarr_store` if ``output_format`` is 'zarr'. May be
+        overwritten by child classes.
+
+        Returns:
+            The dask Delayed object that writes the data when computed by
+            :meth:`compute_writes`, or None if the data was written already.
         """
         os.makedirs(os.path.dirname(var.dest_path), exist_ok=True)
-        var_ds = ds[var.translation.name].to_dataset()
-        var_ds = var_ds.rename_vars(name_dict={var.translation.name: var.name})
-        if var.is_static:
+        # may be a link to a pp_cache entry, which mustn't be overwritten in place
+        util.remove_path(var.dest_path)
+        policy = self.output_encoding_policy(var)
+        var_ds = self.output_dataset(var, ds, policy)
+        if var.is_static or not policy.get('unlimited_time', True):
             unlimited_dims = []
         else:
             unlimited_dims = [var.T.name]
+        var.log.info("Writing '%s'.", var.dest_path, tags=util.ObjectLogTag.OUT_FILE)
+        # the file and its metadata are created now; the data is written when
+        # write_ds computes the delayed writes for all variables together
+        if self.output_format == 'zarr':
+            return self.write_zarr_store(var, var_ds)
+        return var_ds.to_netcdf(
+            path=var.dest_path,
+            mode='w',
+            **self.save_dataset_kwargs,
+            unlimited_dims=unlimited_dims,
+            compute=False
+        )
+
+    def output_dataset(self, var: varlist_util.VarlistEntry, ds: xr.Dataset, policy: dict) -> xr.Dataset:
+        """Return the Dataset written to the output file of *var* from the
+        processed Dataset *ds*: *var*'s data under the name the POD expects,
+        encoded as given by the *policy* returned by :meth:`output_encoding_policy`,
+        with its coordinates.
+        """
+        var_ds = ds[var.translation.name].to_dataset()
+        var_ds = var_ds.rename_vars(name_dict={var.translation.name: var.name})
+        var_ds = self.apply_output_encoding(var, var_ds, policy)
         # append other grid types here as needed
         irregular_grids = {'tripolar'}
         if ds.attrs.get('grid', None) is not None:
@@ -1550,33 +2557,122 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
                 var_ds[v].attrs['standard_name'] = var.Y.standard_name
             elif 'lon' in v.lower() and 'lon' not in var_ds[v].attrs['standard_name'].lower():
                 var_ds[v].attrs['standard_name'] = var.X.standard_name
-
-        # The following block is retained for time comparison with dask delayed write procedure
-        # var_ds.to_netcdf(
-        #    path=var.dest_path,
-        #    mode='w',
-        #    **self.save_dataset_kwargs,
-        #    unlimited_dims=unlimited_dims
-        # )
-        # ds.close()
-
-        # Uncomment the timing lines and log calls if desired
-        # start_time = time.monotonic()
-        var.log.info("Writing '%s'.", var.dest_path, tags=util.ObjectLogTag.OUT_FILE)
-        delayed_write = var_ds.to_netcdf(
-            path=var.dest_path,
+        return var_ds
+
+    def output_encoding_policy(self, var: varlist_util.VarlistEntry) -> dict:
+        """Return the encoding policy for the output file of *var*: the
+        ``output_encoding`` runtime option, updated with the ``output_encoding``
+        attribute set on *var* in its POD's settings file. Recognized settings
+        are:
+
+        - ``complevel``: zlib compression level (0-9); 0 disables compression.
+        - ``shuffle``: whether to apply the HDF5 shuffle filter before compressing.
+        - ``chunks``: dict mapping dimension names, or axis labels 'X', 'Y', 'Z'
+          and 'T', to chunk sizes in the output file.
+        - ``dtype``: float type to downcast floating-point data to, eg 'float32'.
+        - ``least_significant_digit``: number of decimal digits of precision to
+          keep, enabling lossy quantization before compression.
+        - ``unlimited_time``: set to false to write time as a fixed-size
+          dimension, instead of the default unlimited dimension.
+        """
+        policy = dict(self.output_encoding)
+        policy.update(getattr(var, 'output_encoding', None) or dict())
+        unknown_keys = set(policy).difference(_output_encoding_keys)
+        if unknown_keys:
+            var.log.warning("Ignoring unrecognized output_encoding settings %s for %s.",
+                            sorted(unknown_keys), var.full_name)
+        return {k: v for k, v in policy.items() if k in _output_encoding_keys}
+
+    def policy_chunks(self, var: varlist_util.VarlistEntry, policy: dict) -> dict:
+        """Return the ``chunks`` setting of the encoding *policy* for *var* as a
+        dict mapping dimension names to chunk sizes, translating axis labels to
+        the names of *var*'s dimensions.
+        """
+        chunks = dict()
+        for dim, size in (policy.get('chunks', None) or dict()).items():
+            coord = getattr(var, dim, None) if dim in ('X', 'Y', 'Z', 'T') else None
+            chunks[getattr(coord, 'name', dim)] = int(size)
+        return chunks
+
+    def apply_output_encoding(self, var: varlist_util.VarlistEntry, var_ds: xr.Dataset,
+                              policy: dict) -> xr.Dataset:
+        """Set the encoding of *var*'s data in *var_ds* according to the
+        encoding *policy* returned by :meth:`output_encoding_policy`.
+        Coordinates are written with their existing encoding.
+        """
+        if not policy:
+            return var_ds
+        v = var_ds[var.name].variable
+        encoding = v.encoding
+        if 'dtype' in policy:
+            dtype = np.dtype(policy['dtype'])
+            if np.issubdtype(v.dtype, np.floating) and np.issubdtype(dtype, np.floating) \
+                    and dtype.itemsize < v.dtype.itemsize:
+                encoding['dtype'] = dtype
+                if encoding.get('_FillValue', None) is not None:
+                    encoding['_FillValue'] = dtype.type(encoding['_FillValue'])
+        if 'complevel' in policy:
+            complevel = int(policy['complevel'] or 0)
+            encoding['zlib'] = complevel > 0
+            encoding['complevel'] = complevel
+        if 'shuffle' in policy:
+            encoding['shuffle'] = bool(policy['shuffle'])
+        if policy.get('least_significant_digit', None) is not None:
+            encoding['least_significant_digit'] = int(policy['least_significant_digit'])
+        chunks = self.policy_chunks(var, policy)
+        if chunks:
+            # sizes <= 0 span the whole dimension, as for dask chunks
+            encoding['chunksizes'] = tuple(
+                min(chunks.get(d, size), size) if chunks.get(d, size) > 0 else size
+                for d, size in zip(v.dims, v.shape)
+            )
+            # chunk sizes in the input files don't apply to the output's shape
+            encoding.pop('original_shape', None)
+        if encoding.get('zlib', False) or encoding.get('chunksizes', None):
+            encoding['contiguous'] = False
+        return var_ds
+
+    def zarr_chunks(self, var: varlist_util.VarlistEntry, var_ds: xr.Dataset) -> dict:
+        """Return the chunk sizes for each dimension of *var_ds* in the Zarr
+        store for *var*. Chunks span the full extent of every dimension except
+        time, and hold as many whole time steps as fit in ``zarr_chunk_bytes``,
+        so that PODs reading a time range of the data read contiguous chunks.
+        Chunk sizes set in *var*'s :meth:`output_encoding_policy` take precedence.
+        """
+        chunks = {dim: -1 for dim in var_ds.dims}
+        policy_chunks = {k: (v if v > 0 else -1) for k, v
+                         in self.policy_chunks(var, self.output_encoding_policy(var)).items()
+                         if k in chunks}
+        t_name = None if var.is_static else var.T.name
+        if t_name not in chunks:
+            chunks.update(policy_chunks)
+            return chunks
+        n_times = var_ds.sizes[t_name]
+        step_bytes = max([v.nbytes // max(n_times, 1) for v in var_ds.data_vars.values()
+                          if t_name in v.dims] or [0])
+        chunks[t_name] = max(1, min(n_times, self.zarr_chunk_bytes // max(step_bytes, 1)))
+        chunks.update(policy_chunks)
+        return chunks
+
+    def write_zarr_store(self, var: varlist_util.VarlistEntry, var_ds: xr.Dataset):
+        """Set up a Zarr store for *var_ds* at ``var.dest_path``, chunked along
+        time as given by :meth:`zarr_chunks`, and return the delayed write of
+        its data.
+        """
+        # shallow copy so that editing encodings doesn't alter the processed Dataset
+        var_ds = var_ds.chunk(self.zarr_chunks(var, var_ds)).copy(deep=False)
+        for v in var_ds.variables.values():
+            # drop netCDF-specific settings (compression, chunksizes, contiguous...)
+            # copied from the input files, which to_zarr rejects
+            v.encoding = {k: val for k, val in v.encoding.items() if k in _zarr_encoding_keys}
+            if v.chunks is not None:
+                v.encoding['chunks'] = tuple(c[0] for c in v.chunks)
+        return var_ds.to_zarr(
+            store=var.dest_path,
             mode='w',
-            **self.save_dataset_kwargs,
-            unlimited_dims=unlimited_dims,
-            compute=False
+            compute=False,
+            **self.save_dataset_kwargs
         )
-        delayed_write.compute()
-        delayed_write.close()
-        # end_time = time.monotonic()
-        # var.log.info(f'Time to write file {var.dest_path}: {str(datetime.timedelta(seconds=end_time - start_time))}')
-        # dt = datetime.timedelta(seconds=end_time - start_time)
-        # write_times.append(dt.total_seconds())
-        # var.log.info(f'Total write time: {str(sum(write_times))} s')
 
     def write_ds(self, case_list: dict,
                  catalog_subset: collections.OrderedDict,
@@ -1588,23 +2684,190 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         for k, v in pod_reqs.items():
             if 'ncl' in v:
                 self.output_to_ncl = True
-        for case_name, ds in catalog_subset.items():
-            for var in case_list[case_name].varlist.iter_vars():
-                # var.log.info("Writing %d mb to %s", ds[var.name].variable.nbytes / (1024 * 1024), var.dest_path)
-                try:
-                    ds = self.clean_output_attrs(var, ds)
-                    ds = self.log_history_attr(var, ds)
-                except Exception as exc:
-                    raise util.chain_exc(exc, (f"cleaning attributes to "
-                                               f"write data for {var.full_name}."), util.DataPreprocessEvent)
-                try:
-                    self.write_dataset(var, ds)
-                except Exception as exc:
-                    raise util.chain_exc(exc, f"writing data for {var.full_name}.",
-                                         util.DataPreprocessEvent)
-
+        if self.output_to_ncl and self.output_format == 'zarr':
+            _log.warning("NCL PODs can't read output_format = 'zarr'; the preprocessed "
+                         "data must be read with xarray or intake-esm.")
+        # variables found in pp_cache were linked to their output files already
+        tasks = [(case_name, var, self.get_var_dataset(case_ds, var))
+                 for case_name, case_ds in catalog_subset.items()
+                 for var in case_list[case_name].varlist.iter_vars()
+                 if (case_name, var.name) not in self.pp_cache_hits]
+        # per-variable Datasets are set up concurrently if preprocess_workers > 1;
+        # the data for all output files is then written in a single dask computation
+        delayed_writes = self.run_var_tasks(self.write_var_dataset, [(var, ds) for _, var, ds in tasks])
+        self.compute_writes([(var, d) for (_, var, _), d in zip(tasks, delayed_writes) if d is not None])
+        self.add_to_pp_cache(tasks)
+
+    def write_var_dataset(self, var: varlist_util.VarlistEntry, ds: xr.Dataset):
+        """Clean the attributes of *ds* and set up the output file for *var*
+        with :meth:`write_dataset`, returning the delayed write. If *ds* spans
+        more than one of its :meth:`time_blocks`, the data is written now by
+        :meth:`write_var_blocks` instead, and None is returned.
+        """
+        # var.log.info("Writing %d mb to %s", ds[var.name].variable.nbytes / (1024 * 1024), var.dest_path)
+        try:
+            ds = self.clean_output_attrs(var, ds)
+            ds = self.log_history_attr(var, ds)
+        except Exception as exc:
+            raise util.chain_exc(exc, (f"cleaning attributes to "
+                                       f"write data for {var.full_name}."), util.DataPreprocessEvent)
+        try:
+            blocks = self.time_blocks(var, ds)
+            if len(blocks) > 1:
+                return self.write_var_blocks(var, ds, blocks)
+            with _netcdf_file_lock:
+                return self.write_dataset(var, ds)
+        except Exception as exc:
+            raise util.chain_exc(exc, f"writing data for {var.full_name}.",
+                                 util.DataPreprocessEvent)
+
+    def time_blocks(self, var: varlist_util.VarlistEntry, ds: xr.Dataset) -> list:
+        """Return a list of slices dividing the time axis of the processed Dataset
+        *ds* into blocks of ``time_block_years`` calendar years, counted from the
+        first year of the data. Returns a single slice over the whole axis if
+        ``time_block_years`` isn't set or *var* is static.
+
+        Variables written to netCDF files with a fixed-size time dimension
+        (``unlimited_time`` set to false in their encoding policy) can't be
+        appended to, so they're written whole.
+        """
+        if not self.time_block_years or var.is_static or var.T.name not in ds.dims:
+            return [slice(None)]
+        if self.output_format != 'zarr':
+            policy = dict(self.output_encoding)
+            policy.update(getattr(var, 'output_encoding', None) or dict())
+            if not policy.get('unlimited_time', True):
+                return [slice(None)]
+        years = ds[var.T.name].dt.year.values
+        block_ids = (years - years[0]) // self.time_block_years
+        edges = [0] + list(np.flatnonzero(np.diff(block_ids)) + 1) + [len(years)]
+        return [slice(start, end) for start, end in zip(edges[:-1], edges[1:])]
+
+    def write_var_blocks(self, var: varlist_util.VarlistEntry, ds: xr.Dataset, blocks: list):
+        """Write the processed Dataset *ds* to the output file of *var* one
+        time block in *blocks* at a time: the file is created from the first
+        block by :meth:`write_dataset`, and each following block is appended to
+        it by :meth:`append_time_block`. Each block is read, preprocessed and
+        written before the next one is read, so peak memory use is bounded by the
+        size of a block rather than that of the whole variable.
+        """
+        t_name = var.T.name
+        start_time = time.monotonic()
+        for i, block in enumerate(blocks):
+            block_ds = ds.isel({t_name: block})
+            if i == 0:
+                with _netcdf_file_lock:
+                    delayed_write = self.write_dataset(var, block_ds)
+                locked_write = None if self.output_format == 'zarr' else lock_file_close(delayed_write)
+                dask.compute(delayed_write if locked_write is None else locked_write,
+                             scheduler='threads', num_workers=self.write_workers)
+            else:
+                self.append_time_block(var, block_ds)
+            var.log.debug("Wrote time block %d of %d (%s to %s) of %s.", i + 1, len(blocks),
+                          block_ds[t_name].values[0], block_ds[t_name].values[-1], var.full_name)
+        var.log.info(f"Time to write file {var.dest_path} "
+                     f"({util.path_size(var.dest_path) / (1024 * 1024):.1f} MB) in {len(blocks)} "
+                     f"blocks of {self.time_block_years} years: "
+                     f"{datetime.timedelta(seconds=time.monotonic() - start_time)}")
+        return None
+
+    def append_time_block(self, var: varlist_util.VarlistEntry, block_ds: xr.Dataset):
+        """Compute the processed data in *block_ds* and append it along the time
+        dimension to the output file of *var* written by :meth:`write_var_blocks`,
+        using the encoding of the data already in the file.
+        """
+        t_name = var.T.name
+        var_ds = self.output_dataset(var, block_ds, dict())
+        var_ds = var_ds.drop_vars([v for v in var_ds.variables if t_name not in var_ds[v].dims])
+        if self.output_format == 'zarr':
+            with xr.open_zarr(var.dest_path, consolidated=True) as out_ds:
+                n_times = out_ds.sizes[t_name]
+                store_chunks = dict(zip(out_ds[var.name].dims, out_ds[var.name].encoding['chunks']))
+            # align the block's dask chunks with the chunks of the store, so that
+            # each chunk of the store is written by one task
+            t_chunk = store_chunks.pop(t_name)
+            first = min((-n_times) % t_chunk or t_chunk, var_ds.sizes[t_name])
+            rest = var_ds.sizes[t_name] - first
+            store_chunks[t_name] = ((first,) + (t_chunk,) * (rest // t_chunk)
+                                    + ((rest % t_chunk,) if rest % t_chunk else ()))
+            var_ds = var_ds.chunk(store_chunks)
+            for v in var_ds.variables.values():
+                v.encoding = dict()
+            var_ds.to_zarr(store=var.dest_path, append_dim=t_name, **self.save_dataset_kwargs)
+            return
+        with _netcdf_file_lock, NETCDFC_LOCK, netCDF4.Dataset(var.dest_path, 'r') as nc:
+            n_times = len(nc.dimensions[t_name])
+            encodings = {name: {k: nc.variables[name].getncattr(k) for k in _append_encoding_keys
+                                if k in nc.variables[name].ncattrs()}
+                         for name in var_ds.variables}
+            t_attrs = {k: nc.variables[t_name].getncattr(k) for k in nc.variables[t_name].ncattrs()}
+            for name in var_ds.variables:
+                encodings[name]['dtype'] = nc.variables[name].dtype
+                if name == t_attrs.get('bounds', None) \
+                        or xr.core.common._contains_datetime_like_objects(var_ds[name].variable):
+                    # xarray drops units and calendar from time bounds that match
+                    # the time axis, but they're needed to encode chunked dates
+                    for k in ('units', 'calendar'):
+                        if k not in encodings[name] and k in t_attrs:
+                            encodings[name][k] = t_attrs[k]
+        encoded = dict()
+        for name, v in var_ds.variables.items():
+            v = v.copy(deep=False)
+            v.encoding = encodings[name]
+            encoded[name] = xr.conventions.encode_cf_variable(v, name=name)
+        # read and process the block before taking the netCDF lock, which reads need
+        values = dask.compute(*[v.data for v in encoded.values()],
+                              scheduler='threads', num_workers=self.write_workers)
+        with _netcdf_file_lock, NETCDFC_LOCK, netCDF4.Dataset(var.dest_path, 'a') as nc:
+            for (name, v), data in zip(encoded.items(), values):
+                nc_var = nc.variables[name]
+                # data were encoded above
+                nc_var.set_auto_maskandscale(False)
+                nc_var[tuple(slice(n_times, n_times + n) if d == t_name else slice(None)
+                             for d, n in zip(v.dims, v.shape))] = data
+
+    def compute_writes(self, writes: list):
+        """Compute the delayed netCDF writes in *writes*, a list of
+        (:class:`~src.varlist_util.VarlistEntry`, Delayed) tuples, in a single
+        dask computation that uses at most ``write_workers`` threads, so reading
+        and writing the data of different variables can overlap. The time taken
+        to write each output file, measured from the start of the computation,
+        is logged to its variable's log.
+        """
+        batch = []
+        for var, delayed_write in writes:
+            if self.output_format == 'zarr':
+                # Zarr chunks are separate files, written without the netCDF lock
+                batch.append((var, delayed_write))
+                continue
+            locked_write = lock_file_close(delayed_write)
+            if locked_write is None:
+                # can't be computed safely alongside other files
+                var.log.debug("Writing '%s' separately.", var.dest_path)
+                self.compute_writes_batch([(var, delayed_write)])
+            else:
+                batch.append((var, locked_write))
+        if batch:
+            self.compute_writes_batch(batch)
 
-            # del ds  # shouldn't be necessary
+    def compute_writes_batch(self, writes: list):
+        """Compute all delayed writes in *writes* together with :func:`dask.compute`
+        and log how long each output file took to write.
+        """
+        timer = _WriteTimer({d.key: i for i, (_, d) in enumerate(writes)})
+        try:
+            with timer:
+                dask.compute(*[d for _, d in writes], scheduler='threads', num_workers=self.write_workers)
+        except Exception as exc:
+            var_names = ', '.join(var.full_name for var, _ in writes)
+            raise util.chain_exc(exc, f"writing data for {var_names}.", util.DataPreprocessEvent)
+        elapsed = time.monotonic() - timer.start_time
+        for i, (var, _) in enumerate(writes):
+            var.log.info(f"Time to write file {var.dest_path} "
+                         f"({util.path_size(var.dest_path) / (1024 * 1024):.1f} MB): "
+                         f"{datetime.timedelta(seconds=timer.write_seconds[i] or elapsed)}")
+        _log.info(f"Wrote {len(writes)} files in {datetime.timedelta(seconds=elapsed)} "
+                  f"using {self.write_workers} threads")
 
     def parse_ds(self,
                  var: varlist_util.VarlistEntry,
@@ -1617,6 +2880,30 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
             raise util.chain_exc(exc, f"parsing dataset metadata", util.DataPreprocessEvent)
         return ds
 
+    def parse_case_ds(self, ds: xr.Dataset) -> xr.Dataset:
+        """Per-Dataset phase of :meth:`parse_ds`, run once on a Dataset shared by
+        several variables. Each variable's metadata is then reconciled with
+        :meth:`parse_var_ds`.
+        """
+        try:
+            ds = self.parser.parse_dataset(ds)
+        except Exception as exc:
+            raise util.chain_exc(exc, f"parsing dataset metadata", util.DataPreprocessEvent)
+        return ds
+
+    def parse_var_ds(self,
+                     var: varlist_util.VarlistEntry,
+                     ds: xr.Dataset) -> xr.Dataset:
+        """Per-variable phase of :meth:`parse_ds`, run on a Dataset returned by
+        :meth:`parse_case_ds`. Metadata is reconciled on a shallow copy, so the
+        data and the shared Dataset's attributes are left unchanged.
+        """
+        try:
+            ds = self.parser.parse_variable(var, ds.copy(deep=False))
+        except Exception as exc:
+            raise util.chain_exc(exc, f"parsing dataset metadata", util.DataPreprocessEvent)
+        return ds
+
     def process_ds(self, var, ds):
         """Top-level method to call the :meth:`~PreprocessorFunctionBase.process`
         of each included PreprocessorFunction on the Dataset *ds*. Spun out into
@@ -1644,27 +2931,90 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         for case_name, case_dict in case_list.items():
             for v in case_dict.varlist.iter_vars():
                 self.edit_request(v, to_convention=case_dict.convention)
+        # process data requested by more than one POD only once
+        self.coalesce_requests(case_list)
+        if not self.per_variable_datasets and any(
+                v.translation is not None and v.translation.get_scalar('Z') is not None
+                for case_name, case_dict in case_list.items()
+                for v in self.iter_product_vars(case_name, case_dict)):
+            # levels of a 4D variable are selected as it's read, so each level
+            # needs its own Dataset
+            _log.info("Setting per_variable_datasets for Z level requests.")
+            self.per_variable_datasets = True
+        if not self.per_variable_datasets:
+            self.catalog_query_plan(case_list, config.DATA_CATALOG)
+            if any(v.translation is not None and v.translation.requires_resampling
+                   for case_name, case_dict in case_list.items()
+                   for v in self.iter_product_vars(case_name, case_dict)):
+                # resampled variables have a different time axis than the others
+                _log.info("Setting per_variable_datasets for resampled variables.")
+                self.per_variable_datasets = True
+        if self.per_variable_datasets:
+            cat_subset = self.process_var_datasets(case_list, config.DATA_CATALOG, model_work_dir)
+            return self.fan_out_products(case_list, cat_subset)
         # get the initial model data subset from the ESM-intake catalog
         cat_subset = self.query_catalog(case_list, config.DATA_CATALOG)
         for case_name, case_xr_dataset in cat_subset.items():
-            for v in case_list[case_name].varlist.iter_vars():
+            # decode the case's Dataset once; only the metadata of each variable
+            # is reconciled separately
+            case_xr_dataset = self.parse_case_ds(case_xr_dataset)
+            product_names = {v_l.translation.name for v_l in self.iter_product_vars(case_name, case_list[case_name])
+                             if v_l.translation is not None}
+            for v in self.iter_product_vars(case_name, case_list[case_name]):
                 tv_name = v.translation.name
                 # todo: maybe skip this if no standard_name attribute for v in case_xr_dataset
                 v.log.info(f'Calling parse_ds for {v.name}')
-                var_xr_dataset = self.parse_ds(v, case_xr_dataset)
-                varlist_ex = [v_l.translation.name for v_l in case_list[case_name].varlist.iter_vars()
-                              if v_l.translation is not None]
-                if tv_name in varlist_ex:
-                    varlist_ex.remove(tv_name)
-                for v_d in var_xr_dataset.variables:
-                    if v_d not in varlist_ex:
-                        cat_subset[case_name].update({v_d: var_xr_dataset[v_d]})
+                var_xr_dataset = self.parse_var_ds(v, case_xr_dataset)
+                varlist_ex = product_names - {tv_name}
+                cat_subset[case_name].update({v_d: var_xr_dataset[v_d] for v_d in var_xr_dataset.variables
+                                              if v_d not in varlist_ex})
                 v.log.info(f'Calling preprocessing functions for {v.name}')
                 pp_func_dataset = self.execute_pp_functions(v,
                                                             cat_subset[case_name],
                                                             work_dir=model_work_dir[case_name],
                                                             case_name=case_name)
                 cat_subset[case_name] = pp_func_dataset
+        return self.fan_out_products(case_list, cat_subset)
+
+    def process_var_datasets(self,
+                             case_list: dict,
+                             data_catalog: str,
+                             model_work_dir: dict) -> dict:
+        """Query, parse and preprocess each requested variable on its own
+        Dataset. (case, variable) pairs don't depend on each other, so up to
+        ``preprocess_workers`` of them are processed concurrently.
+
+        Returns:
+            Dictionary with a dict of per-variable Datasets for each case
+        """
+        cat, query_plan = self.catalog_query_plan(case_list, data_catalog)
+
+        def _process_var(case_name, v):
+            cat_subset = self.select_var_assets(case_name, v, cat, query_plan, data_catalog)
+            var_xr = self.load_cached_var(case_name, v, cat_subset)
+            if var_xr is not None:
+                return var_xr
+            var_xr = self.open_var_assets(case_name, v, cat_subset, query_plan[case_name][v.name][0],
+                                          data_catalog)
+            self.check_var_time_bounds(case_name, v, var_xr)
+            v.log.info(f'Calling parse_ds for {v.name}')
+            var_xr = self.parse_ds(v, var_xr)
+            v.log.info(f'Calling preprocessing functions for {v.name}')
+            return self.execute_pp_functions(v,
+                                             var_xr,
+                                             work_dir=model_work_dir[case_name],
+                                             case_name=case_name)
+
+        tasks = [(case_name, v) for case_name, case_d in case_list.items()
+                 for v in self.iter_product_vars(case_name, case_d)]
+        cat_subset = dict()
+        for (case_name, v), var_xr in zip(tasks, self.run_var_tasks(_process_var, tasks)):
+            cat_subset.setdefault(case_name, dict())
+            cat_subset[case_name][v.name] = self.share_coords(cat_subset[case_name], var_xr)
+        self.opened_assets.clear()
+        if self.pp_cache is not None:
+            _log.info("Found %d of %d preprocessed variables in cache %s.",
+                      len(self.pp_cache_hits), len(tasks), self.pp_cache.cache_dir)
         return cat_subset
 
     def write_pp_catalog(self,
@@ -1676,7 +3026,7 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
             to the POD output directory
         """
         cat_file_name = "MDTF_postprocessed_data"
-        pp_cat_assets = util.define_pp_catalog_assets(config, cat_file_name)
+        pp_cat_assets = util.define_pp_catalog_assets(config, cat_file_name, cache_dir=self.table_cache_dir)
         file_list = util.get_file_list(config.OUTPUT_DIR)
         # fill in catalog information from pp file name
         # append columns defined in assets
@@ -1684,9 +3034,12 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
         cat_entries = []
         # each key is a case
         for case_name, case_dict in cases.items():
-            ds_match = input_catalog_ds[case_name]
-            ds_match.time.values.sort()
             for var in case_dict.varlist.iter_vars():
+                ds_match = self.get_var_dataset(input_catalog_ds[case_name], var)
+                # per-variable Datasets of static variables have no time axis
+                has_time = 'time' in ds_match.variables
+                if has_time:
+                    ds_match.time.values.sort()
                 var_name = var.translation.name
                 ds_var = ds_match.data_vars.get(var_name, None)
                 if ds_var is None:
@@ -1700,8 +3053,9 @@ class MDTFPreprocessorBase(metaclass=util.MDTFABCMeta):
 
                 d.update({'project_id': var.translation.convention})
                 d.update({'path': var.dest_path})
-                d.update({'time_range': f'{util.cftime_to_str(ds_match.time.values[0]).replace('-', ':')}-'
-                                        f'{util.cftime_to_str(ds_match.time.values[-1]).replace('-', ':')}'})
+                if has_time:
+                    d.update({'time_range': f'{util.cftime_to_str(ds_match.time.values[0]).replace('-', ':')}-'
+                                            f'{util.cftime_to_str(ds_match.time.values[-1]).replace('-', ':')}'})
                 d.update({'standard_name': ds_match[var.name].attrs['standard_name']})
                 d.update({'variable_id': var_name})
                 if 'frequency' in ds_match[var.name].attrs:
@@ -1743,6 +3097,8 @@ class NullPreprocessor(MDTFPreprocessorBase):
         # initialize PreprocessorFunctionBase objects
         super().__init__(model_paths, config)
         self.file_preproc_functions = []
+        # input files are used in place, so there's nothing to cache
+        self.pp_cache = None
 
     def edit_request(self, v: varlist_util.VarlistEntry, **kwargs) -> varlist_util.VarlistEntry:
         """Dummy implementation of edit_request to meet abstract base class requirements
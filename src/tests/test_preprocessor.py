@@ -0,0 +1,1101 @@
+import datetime as dt
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import xarray as xr
+import cftime
+import dask
+import dask.array
+from src import util, preprocessor, varlist_util, units
+
+# Benchmarks are skipped in normal test runs; set MDTF_BENCHMARK=1 to run them.
+_RUN_BENCHMARKS = bool(os.environ.get('MDTF_BENCHMARK', ''))
+
+
+def get_test_preprocessor(**config_kwargs):
+    config = util.NameSpace.fromDict({'large_file': False, 'user_pp_scripts': []})
+    config.update(config_kwargs)
+    model_paths = util.NameSpace.fromDict({'MODEL_WORK_DIR': {}})
+    return preprocessor.DaskMultiFilePreprocessor(model_paths, config)
+
+
+def get_time_chunks(n_files, n_times=12, n_lat=4, n_lon=8):
+    """Return a list of *n_files* sequential datasets of *n_times* steps each,
+    mimicking per-file datasets for a chunked model history.
+    """
+    ds_list = []
+    for i in range(n_files):
+        t = np.arange(i * n_times, (i + 1) * n_times, dtype=np.float64)
+        ds_list.append(xr.Dataset(
+            {'tas': (('time', 'lat', 'lon'), np.full((n_times, n_lat, n_lon), float(i), dtype=np.float32))},
+            coords={'time': ('time', t, {'units': 'days since 2000-01-01', 'calendar': 'noleap'}),
+                    'lat': np.linspace(-45., 45., n_lat),
+                    'lon': np.linspace(0., 315., n_lon)}
+        ))
+    return ds_list
+
+
+def get_test_var(name='tas', **kwargs):
+    """Return a stand-in for a translated VarlistEntry of a monthly variable."""
+    log = types.SimpleNamespace(info=lambda *args, **kw: None, debug=lambda *args, **kw: None)
+    translation = types.SimpleNamespace(convention='CMIP', name='t_ref', units='K',
+                                        get_scalar=lambda ax: None)
+    var_d = dict(name=name, full_name=f'<{name}>', standard_name='air_temperature', units='K',
+                 is_static=False, log=log, get_scalar=lambda ax: None, translation=translation,
+                 T=types.SimpleNamespace(range='20000101-20001231', frequency='mon'))
+    var_d.update(kwargs)
+    return types.SimpleNamespace(**var_d)
+
+
+def get_output_test_var(dest_path, **kwargs):
+    """Return a stand-in for a VarlistEntry that can be passed to write_dataset."""
+    translation = types.SimpleNamespace(convention='CMIP', name='tas', units='K',
+                                        get_scalar=lambda ax: None)
+    return get_test_var(T=types.SimpleNamespace(name='time'),
+                        X=types.SimpleNamespace(name='lon', standard_name='longitude'),
+                        Y=types.SimpleNamespace(name='lat', standard_name='latitude'),
+                        translation=translation, log=logging.getLogger('tas'),
+                        dest_path=dest_path, **kwargs)
+
+
+def get_test_case_list(var_list):
+    return {'case': types.SimpleNamespace(
+        varlist=types.SimpleNamespace(iter_vars=lambda: iter(var_list))
+    )}
+
+
+class TestConcatTimeChunks(unittest.TestCase):
+    def test_concat_order(self):
+        pp = get_test_preprocessor()
+        ds = pp.concat_time_chunks(get_time_chunks(5), 'time')
+        self.assertEqual(ds.sizes['time'], 60)
+        np.testing.assert_array_equal(ds['time'].values, np.arange(60.))
+        np.testing.assert_array_equal(ds['tas'].values[::12, 0, 0], np.arange(5.))
+        self.assertEqual(ds['time'].attrs['units'], 'days since 2000-01-01')
+
+    def test_concat_single(self):
+        pp = get_test_preprocessor()
+        ds_list = get_time_chunks(1)
+        self.assertIs(pp.concat_time_chunks(ds_list, 'time'), ds_list[0])
+
+
+class TestCropDateRange(unittest.TestCase):
+    def test_crop_raw_values(self):
+        pp = get_test_preprocessor()
+        time_coord = util.NameSpace.fromDict({'name': 'time'})
+        ds = get_time_chunks(1)[0].chunk({'time': 4})
+        ds['tas'].attrs['_FillValue'] = 1.0e20
+        cropped = pp.crop_date_range(util.DateRange('20000103', '20000105'), ds, time_coord)
+        np.testing.assert_array_equal(cropped['time'].values, [2., 3., 4.])
+        # data variables are neither decoded nor loaded
+        self.assertIn('_FillValue', cropped['tas'].attrs)
+        self.assertIsNotNone(cropped['tas'].chunks)
+        self.assertIs(pp.crop_date_range(util.DateRange('19990101', '20000112'), ds, time_coord), ds)
+        self.assertIsNone(pp.crop_date_range(util.DateRange('20010101', '20011231'), ds, time_coord))
+
+    def test_decode_time_coord(self):
+        pp = get_test_preprocessor()
+        time_coord = util.NameSpace.fromDict({'name': 'time'})
+        ds = get_time_chunks(1)[0]
+        ds['tas'].attrs['_FillValue'] = 1.0e20
+        ds = pp.decode_time_coord(ds, time_coord)
+        self.assertEqual(ds['time'].values[1], cftime.DatetimeNoLeap(2000, 1, 2))
+        self.assertEqual(ds['time'].encoding['units'], 'days since 2000-01-01')
+        self.assertIn('_FillValue', ds['tas'].attrs)
+
+
+class TestNormalizeTimeUnits(unittest.TestCase):
+    def test_rebase(self):
+        pp = get_test_preprocessor()
+        time_coord = util.NameSpace.fromDict({'name': 'time'})
+        ds_list = get_time_chunks(3)
+        # second file counts days since its own start; third counts hours
+        ds_list[1] = ds_list[1].assign_coords(time=('time', np.arange(12.), ds_list[1]['time'].attrs))
+        ds_list[1]['time'].attrs['units'] = 'days since 2000-01-13'
+        ds_list[2] = ds_list[2].assign_coords(time=('time', 24. * np.arange(12.), ds_list[2]['time'].attrs))
+        ds_list[2]['time'].attrs['units'] = 'hours since 2000-01-25 00:00:00'
+        for ds in ds_list:
+            ds['time'].attrs['bounds'] = 'time_bnds'
+            ds['time_bnds'] = xr.DataArray(
+                np.stack([ds['time'].values, ds['time'].values + 1.]).T, dims=('time', 'bnds')
+            ).chunk()
+        subset_dict = pp.normalize_time_units({i: ds for i, ds in enumerate(ds_list)}, time_coord)
+        for i, ds in subset_dict.items():
+            self.assertEqual(ds['time'].attrs['units'], 'days since 2000-01-01')
+            np.testing.assert_array_equal(ds['time'].values, np.arange(12. * i, 12. * (i + 1)))
+        # bounds are rebased lazily
+        self.assertIsNotNone(subset_dict[1]['time_bnds'].chunks)
+        np.testing.assert_array_equal(subset_dict[1]['time_bnds'].values[:, 0], np.arange(12., 24.))
+
+    def test_parse_time_units(self):
+        unit, ref = preprocessor.parse_time_units('hours since 1850-01-01 00:00:00', 'noleap')
+        self.assertEqual(unit, 'hours')
+        self.assertEqual(ref, cftime.DatetimeNoLeap(1850, 1, 1))
+
+
+def get_catalog_df(years, var_name='tas'):
+    """Return a catalog DataFrame with one yearly file per entry in *years*."""
+    return pd.DataFrame({
+        'variable_id': var_name,
+        'time_range': [f'{y}-01-01-{y}-12-31' for y in years],
+        'path': [f'/dummy/{var_name}.{y}0101-{y}1231.nc' for y in years]
+    })
+
+
+class TestCatalogAssetOrder(unittest.TestCase):
+    def test_check_group_daterange(self):
+        # catalog entries are pruned to the requested range and sorted by start time
+        pp = get_test_preprocessor()
+        df = get_catalog_df([1982, 1980, 1984, 1981, 1983])
+        out_df = pp.check_group_daterange(df, util.DateRange('19810101', '19831231'))
+        self.assertEqual(list(out_df['path']), [f'/dummy/tas.{y}0101-{y}1231.nc' for y in (1981, 1982, 1983)])
+
+    def test_check_group_daterange_contiguity(self):
+        pp = get_test_preprocessor()
+        # Feb 29 may be absent from model calendars without leap days
+        df = pd.DataFrame({'time_range': ['19840101-19840228', '19840301-19841231', '1985-1985'],
+                           'path': ['a', 'b', 'c']})
+        with self.assertNoLogs(level='WARNING'):
+            out_df = pp.check_group_daterange(df, util.DateRange('19840101', '19851231'))
+        self.assertEqual(list(out_df['path']), ['a', 'b', 'c'])
+        df = pd.DataFrame({'time_range': ['1980010100-1980123118', '1981010206-1981123118'],
+                           'path': ['a', 'b']})
+        with self.assertLogs(level='WARNING'):
+            out_df = pp.check_group_daterange(df, util.DateRange('19800101', '19811231'))
+        self.assertEqual(list(out_df['path']), ['a', 'b'])
+
+    def test_check_group_daterange_malformed(self):
+        pp = get_test_preprocessor()
+        df = pd.DataFrame({'time_range': ['19840101-19841231', 'dummy'], 'path': ['a', 'b']})
+        with self.assertLogs(level='ERROR'):
+            out_df = pp.check_group_daterange(df, util.DateRange('19840101', '19841231'))
+        self.assertTrue(out_df.empty)
+
+    def test_encode_group_time_vals(self):
+        pp = get_test_preprocessor()
+        keys, prec = pp.encode_group_time_vals(pd.Series(['1981', '19810201', '101', '1981020112']))
+        np.testing.assert_array_equal(keys, [19810101000000, 19810201000000, 1010101000000, 19810201120000])
+        np.testing.assert_array_equal(prec, [4, 8, 4, 10])
+
+    def test_sort_by_catalog_order(self):
+        pp = get_test_preprocessor()
+        df = get_catalog_df([1980, 1981, 1982])
+        cat_subset = types.SimpleNamespace(
+            esmcat=types.SimpleNamespace(assets=types.SimpleNamespace(column_name='path')),
+            df=df
+        )
+        subset_dict = {f'key{i}': xr.Dataset(attrs={'intake_esm_attrs:path': df['path'][i]})
+                       for i in (2, 0, 1)}
+        self.assertEqual(pp.sort_by_catalog_order(cat_subset, subset_dict), ['key0', 'key1', 'key2'])
+
+
+class TestPerVariableDatasets(unittest.TestCase):
+    def test_option(self):
+        self.assertFalse(get_test_preprocessor().per_variable_datasets)
+        self.assertTrue(get_test_preprocessor(per_variable_datasets=True).per_variable_datasets)
+
+    def test_share_coords(self):
+        pp = get_test_preprocessor(per_variable_datasets=True)
+        tas_ds = get_time_chunks(1)[0]
+        pr_ds = get_time_chunks(1)[0].rename_vars({'tas': 'pr'})
+        pr_ds = pp.share_coords({'tas': tas_ds}, pr_ds)
+        for c in ('time', 'lat', 'lon'):
+            self.assertIs(pr_ds.xindexes[c].index, tas_ds.xindexes[c].index)
+        # coordinates that differ are left alone
+        ps_ds = get_time_chunks(1, n_lat=6)[0].rename_vars({'tas': 'ps'})
+        ps_ds = pp.share_coords({'tas': tas_ds}, ps_ds)
+        self.assertEqual(ps_ds.sizes['lat'], 6)
+        self.assertIs(ps_ds.xindexes['lon'].index, tas_ds.xindexes['lon'].index)
+
+    def test_get_var_dataset(self):
+        pp = get_test_preprocessor(per_variable_datasets=True)
+        var = types.SimpleNamespace(name='tas')
+        ds = get_time_chunks(1)[0]
+        self.assertIs(pp.get_var_dataset(ds, var), ds)
+        self.assertIs(pp.get_var_dataset({'tas': ds}, var), ds)
+
+    def test_rename_dataset_vars(self):
+        pp = get_test_preprocessor(per_variable_datasets=True)
+        var = types.SimpleNamespace(name='tas', translation=types.SimpleNamespace(name='t_ref'))
+        case_list = {'case': types.SimpleNamespace(
+            varlist=types.SimpleNamespace(iter_vars=lambda: iter([var]))
+        )}
+        cat_subset = {'case': {'tas': get_time_chunks(1)[0].rename_vars({'tas': 't_ref'})}}
+        cat_subset = pp.rename_dataset_vars(cat_subset, case_list)
+        self.assertIn('tas', cat_subset['case']['tas'].data_vars)
+        self.assertNotIn('t_ref', cat_subset['case']['tas'].data_vars)
+
+
+class TestParseCaseDataset(unittest.TestCase):
+    def get_raw_ds(self, var_names):
+        # as opened with decode_cf=False
+        return xr.Dataset(
+            {name: (('time', 'lat'), np.zeros((4, 2), dtype=np.float32),
+                    {'units': 'K ', 'standard_name': 'air_temperature'}) for name in var_names},
+            coords={'time': ('time', np.arange(4.), {'units': 'days since 2000-01-01',
+                                                     'calendar': 'noleap', 'axis': 'T'}),
+                    'lat': ('lat', [-45., 45.], {'units': 'degrees_north', 'axis': 'Y'})}
+        )
+
+    def test_decode_once(self):
+        pp = get_test_preprocessor(disable_preprocessor=True)
+        var_names = ['tas', 'ts', 'tos']
+        with mock.patch('xarray.decode_cf', wraps=xr.decode_cf) as decode_cf:
+            ds = pp.parse_case_ds(self.get_raw_ds(var_names))
+            var_list = []
+            for name in var_names:
+                var = get_test_var(name, is_static=False, translation=types.SimpleNamespace(
+                    name=name, T=types.SimpleNamespace(units='')))
+                var_ds = pp.parse_var_ds(var, ds)
+                var_ds[name].attrs['units'] = 'degC'
+                var_list.append(var)
+        self.assertEqual(decode_cf.call_count, 1)
+        self.assertIsInstance(ds['time'].values[0], cftime.DatetimeNoLeap)
+        self.assertEqual(ds['tas'].attrs['units'], 'K')
+        for var in var_list:
+            self.assertEqual(var.translation.T.units, 'days since 2000-01-01')
+
+
+class TestPreprocessWorkers(unittest.TestCase):
+    def test_option(self):
+        pp = get_test_preprocessor()
+        self.assertEqual(pp.preprocess_workers, 1)
+        pp = get_test_preprocessor(preprocess_workers=4)
+        self.assertEqual(pp.preprocess_workers, 4)
+        # workers need independent per-variable Datasets, so merged Datasets are
+        # processed one variable at a time
+        self.assertFalse(pp.per_variable_datasets)
+        results = pp.run_var_tasks(lambda i: threading.current_thread(), [(0,), (1,)])
+        self.assertTrue(all(t is threading.main_thread() for t in results))
+
+    def test_run_var_tasks_order(self):
+        pp = get_test_preprocessor(preprocess_workers=4, per_variable_datasets=True)
+
+        def _task(i, delay):
+            time.sleep(delay)
+            return i, threading.current_thread().name
+
+        results = pp.run_var_tasks(_task, [(i, 0.01 * (8 - i)) for i in range(8)])
+        self.assertEqual([r[0] for r in results], list(range(8)))
+        self.assertTrue(all(r[1].startswith('mdtf_preprocess') for r in results))
+
+    def test_run_var_tasks_exception(self):
+        pp = get_test_preprocessor(preprocess_workers=2, per_variable_datasets=True)
+        done = []
+
+        def _task(i):
+            if i == 0:
+                raise ValueError('failed task')
+            time.sleep(0.01)
+            done.append(i)
+
+        with self.assertRaises(ValueError):
+            pp.run_var_tasks(_task, [(i,) for i in range(50)])
+        # pending tasks are cancelled after the failure
+        self.assertLess(len(done), 49)
+
+    def test_parser_per_thread(self):
+        pp = get_test_preprocessor(preprocess_workers=2, per_variable_datasets=True)
+        main_parser = pp.parser
+        self.assertIs(pp.parser, main_parser)
+        results = pp.run_var_tasks(lambda i: pp.parser, [(0,), (1,)])
+        for parser in results:
+            self.assertIsNot(parser, main_parser)
+
+
+class TestComputeWrites(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_compute_writes(self):
+        pp = get_test_preprocessor(write_workers=2)
+        ds_list = [ds.chunk({'time': 4}) for ds in get_time_chunks(4)]
+        writes = []
+        for i, ds in enumerate(ds_list):
+            var = types.SimpleNamespace(full_name=f'tas{i}', log=logging.getLogger(f'tas{i}'),
+                                        dest_path=os.path.join(self.tmp_dir, f'tas{i}.nc'))
+            writes.append((var, ds.to_netcdf(var.dest_path, compute=False)))
+        with self.assertLogs('tas3', level='INFO') as log_cm:
+            pp.compute_writes(writes)
+        self.assertIn('Time to write file', log_cm.output[0])
+        for i, ds in enumerate(ds_list):
+            with xr.open_dataset(os.path.join(self.tmp_dir, f'tas{i}.nc')) as out_ds:
+                np.testing.assert_array_equal(out_ds['tas'].values, ds['tas'].values)
+
+    def test_lock_file_close(self):
+        ds = get_time_chunks(1)[0].chunk({'time': 4})
+        delayed_write = ds.to_netcdf(os.path.join(self.tmp_dir, 'tas.nc'), compute=False)
+        locked_write = preprocessor.lock_file_close(delayed_write)
+        # fails if the graph produced by the pinned dask/xarray isn't recognized
+        self.assertIsNotNone(locked_write)
+        self.assertEqual(locked_write.key, delayed_write.key)
+        # the output file is closed while holding the netCDF-C lock
+        store_close = xr.backends.NetCDF4DataStore.close
+        held = []
+
+        def _close(store, *args, **kwargs):
+            held.append(preprocessor.NETCDFC_LOCK.locked())
+            return store_close(store, *args, **kwargs)
+
+        with mock.patch.object(xr.backends.NetCDF4DataStore, 'close', _close):
+            locked_write.compute()
+        self.assertEqual(held, [True])
+        with xr.open_dataset(os.path.join(self.tmp_dir, 'tas.nc')) as out_ds:
+            self.assertEqual(out_ds.sizes['time'], 12)
+
+    def test_lock_file_close_fallback(self):
+        delayed_write = preprocessor.Delayed('write-key', {'write-key': None})
+        with self.assertLogs(preprocessor._log, level='WARNING') as log_cm:
+            self.assertIsNone(preprocessor.lock_file_close(delayed_write))
+        self.assertIn('Unexpected dask graph', log_cm.output[0])
+
+
+class TestZarrOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_var(self, **kwargs):
+        return get_test_var(T=types.SimpleNamespace(name='time'),
+                            dest_path=os.path.join(self.tmp_dir, 'tas.zarr'), **kwargs)
+
+    def test_option(self):
+        pp = get_test_preprocessor(output_format='zarr')
+        self.assertEqual(pp.output_format, 'zarr')
+        self.assertNotIn('engine', pp.save_dataset_kwargs)
+        self.assertEqual(get_test_preprocessor().output_format, 'netcdf')
+
+    def test_zarr_chunks(self):
+        pp = get_test_preprocessor(output_format='zarr')
+        ds = get_time_chunks(1, n_times=100)[0]
+        # 4 x 8 float32 values per time step
+        pp.zarr_chunk_bytes = 10 * 4 * 8 * 4
+        self.assertEqual(pp.zarr_chunks(self.get_var(), ds), {'time': 10, 'lat': -1, 'lon': -1})
+        pp.zarr_chunk_bytes = 1
+        self.assertEqual(pp.zarr_chunks(self.get_var(), ds)['time'], 1)
+        self.assertEqual(pp.zarr_chunks(self.get_var(is_static=True), ds),
+                         {'time': -1, 'lat': -1, 'lon': -1})
+
+    def test_write_zarr_store(self):
+        pp = get_test_preprocessor(output_format='zarr')
+        pp.zarr_chunk_bytes = 10 * 4 * 8 * 4
+        var = self.get_var()
+        ds = xr.concat(get_time_chunks(3), dim='time').chunk({'time': 7})
+        ds['tas'].encoding.update({'zlib': True, 'complevel': 2, 'contiguous': False})
+        pp.compute_writes([(var, pp.write_zarr_store(var, ds))])
+        self.assertTrue(ds['tas'].encoding['zlib'])
+        with xr.open_dataset(var.dest_path, engine='zarr', chunks={}) as out_ds:
+            self.assertEqual(out_ds['tas'].chunks, ((10, 10, 10, 6), (4,), (8,)))
+            np.testing.assert_array_equal(out_ds['tas'].values, ds['tas'].values)
+
+
+class TestOutputEncoding(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_var(self, **kwargs):
+        return get_output_test_var(os.path.join(self.tmp_dir, 'tas.nc'), **kwargs)
+
+    def get_ds(self):
+        ds = get_time_chunks(1, n_times=20)[0]
+        ds['tas'] = ds['tas'].astype(np.float64)
+        for c in ('lat', 'lon'):
+            ds[c].attrs['standard_name'] = c
+        return ds
+
+    def test_policy(self):
+        pp = get_test_preprocessor(output_encoding={'complevel': 4, 'dtype': 'float32'})
+        var = self.get_var(output_encoding={'complevel': 1, 'chunks': {'T': 5}, 'fast': True})
+        with self.assertLogs('tas', level='WARNING') as log_cm:
+            policy = pp.output_encoding_policy(var)
+        self.assertIn("['fast']", log_cm.output[0])
+        self.assertEqual(policy, {'complevel': 1, 'chunks': {'T': 5}, 'dtype': 'float32'})
+        self.assertEqual(pp.policy_chunks(var, policy), {'time': 5})
+        self.assertEqual(get_test_preprocessor().output_encoding_policy(var),
+                         {'complevel': 1, 'chunks': {'T': 5}})
+
+    def test_write_dataset(self):
+        import netCDF4
+        pp = get_test_preprocessor(output_encoding={
+            'complevel': 1, 'shuffle': True, 'dtype': 'float32',
+            'chunks': {'T': 5, 'lon': 0}, 'unlimited_time': False
+        })
+        var = self.get_var()
+        ds = self.get_ds()
+        dask.compute(pp.write_dataset(var, ds))
+        # processed Dataset is unchanged
+        self.assertNotIn('zlib', ds['tas'].encoding)
+        with netCDF4.Dataset(var.dest_path) as nc:
+            self.assertFalse(nc.dimensions['time'].isunlimited())
+            nc_var = nc.variables['tas']
+            self.assertEqual(nc_var.dtype, np.float32)
+            self.assertEqual(nc_var.chunking(), [5, 4, 8])
+            self.assertTrue(nc_var.filters()['zlib'])
+            self.assertTrue(nc_var.filters()['shuffle'])
+        with xr.open_dataset(var.dest_path) as out_ds:
+            np.testing.assert_array_equal(out_ds['tas'].values, ds['tas'].values)
+
+    def test_default_encoding(self):
+        import netCDF4
+        pp = get_test_preprocessor()
+        var = self.get_var()
+        dask.compute(pp.write_dataset(var, self.get_ds()))
+        with netCDF4.Dataset(var.dest_path) as nc:
+            self.assertTrue(nc.dimensions['time'].isunlimited())
+            self.assertEqual(nc.variables['tas'].dtype, np.float64)
+            self.assertFalse(nc.variables['tas'].filters()['zlib'])
+
+
+class TestTimeBlocks(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # 3 years of monthly data
+        times = [cftime.DatetimeNoLeap(2000 + i // 12, i % 12 + 1, 15) for i in range(36)]
+        tas = np.arange(36 * 4 * 8, dtype=np.float64).reshape(36, 4, 8)
+        tas[5, 0, 0] = np.nan
+        self.ds = xr.Dataset(
+            {'tas': (('time', 'lat', 'lon'), tas, {'units': 'K'})},
+            coords={'time': ('time', times, {'axis': 'T'}),
+                    'lat': ('lat', np.linspace(-45., 45., 4), {'standard_name': 'latitude'}),
+                    'lon': ('lon', np.linspace(0., 315., 8), {'standard_name': 'longitude'})}
+        ).chunk({'time': 5})
+        self.ds['time'].encoding.update({'units': 'days since 2000-01-01', 'calendar': 'noleap',
+                                         'dtype': np.dtype('int32')})
+        self.ds['tas'].encoding.update({'_FillValue': 1.0e20, 'dtype': np.dtype('float32')})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_var(self, name='tas.nc'):
+        return get_output_test_var(os.path.join(self.tmp_dir, name))
+
+    def test_time_blocks(self):
+        var = self.get_var()
+        self.assertEqual(get_test_preprocessor().time_blocks(var, self.ds), [slice(None)])
+        pp = get_test_preprocessor(time_block_years=2)
+        self.assertTrue(pp.per_variable_datasets)
+        self.assertEqual(pp.time_blocks(var, self.ds), [slice(0, 24), slice(24, 36)])
+        self.assertEqual(pp.time_blocks(get_output_test_var('', is_static=True), self.ds), [slice(None)])
+        # fixed-size netCDF time dimensions can't be appended to
+        var = get_output_test_var('', output_encoding={'unlimited_time': False})
+        self.assertEqual(pp.time_blocks(var, self.ds), [slice(None)])
+
+    def test_write_netcdf_blocks(self):
+        import netCDF4
+        pp = get_test_preprocessor(time_block_years=1)
+        var = self.get_var()
+        self.assertIsNone(pp.write_var_blocks(var, self.ds, pp.time_blocks(var, self.ds)))
+        with netCDF4.Dataset(var.dest_path) as nc:
+            self.assertTrue(nc.dimensions['time'].isunlimited())
+            self.assertEqual(nc.variables['tas'].dtype, np.float32)
+            self.assertEqual(nc.variables['time'].units, 'days since 2000-01-01')
+        with xr.open_dataset(var.dest_path, use_cftime=True) as out_ds:
+            np.testing.assert_array_equal(out_ds['time'].values, self.ds['time'].values)
+            np.testing.assert_array_equal(out_ds['tas'].values, self.ds['tas'].values)
+
+    def test_write_netcdf_blocks_bounds(self):
+        import netCDF4
+        # GFDL ocean output, where output_dataset keeps the time bounds
+        ds = self.ds.copy()
+        ds.attrs['grid'] = 'tripolar'
+        bnds = [[cftime.DatetimeNoLeap(2000 + i // 12, i % 12 + 1, 1),
+                 cftime.DatetimeNoLeap(2000 + (i + 1) // 12, (i + 1) % 12 + 1, 1)] for i in range(36)]
+        ds['time_bnds'] = xr.DataArray(bnds, dims=('time', 'bnds')).chunk({'time': 5})
+        ds['time_bnds'].encoding.update({'units': 'days since 2000-01-01', 'calendar': 'noleap',
+                                         'dtype': np.dtype('float64')})
+        ds['time'].attrs['bounds'] = 'time_bnds'
+        pp = get_test_preprocessor(time_block_years=1)
+        var = self.get_var()
+        pp.write_var_blocks(var, ds, pp.time_blocks(var, ds))
+        with netCDF4.Dataset(var.dest_path) as nc:
+            self.assertEqual(len(nc.dimensions['time']), 36)
+        with xr.open_dataset(var.dest_path, use_cftime=True) as out_ds:
+            np.testing.assert_array_equal(out_ds['time'].values, ds['time'].values)
+            np.testing.assert_array_equal(out_ds['time_bnds'].values, ds['time_bnds'].values)
+            np.testing.assert_array_equal(out_ds['tas'].values, ds['tas'].values)
+
+    def test_write_zarr_blocks(self):
+        pp = get_test_preprocessor(time_block_years=1, output_format='zarr')
+        # chunks of 5 time steps don't line up with the blocks
+        pp.zarr_chunk_bytes = 5 * 4 * 8 * 8
+        var = self.get_var('tas.zarr')
+        pp.write_var_blocks(var, self.ds, pp.time_blocks(var, self.ds))
+        with xr.open_dataset(var.dest_path, engine='zarr', chunks={}, use_cftime=True) as out_ds:
+            self.assertEqual(out_ds['tas'].chunks[0], (5,) * 7 + (1,))
+            np.testing.assert_array_equal(out_ds['time'].values, self.ds['time'].values)
+            np.testing.assert_array_equal(out_ds['tas'].values, self.ds['tas'].values)
+
+
+class TestCoalesceRequests(unittest.TestCase):
+    def get_vars(self):
+        translation = types.SimpleNamespace(convention='CMIP', name='tas', units='K',
+                                            get_scalar=lambda ax: None)
+        return [
+            get_test_var('tas', translation=translation),
+            get_test_var('pr', standard_name='precipitation_flux', units='kg m-2 s-1',
+                         translation=types.SimpleNamespace(convention='CMIP', name='pr', units='kg m-2 s-1',
+                                                           get_scalar=lambda ax: None)),
+            # same data requested by another POD under a different name
+            get_test_var('t_ref', translation=types.SimpleNamespace(**vars(translation))),
+            # same model variable, different units
+            get_test_var('tas_c', units='degC', translation=types.SimpleNamespace(**vars(translation)))
+        ]
+
+    def test_coalesce(self):
+        pp = get_test_preprocessor()
+        var_list = self.get_vars()
+        case_list = get_test_case_list(var_list)
+        with self.assertLogs(preprocessor._log, level='INFO') as log_cm:
+            pp.coalesce_requests(case_list)
+        self.assertIn('(1 deduplicated)', log_cm.output[0])
+        self.assertEqual(pp.duplicate_vars, {('case', 't_ref'): var_list[0]})
+        self.assertEqual([v.name for v in pp.iter_product_vars('case', case_list['case'])],
+                         ['tas', 'pr', 'tas_c'])
+
+    def test_fan_out(self):
+        pp = get_test_preprocessor(per_variable_datasets=True)
+        var_list = self.get_vars()
+        case_list = get_test_case_list(var_list)
+        pp.coalesce_requests(case_list)
+        # preprocessing renamed the product's variable
+        var_list[0].translation.name = 'tas'
+        tas_ds = get_time_chunks(1)[0]
+        cat_subset = {'case': {'tas': tas_ds}}
+        cat_subset = pp.fan_out_products(case_list, cat_subset)
+        t_ref_ds = cat_subset['case']['t_ref']
+        self.assertIsNot(t_ref_ds, tas_ds)
+        self.assertIsNot(t_ref_ds.attrs, tas_ds.attrs)
+        self.assertIsNot(t_ref_ds['tas'].encoding, tas_ds['tas'].encoding)
+        self.assertIs(t_ref_ds['tas'].data, tas_ds['tas'].data)
+        cat_subset = pp.rename_dataset_vars(cat_subset, get_test_case_list(var_list[:1] + var_list[2:3]))
+        self.assertIn('t_ref', cat_subset['case']['t_ref'].data_vars)
+        self.assertIn('tas', cat_subset['case']['tas'].data_vars)
+
+    def test_fan_out_merged(self):
+        pp = get_test_preprocessor()
+        var_list = self.get_vars()[:3]
+        case_list = get_test_case_list(var_list)
+        pp.coalesce_requests(case_list)
+        ds = get_time_chunks(1)[0]
+        ds['pr'] = ds['tas'] * 0.
+        cat_subset = pp.fan_out_products(case_list, {'case': ds})
+        cat_subset = pp.rename_dataset_vars(cat_subset, case_list)
+        np.testing.assert_array_equal(cat_subset['case']['t_ref'].values, cat_subset['case']['tas'].values)
+
+
+class TestPPCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.asset_path = os.path.join(self.tmp_dir, 'atmos.tas.nc')
+        get_time_chunks(1)[0].to_netcdf(self.asset_path)
+        self.cat_subset = types.SimpleNamespace(
+            df=pd.DataFrame({'path': [self.asset_path]}),
+            esmcat=types.SimpleNamespace(assets=types.SimpleNamespace(column_name='path'))
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_var(self, **kwargs):
+        return get_test_var(dest_path=os.path.join(self.tmp_dir, 'wk', 'tas.nc'), **kwargs)
+
+    def get_pp(self):
+        return get_test_preprocessor(pp_cache_dir=os.path.join(self.tmp_dir, 'cache'))
+
+    def test_option(self):
+        self.assertIsNone(get_test_preprocessor().pp_cache)
+        pp = self.get_pp()
+        self.assertIsNotNone(pp.pp_cache)
+        # cache entries hold one variable each
+        self.assertTrue(pp.per_variable_datasets)
+
+    def test_key(self):
+        pp = self.get_pp()
+        key = pp.pp_cache_key(self.get_var(), self.cat_subset)
+        self.assertEqual(pp.pp_cache_key(self.get_var(), self.cat_subset), key)
+        self.assertNotEqual(pp.pp_cache_key(self.get_var(units='degC'), self.cat_subset), key)
+        date_range = types.SimpleNamespace(range='20000101-20000630', frequency='mon')
+        self.assertNotEqual(pp.pp_cache_key(self.get_var(T=date_range), self.cat_subset), key)
+        # key depends on the list and order of preprocessing functions
+        pp.file_preproc_functions = pp.file_preproc_functions[::-1]
+        self.assertNotEqual(pp.pp_cache_key(self.get_var(), self.cat_subset), key)
+        pp.file_preproc_functions = pp.file_preproc_functions[::-1]
+        # ... and on the input files' modification times
+        mtime_ns = os.stat(self.asset_path).st_mtime_ns
+        os.utime(self.asset_path, ns=(mtime_ns, mtime_ns + 10**9))
+        self.assertNotEqual(pp.pp_cache_key(self.get_var(), self.cat_subset), key)
+
+    def test_key_code(self):
+        pp = self.get_pp()
+        code_path = os.path.join(self.tmp_dir, 'units.py')
+        with open(code_path, 'w') as f:
+            f.write('# version 1')
+        with mock.patch.object(preprocessor, '_pp_code_paths', preprocessor._pp_code_paths + (code_path,)):
+            key = pp.pp_cache_key(self.get_var(), self.cat_subset)
+            self.assertEqual(pp.pp_cache_key(self.get_var(), self.cat_subset), key)
+            # key depends on the framework code doing the preprocessing
+            with open(code_path, 'w') as f:
+                f.write('# version 2')
+            self.assertNotEqual(pp.pp_cache_key(self.get_var(), self.cat_subset), key)
+
+    def test_key_remote_assets(self):
+        pp = self.get_pp()
+        self.cat_subset.df['path'] = ['https://example.org/atmos.tas.nc']
+        self.assertIsNone(pp.pp_cache_key(self.get_var(), self.cat_subset))
+
+    def test_hit(self):
+        pp = self.get_pp()
+        var = self.get_var()
+        self.assertIsNone(pp.load_cached_var('case', var, self.cat_subset))
+        os.makedirs(os.path.dirname(var.dest_path))
+        get_time_chunks(1)[0].to_netcdf(var.dest_path)
+        ds = xr.Dataset(attrs={'intake_esm_attrs:realm': 'atmos', 'title': 'x'})
+        pp.add_to_pp_cache([('case', var, ds)])
+        os.remove(var.dest_path)
+
+        pp = self.get_pp()
+        var = self.get_var()
+        cached_ds = pp.load_cached_var('case', var, self.cat_subset)
+        self.assertIn(('case', 'tas'), pp.pp_cache_hits)
+        # data is renamed back to the model's name, as rename_dataset_vars expects
+        self.assertEqual(var.translation.name, 't_ref')
+        self.assertIn('t_ref', cached_ds.data_vars)
+        self.assertEqual(cached_ds.attrs['intake_esm_attrs:realm'], 'atmos')
+        self.assertNotIn('title', cached_ds.attrs)
+        self.assertTrue(os.path.exists(var.dest_path))
+        cached_ds.close()
+
+
+def get_level_test_var(level, units='hPa'):
+    """Return a stand-in for a VarlistEntry requesting eastward wind on a
+    pressure level, translated to the CMIP name and units of the level.
+    """
+    our_z = types.SimpleNamespace(is_scalar=True, value=level, units=units, axis='Z', name='lev')
+    tv_z = types.SimpleNamespace(is_scalar=True, value=level * 100., units='Pa', axis='Z', name='plev')
+    translation = types.SimpleNamespace(convention='CMIP', name=f'ua{level}', units='m s-1',
+                                        get_scalar=lambda ax: tv_z if ax == 'Z' else None,
+                                        requires_level_extraction=None)
+    return get_test_var(name=f'u{level}', standard_name='eastward_wind', units='m s-1',
+                        get_scalar=lambda ax: our_z if ax == 'Z' else None,
+                        translation=translation)
+
+
+class TestExtractLevelOnRead(unittest.TestCase):
+    def setUp(self):
+        plev = np.array([85000., 50000., 25000.])
+        self.ds = xr.Dataset(
+            {'ua': (('time', 'plev', 'lat', 'lon'),
+                    np.arange(4 * 3 * 2 * 3, dtype=np.float32).reshape(4, 3, 2, 3))},
+            coords={'time': np.arange(4.), 'plev': ('plev', plev, {'units': 'Pa', 'axis': 'Z'}),
+                    'lat': [-45., 45.], 'lon': [0., 120., 240.]}
+        ).chunk()
+        self.func = preprocessor.ExtractLevelFunction
+
+    def test_select_level(self):
+        var = get_level_test_var(500)
+        ds = self.func.select_on_read(self.func, var, self.ds)
+        self.assertNotIn('plev', ds['ua'].dims)
+        self.assertEqual(float(ds['plev']), 50000.)
+        # selection is lazy
+        self.assertIsInstance(ds['ua'].data, dask.array.Array)
+        np.testing.assert_array_equal(ds['ua'].values, self.ds['ua'].sel(plev=50000.).values)
+        self.assertTrue(var.translation.requires_level_extraction)
+
+    def test_z_axis_attrs(self):
+        # Z dimension found by its attributes if it's not named as in the translation
+        var = get_level_test_var(250)
+        ds = self.func.select_on_read(self.func, var, self.ds.rename({'plev': 'pfull'}))
+        self.assertEqual(float(ds['pfull']), 25000.)
+
+    def test_missing_level(self):
+        var = get_level_test_var(700)
+        self.assertIs(self.func.select_on_read(self.func, var, self.ds), self.ds)
+        self.assertFalse(var.translation.requires_level_extraction)
+
+    def test_no_level_requested(self):
+        self.assertIs(self.func.select_on_read(self.func, get_test_var(), self.ds), self.ds)
+
+    def test_open_assets_shared(self):
+        pp = get_test_preprocessor()
+        calls = []
+
+        def _to_dataset_dict(**kwargs):
+            calls.append(kwargs)
+            return {'ua.nc': self.ds}
+
+        cat_subset = types.SimpleNamespace(
+            df=pd.DataFrame({'path': ['ua.nc']}), to_dataset_dict=_to_dataset_dict,
+            esmcat=types.SimpleNamespace(assets=types.SimpleNamespace(column_name='path'))
+        )
+        ds_dicts = [pp.open_assets(cat_subset) for _ in range(3)]
+        self.assertEqual(len(calls), 1)
+        # callers can drop variables without affecting each other
+        del ds_dicts[0]['ua.nc']['ua']
+        self.assertIn('ua', ds_dicts[1]['ua.nc'])
+
+
+def get_region_test_var(lat_bounds=None, lon_bounds=None):
+    """Return a stand-in for a VarlistEntry requesting a lat/lon region."""
+    log = types.SimpleNamespace(info=lambda *args, **kw: None, debug=lambda *args, **kw: None,
+                                warning=lambda *args, **kw: None)
+    translation = types.SimpleNamespace(convention='CMIP', name='tas', units='K',
+                                        get_scalar=lambda ax: None)
+    return get_test_var(name='tas', name_in_model='tas', translation=translation, log=log,
+                        X=types.SimpleNamespace(name='lon', range=lon_bounds),
+                        Y=types.SimpleNamespace(name='lat', range=lat_bounds))
+
+
+class TestExtractRegion(unittest.TestCase):
+    def setUp(self):
+        lat = np.arange(-80., 81., 20.)
+        lon = np.arange(0., 360., 30.)
+        self.ds = xr.Dataset(
+            {'tas': (('time', 'lat', 'lon'),
+                     np.arange(2 * len(lat) * len(lon), dtype=np.float32).reshape(2, len(lat), len(lon))),
+             'lon_bnds': (('lon', 'bnds'), np.stack([lon - 15., lon + 15.], axis=1))},
+            coords={'time': ('time', [0., 1.], {'axis': 'T', 'standard_name': 'time'}),
+                    'lat': ('lat', lat, {'axis': 'Y', 'standard_name': 'latitude',
+                                         'units': 'degrees_north'}),
+                    'lon': ('lon', lon, {'axis': 'X', 'standard_name': 'longitude',
+                                         'units': 'degrees_east', 'bounds': 'lon_bnds'})}
+        ).chunk()
+        self.func = preprocessor.ExtractRegionFunction
+
+    def test_no_region(self):
+        self.assertIs(self.func.execute(self.func, get_region_test_var(), self.ds), self.ds)
+
+    def test_region(self):
+        var = get_region_test_var(lat_bounds=(-30., 30.), lon_bounds=(90., 180.))
+        ds = self.func.execute(self.func, var, self.ds)
+        np.testing.assert_array_equal(ds['lat'].values, [-20., 0., 20.])
+        np.testing.assert_array_equal(ds['lon'].values, [90., 120., 150., 180.])
+        # subset is taken lazily
+        self.assertIsInstance(ds['tas'].data, dask.array.Array)
+        np.testing.assert_array_equal(
+            ds['tas'].values, self.ds['tas'].sel(lat=slice(-30., 30.), lon=slice(90., 180.)).values
+        )
+
+    def test_lon_wraparound(self):
+        var = get_region_test_var(lon_bounds=(-60., 60.))
+        ds = self.func.execute(self.func, var, self.ds)
+        np.testing.assert_array_equal(ds['lon'].values, [-60., -30., 0., 30., 60.])
+        np.testing.assert_array_equal(ds['tas'].values,
+                                      self.ds['tas'].isel(lon=[10, 11, 0, 1, 2]).values)
+        np.testing.assert_array_equal(ds['lon_bnds'].values[:, 0], ds['lon'].values - 15.)
+        self.assertEqual(ds['lon'].attrs['units'], 'degrees_east')
+        # crossing the 0/360 meridian with the second bound less than the first
+        ds = self.func.execute(self.func, get_region_test_var(lon_bounds=(300., 60.)), self.ds)
+        np.testing.assert_array_equal(ds['lon'].values, [300., 330., 360., 390., 420.])
+
+    def test_lon_convention(self):
+        ds = self.func.execute(self.func, get_region_test_var(lon_bounds=(-180., 180.)), self.ds)
+        self.assertEqual(ds.sizes['lon'], 12)
+        np.testing.assert_array_equal(ds['lon'].values, np.arange(-180., 180., 30.))
+
+    def test_empty_region(self):
+        var = get_region_test_var(lat_bounds=(81., 89.))
+        with self.assertRaises(ValueError):
+            self.func.execute(self.func, var, self.ds)
+
+    def test_region_bounds(self):
+        region_bounds = varlist_util.VarlistEntry.region_bounds
+        self.assertEqual(region_bounds('tas', 'lat_bounds', [-30, 30]), (-30., 30.))
+        self.assertEqual(region_bounds('tas', 'lon_bounds', [300, 60]), (300., 60.))
+        for key, bounds in (('lat_bounds', [30, -30]), ('lat_bounds', [-95, 0]),
+                            ('lat_bounds', 'tropics'), ('lon_bounds', [0, 0])):
+            with self.assertRaises(ValueError):
+                region_bounds('tas', key, bounds)
+
+
+def get_resample_test_var(frequency='day', cell_methods=''):
+    """Return a stand-in for a VarlistEntry requesting *frequency* data."""
+    translation = types.SimpleNamespace(convention='CMIP', name='tas', units='K',
+                                        get_scalar=lambda ax: None)
+    return get_test_var(name='tas', name_in_model='tas', translation=translation,
+                        cell_methods=cell_methods,
+                        T=types.SimpleNamespace(name='time', frequency=util.DateFrequency(frequency)))
+
+
+class TestResample(unittest.TestCase):
+    def setUp(self):
+        # 3 days of 6-hourly data with a diurnal cycle of -2, 0, 2, 0
+        n_times = 12
+        times = [cftime.DatetimeNoLeap(2000, 1, 1 + i // 4, 6 * (i % 4)) for i in range(n_times)]
+        bnds = [[t, t + dt.timedelta(hours=6)] for t in times]
+        values = np.repeat(np.arange(3.), 4) + np.tile([-2., 0., 2., 0.], 3)
+        self.ds = xr.Dataset(
+            {'tas': (('time', 'lat'), np.stack([values, values + 10.], axis=1).astype(np.float32),
+                     {'units': 'K'}),
+             'time_bnds': (('time', 'bnds'), bnds)},
+            coords={'time': ('time', times, {'axis': 'T', 'standard_name': 'time',
+                                             'bounds': 'time_bnds'}),
+                    'lat': ('lat', [-45., 45.], {'axis': 'Y', 'standard_name': 'latitude'})}
+        ).chunk()
+        self.ds['tas'].encoding['_FillValue'] = 1.0e20
+        self.func = preprocessor.ResampleFunction
+
+    def test_mean(self):
+        ds = self.func.execute(self.func, get_resample_test_var(), self.ds)
+        self.assertEqual(ds.sizes['time'], 3)
+        # resampling is lazy
+        self.assertIsInstance(ds['tas'].data, dask.array.Array)
+        np.testing.assert_array_equal(ds['tas'].values[:, 0], [0., 1., 2.])
+        np.testing.assert_array_equal(ds['tas'].values[:, 1], [10., 11., 12.])
+        self.assertEqual(ds['tas'].attrs['units'], 'K')
+        self.assertEqual(ds['tas'].encoding['_FillValue'], 1.0e20)
+        self.assertEqual(ds['time'].attrs['bounds'], 'time_bnds')
+        self.assertEqual(ds['time'].values[1], cftime.DatetimeNoLeap(2000, 1, 2))
+        np.testing.assert_array_equal(
+            ds['time_bnds'].values[1], [cftime.DatetimeNoLeap(2000, 1, 2), cftime.DatetimeNoLeap(2000, 1, 3)]
+        )
+
+    def test_cell_methods(self):
+        var = get_resample_test_var(cell_methods='area: mean time: maximum')
+        ds = self.func.execute(self.func, var, self.ds)
+        np.testing.assert_array_equal(ds['tas'].values[:, 0], [2., 3., 4.])
+        var = get_resample_test_var(cell_methods='time: minimum')
+        ds = self.func.execute(self.func, var, self.ds)
+        np.testing.assert_array_equal(ds['tas'].values[:, 0], [-2., -1., 0.])
+        with self.assertRaises(ValueError):
+            self.func.execute(self.func, get_resample_test_var(cell_methods='time: median'), self.ds)
+
+    def test_native_frequency(self):
+        self.assertIs(self.func.execute(self.func, get_resample_test_var('6hr'), self.ds), self.ds)
+        self.assertIs(self.func.execute(self.func, get_resample_test_var('3hr'), self.ds), self.ds)
+
+    def test_time_method(self):
+        self.assertEqual(self.func.time_method(get_resample_test_var()), 'mean')
+        self.assertEqual(self.func.time_method(get_resample_test_var(cell_methods='time: sum')), 'sum')
+        self.assertEqual(self.func.resample_rule(util.DateFrequency('mon')), '1MS')
+        self.assertEqual(self.func.resample_rule(util.DateFrequency('6hr')), '6h')
+
+
+class CountingArray:
+    """Array-like wrapper counting the number of values read from it, standing
+    in for lazily loaded netCDF data.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.shape = values.shape
+        self.dtype = values.dtype
+        self.ndim = values.ndim
+        self.n_read = 0
+
+    def __getitem__(self, key):
+        out = self.values[key]
+        self.n_read += out.size
+        return out
+
+    def to_dask(self, chunks):
+        return dask.array.from_array(self, chunks=chunks, meta=np.array((), dtype=self.dtype))
+
+
+class TestLazyFunctions(unittest.TestCase):
+    # preprocessing functions must not read data before it's written
+
+    def get_ds(self, values, units='K'):
+        n_times = values.shape[0]
+        self.counter = CountingArray(values)
+        times = [cftime.DatetimeNoLeap(2000, 1, 1 + i // 4, 6 * (i % 4)) for i in range(n_times)]
+        return xr.Dataset(
+            {'tas': (('time', 'lat', 'lon'), self.counter.to_dask((4, 2, 2)), {'units': units})},
+            coords={'time': ('time', times, {'axis': 'T', 'standard_name': 'time'}),
+                    'lat': ('lat', [-45., 45.], {'axis': 'Y', 'standard_name': 'latitude',
+                                                 'units': 'degrees_north'}),
+                    'lon': ('lon', [0., 90., 180., 270.], {'axis': 'X', 'standard_name': 'longitude',
+                                                           'units': 'degrees_east'})}
+        )
+
+    def test_percent_conversion(self):
+        func = preprocessor.PercentConversionFunction
+        translation = types.SimpleNamespace(name='tas', units='%')
+        values = np.full((8, 2, 4), 50., dtype=np.float32)
+        ds = func.execute(func, get_test_var(units='0-1', translation=translation), self.get_ds(values))
+        self.assertEqual(self.counter.n_read, 0)
+        self.assertEqual(ds['tas'].attrs['units'], '0-1')
+        self.assertEqual(ds['tas'].dtype, np.float32)
+        np.testing.assert_array_equal(ds['tas'].values, values / 100)
+        # values already in [0, 1] aren't rescaled
+        translation.units = '%'
+        ds = func.execute(func, get_test_var(units='0-1', translation=translation),
+                          self.get_ds(values / 100))
+        self.assertEqual(self.counter.n_read, 0)
+        np.testing.assert_array_equal(ds['tas'].values, values / 100)
+        translation.units = '0-1'
+        ds = func.execute(func, get_test_var(units='%', translation=translation), self.get_ds(values))
+        self.assertEqual(self.counter.n_read, 0)
+        np.testing.assert_array_equal(ds['tas'].values, values * 100)
+
+    def test_convert_units(self):
+        values = np.full((8, 2, 4), 100000., dtype=np.float32)
+        ds = units.convert_dataarray(self.get_ds(values, units='Pa'), 'tas', dest_unit='hPa')
+        self.assertEqual(self.counter.n_read, 0)
+        np.testing.assert_allclose(ds['tas'].values, 1000.)
+
+    def test_subset_functions(self):
+        values = np.arange(8 * 2 * 4, dtype=np.float32).reshape(8, 2, 4)
+        ds = self.get_ds(values)
+        var = get_resample_test_var()
+        var.X = types.SimpleNamespace(name='lon', range=(0., 90.))
+        var.Y = types.SimpleNamespace(name='lat', range=(0., 90.))
+        for func in (preprocessor.ExtractLevelFunction, preprocessor.ExtractRegionFunction,
+                     preprocessor.ResampleFunction):
+            ds = func.select_on_read(func, var, ds)
+            if func is not preprocessor.ExtractLevelFunction:
+                ds = func.execute(func, var, ds)
+        self.assertEqual(self.counter.n_read, 0)
+        np.testing.assert_array_equal(ds['tas'].values,
+                                      values[:, 1:, :2].reshape(2, 4, 1, 2).mean(axis=1))
+        # only the region is read
+        self.assertEqual(self.counter.n_read, 8 * 2)
+
+
+class TestAffineTransform(unittest.TestCase):
+    def get_ds(self, values):
+        return xr.Dataset({'tas': (('time', 'lat', 'lon'), dask.array.from_array(values, chunks=(4, 2, 2)),
+                                   {'units': '0-1', 'scale_factor': 2., 'add_offset': 1.})})
+
+    def test_compose(self):
+        values = np.arange(8, dtype=np.float32)
+        transform = preprocessor.AffineTransform().then(2., 1.).then(3., -1.)
+        self.assertEqual(transform, preprocessor.AffineTransform(6., 2.))
+        da = transform.apply(xr.DataArray(values))
+        self.assertEqual(da.dtype, np.float32)
+        np.testing.assert_array_equal(da.values, 3. * (2. * values + 1.) - 1.)
+        self.assertTrue(preprocessor.AffineTransform().then(1., 0.).is_identity)
+
+    def test_fused_functions(self):
+        values = np.arange(8 * 2 * 4, dtype=np.float32).reshape(8, 2, 4)
+        funcs = [preprocessor.ApplyScaleAndOffsetFunction, preprocessor.PercentConversionFunction]
+        translation = types.SimpleNamespace(name='tas', units='0-1')
+        # applying the functions one at a time
+        ds = self.get_ds(values)
+        for func in funcs:
+            ds = func.execute(func, get_test_var(units='%', translation=translation), ds)
+        expected = ds['tas'].values
+        np.testing.assert_allclose(expected, 100. * (2. * values + 1.))
+        # applying them as a single operation
+        pp = get_test_preprocessor()
+        pp.file_preproc_functions = funcs
+        ds = pp.execute_pp_functions(get_test_var(units='%', translation=translation),
+                                     self.get_ds(values))
+        self.assertEqual(ds['tas'].attrs, {'units': '%'})
+        self.assertEqual(len(ds['tas'].data.dask.layers), 2)
+        np.testing.assert_allclose(ds['tas'].values, expected)
+
+
+@unittest.skipUnless(_RUN_BENCHMARKS, "set MDTF_BENCHMARK=1 to run benchmarks")
+class BenchmarkPreprocessWorkers(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_scaling(self):
+        # open, decode and reduce each of 16 variables read from its own netCDF file, taking
+        # the netCDF lock around opening the file as open_var_assets does
+        n_vars = 16
+        time_coord = util.NameSpace.fromDict({'name': 'time'})
+        paths = []
+        for i in range(n_vars):
+            paths.append(os.path.join(self.tmp_dir, f'var{i}.nc'))
+            get_time_chunks(1, n_times=20 * 365, n_lat=32, n_lon=64)[0].to_netcdf(paths[-1])
+
+        def _task(path):
+            with preprocessor._netcdf_file_lock:
+                ds = xr.open_dataset(path, decode_times=False, chunks={'time': 365})
+            ds = pp.decode_time_coord(ds, time_coord)
+            return ds['tas'].mean('time').compute()
+
+        timings = dict()
+        for n_workers in (1, 2, 4, 8):
+            pp = get_test_preprocessor(preprocess_workers=n_workers, per_variable_datasets=True)
+            start = time.perf_counter()
+            pp.run_var_tasks(_task, [(p,) for p in paths])
+            timings[n_workers] = time.perf_counter() - start
+            print(f"preprocess_workers = {n_workers}: {n_vars} variables in {timings[n_workers]:.3f} s")
+        # Reading the data dominates, and isn't sped up by preprocess_workers (see the
+        # option's documentation), so this only checks that extra workers don't cost time.
+        self.assertLess(timings[4], 1.2 * timings[1])
+
+
+@unittest.skipUnless(_RUN_BENCHMARKS, "set MDTF_BENCHMARK=1 to run benchmarks")
+class BenchmarkOutputEncoding(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_throughput(self):
+        # one year of smooth daily float64 data on a 1-degree grid, like a model field
+        n_times, n_lat, n_lon = 365, 180, 360
+        t, y, x = np.meshgrid(np.arange(n_times), np.linspace(-1., 1., n_lat), np.linspace(0., 2 * np.pi, n_lon),
+                              indexing='ij')
+        ds = get_time_chunks(1, n_times=n_times, n_lat=n_lat, n_lon=n_lon)[0]
+        ds['tas'] = (('time', 'lat', 'lon'), 250. + 30. * np.cos(y) + 5. * np.sin(x + t / 58.))
+        for c in ('lat', 'lon'):
+            ds[c].attrs['standard_name'] = c
+        policies = {
+            'default': {},
+            'float32': {'dtype': 'float32'},
+            'float32 zlib': {'dtype': 'float32', 'complevel': 1, 'shuffle': True,
+                             'chunks': {'T': 30}, 'unlimited_time': False},
+            'float32 zlib lsd=2': {'dtype': 'float32', 'complevel': 1, 'shuffle': True,
+                                   'least_significant_digit': 2, 'chunks': {'T': 30},
+                                   'unlimited_time': False}
+        }
+        sizes = dict()
+        for label, policy in policies.items():
+            pp = get_test_preprocessor(output_encoding=policy)
+            var = get_output_test_var(os.path.join(self.tmp_dir, 'tas.nc'))
+            start = time.perf_counter()
+            dask.compute(pp.write_dataset(var, ds.chunk({'time': 73})))
+            write_time = time.perf_counter() - start
+            start = time.perf_counter()
+            with xr.open_dataset(var.dest_path) as out_ds:
+                out_ds['tas'].load()
+            read_time = time.perf_counter() - start
+            sizes[label] = os.path.getsize(var.dest_path) / 1024 ** 2
+            print(f"output_encoding {label}: {sizes[label]:.1f} MB, "
+                  f"write {sizes['default'] / write_time:.0f} MB/s, read {sizes['default'] / read_time:.0f} MB/s "
+                  f"(of uncompressed float64 data)")
+        self.assertLess(sizes['float32'], 0.6 * sizes['default'])
+        self.assertLess(sizes['float32 zlib lsd=2'], sizes['float32'])
+
+
+@unittest.skipUnless(_RUN_BENCHMARKS, "set MDTF_BENCHMARK=1 to run benchmarks")
+class BenchmarkConcatTimeChunks(unittest.TestCase):
+    def test_linear_scaling(self):
+        pp = get_test_preprocessor()
+        timings = dict()
+        for n_files in (50, 100, 200, 400):
+            ds_list = get_time_chunks(n_files)
+            start = time.perf_counter()
+            pp.concat_time_chunks(ds_list, 'time')
+            timings[n_files] = time.perf_counter() - start
+            print(f"concat_time_chunks: {n_files} files in {timings[n_files]:.3f} s")
+        # 8x the files should take well under the 64x of quadratic scaling
+        self.assertLess(timings[400] / timings[50], 20.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -183,6 +183,44 @@ class TestVariableTranslatorFiles(unittest.TestCase):
                                                 'atmos'), "rlut")
 
 
+class TestFieldlistIndex(unittest.TestCase):
+    def get_fieldlist(self):
+        return translation.Fieldlist.from_struct({
+            'name': 'not_CF', 'coords': dict(TestVariableTranslator._dummy_coords_d),
+            'variables': {
+                'ua': {"standard_name": "eastward_wind", "realm": "atmos", "units": "m s-1", "ndim": 4},
+                'ua500': {"standard_name": "eastward_wind", "realm": "atmos", "units": "m s-1", "ndim": 3},
+                'PRECT': {"standard_name": "precipitation_rate", "realm": "atmos", "units": "m s-1",
+                          "ndim": 3, "long_name": "total precipitation"},
+                'tas': {"standard_name": "air_temperature", "realm": "atmos", "units": "K", "ndim": 3,
+                        "alternate_standard_names": ["surface_temperature"]}
+            }
+        }, "")
+
+    def test_from_CF(self):
+        fl = self.get_fieldlist()
+        entries = fl.from_CF('eastward_wind', 'atmos', long_name='wind')
+        self.assertEqual(list(entries), ['ua', 'ua500'])
+        self.assertEqual(entries['ua']['name'], 'ua')
+        self.assertEqual(entries['ua']['long_name'], 'wind')
+        self.assertEqual(list(fl.from_CF_name('eastward_wind', 'atmos', ndim=4)), ['ua'])
+        self.assertEqual(fl.from_CF('air_temperature', 'ocean'), dict())
+        # entries are read-only views of the lookup table
+        entry = fl.from_CF('precipitation_rate', 'atmos', long_name='other')['PRECT']
+        self.assertEqual(entry['long_name'], 'total precipitation')
+        with self.assertRaises(TypeError):
+            entry['units'] = 'mm day-1'
+        self.assertNotIn('name', fl.lut['ua'])
+        self.assertEqual(fl.lut['ua']['long_name'], '')
+
+    def test_to_CF_standard_name(self):
+        fl = self.get_fieldlist()
+        self.assertEqual(fl.to_CF_standard_name('eastward_wind', '', 'atmos', ''), 'ua')
+        self.assertEqual(fl.to_CF_standard_name('precipitation_flux', '', 'atmos', ''), 'PRECT')
+        self.assertIsNone(fl.to_CF_standard_name('eastward_wind', '', 'ocean', ''))
+        self.assertEqual(fl.index.first(fl.index.by_alternate_name['surface_temperature']), 'tas')
+
+
 class TestPathManager(unittest.TestCase):
     def setUp(self):
         # set up translation dictionary without calls to filesystem
@@ -13,6 +13,15 @@ class TestUnitConversionFactor(unittest.TestCase):
         self.assertAlmostEqual(units.conversion_factor('cm', 'inch'), 1.0 / 2.54)
         self.assertAlmostEqual(units.conversion_factor((123, 'inch'), 'cm'), 123.0 * 2.54)
 
+    def test_conversion_affine(self):
+        self.assertEqual(units.conversion_affine('0-1', '0-1'), (1.0, 0.0))
+        scale, offset = units.conversion_affine('hPa', 'Pa')
+        self.assertAlmostEqual(scale, 100.0)
+        self.assertAlmostEqual(offset, 0.0)
+        scale, offset = units.conversion_affine('K', 'degC')
+        self.assertAlmostEqual(scale, 1.0)
+        self.assertAlmostEqual(offset, -273.15)
+
 
 class TestRefTime(unittest.TestCase):
     def get_test_date_strings(self, unit=None, time=None):
@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+import numpy as np
+import xarray as xr
+import cf_xarray
+from src import xr_parser
+
+
+def get_test_ds(n_vars):
+    coords = {
+        'time': ('time', np.arange(3.), {'axis': 'T', 'standard_name': 'time'}),
+        'plev': ('plev', [50000.], {'axis': 'Z', 'standard_name': 'air_pressure', 'units': 'Pa'}),
+        'lat': ('lat', [-45., 45.], {'axis': 'Y', 'standard_name': 'latitude', 'units': 'degrees_north'}),
+        'lon': ('lon', [0., 180.], {'axis': 'X', 'standard_name': 'longitude', 'units': 'degrees_east'})
+    }
+    data_vars = {f'var{i}': (('time', 'plev', 'lat', 'lon'), np.zeros((3, 1, 2, 2)), {'units': 'K'})
+                 for i in range(n_vars)}
+    return xr.Dataset(data_vars, coords=coords)
+
+
+class TestAxesCache(unittest.TestCase):
+    def setUp(self):
+        xr_parser._axes_cache.clear()
+
+    def parse_vars(self, ds):
+        # axis lookups made for each variable by the parser and preprocessor functions
+        ds.cf.axes_values()
+        for var_name in ds.data_vars:
+            ds.cf.dim_axes(var_name)
+            ds.cf.get_scalar('Z', var_name)
+            ds[var_name].cf.dim_axes()
+            ds[var_name].cf.axes()
+            ds[var_name].cf.is_static
+
+    def count_calls(self, ds):
+        calls = []
+        get_axis_coord = cf_xarray.accessor._get_axis_coord
+
+        def _counting_get_axis_coord(obj, key):
+            # not a Mock, since cf_xarray treats iterable mappers as sequences
+            calls.append(key)
+            return get_axis_coord(obj, key)
+
+        with mock.patch.object(cf_xarray.accessor, '_get_axis_coord', _counting_get_axis_coord):
+            self.parse_vars(ds)
+        return len(calls)
+
+    def test_fewer_calls(self):
+        ds = get_test_ds(40)
+        with mock.patch.object(xr_parser._axes_cache, 'get', return_value=None):
+            n_uncached = self.count_calls(ds)
+        xr_parser._axes_cache.clear()
+        n_cached = self.count_calls(ds)
+        # one resolution for the Dataset, one for each of its variables and one
+        # shared by all DataArrays with the same coordinates
+        n_axes = len(cf_xarray.accessor._AXIS_NAMES)
+        self.assertEqual(n_cached, n_axes * (1 + 40 + 1))
+        self.assertLess(n_cached, n_uncached / 3)
+        self.assertEqual(self.count_calls(ds), 0)
+
+    def test_results(self):
+        ds = get_test_ds(2)
+        for _ in range(2):
+            self.assertEqual(ds.cf._old_axes_dict('var0'),
+                             {'T': ['time'], 'Z': ['plev'], 'Y': ['lat'], 'X': ['lon']})
+            self.assertEqual(ds['var0'].cf.axes(), {'T': 'time', 'Z': 'plev', 'Y': 'lat', 'X': 'lon'})
+        # returned values can be modified without changing the cache
+        ds.cf._old_axes_dict('var0')['T'].append('x')
+        self.assertEqual(ds.cf._old_axes_dict('var0')['T'], ['time'])
+
+    def test_invalidation(self):
+        ds = get_test_ds(2)
+        self.assertEqual(ds['var0'].cf.axes()['Z'], 'plev')
+        ds['plev'].attrs['axis'] = 'T'
+        ds['plev'].attrs['standard_name'] = 'time'
+        self.assertNotIn('Z', ds['var0'].cf.axes())
+        ds = ds.rename({'lat': 'y'})
+        self.assertEqual(ds.cf.dim_axes('var0')['Y'][0].name, 'y')
+
+
+if __name__ == '__main__':
+    unittest.main()
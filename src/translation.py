@@ -7,6 +7,7 @@ import dataclasses as dc
 import glob
 import typing
 import pathlib
+import types
 from src import util, data_model, units
 from src.units import Units
 
@@ -41,6 +42,7 @@ class TranslatedVarlistEntry(data_model.DMVariable):
         dc.field(init=False, default_factory=list, metadata={'query': True})
     log: typing.Any = util.MANDATORY  # assigned from parent var
     _requires_level_extraction = None
+    _requires_resampling = None
 
     @property
     def requires_level_extraction(self) -> bool:
@@ -50,12 +52,60 @@ class TranslatedVarlistEntry(data_model.DMVariable):
     def requires_level_extraction(self, value: bool):
         self._requires_level_extraction = value
 
+    @property
+    def requires_resampling(self) -> bool:
+        return self._requires_resampling
+
+    @requires_resampling.setter
+    def requires_resampling(self, value: bool):
+        self._requires_resampling = value
+
+
+class FieldlistIndex:
+    """Lookup indexes for the entries of a :class:`Fieldlist` lookup table,
+    built once when the Fieldlist is read, so that translating a variable
+    doesn't scan the whole table. Each index maps a key to a tuple of entry
+    names, in the order the entries appear in the table.
+    """
+
+    def __init__(self, lut: dict):
+        by_key = collections.defaultdict(list)
+        by_standard_name = collections.defaultdict(list)
+        by_alternate_name = collections.defaultdict(list)
+        by_ndim = collections.defaultdict(set)
+        self.position = dict()
+        for i, (k, v) in enumerate(lut.items()):
+            self.position[k] = i
+            by_key[(v.get('standard_name'), v.get('realm'), v.get('modifier'))].append(k)
+            by_standard_name[v.get('standard_name')].append(k)
+            for alt_name in v.get('alternate_standard_names', []):
+                by_alternate_name[alt_name].append(k)
+            by_ndim[v.get('ndim')].add(k)
+        self.by_key = {k: tuple(v) for k, v in by_key.items()}
+        """(standard_name, realm, modifier) -> names of entries."""
+        self.by_standard_name = {k: tuple(v) for k, v in by_standard_name.items()}
+        """standard_name -> names of entries."""
+        self.by_alternate_name = {k: tuple(v) for k, v in by_alternate_name.items()}
+        """Entry of alternate_standard_names -> names of entries."""
+        self.by_ndim = {k: frozenset(v) for k, v in by_ndim.items()}
+        """ndim -> names of entries."""
+
+    def first(self, names):
+        """Return the name in *names* of the entry that comes first in the
+        table, or None if *names* is empty.
+        """
+        return min(names, key=self.position.__getitem__, default=None)
+
 
 @util.mdtf_dataclass
 class Fieldlist:
     """Class corresponding to a single variable naming convention (single file
     in data/fieldlist_*.jsonc).
 
+    Entries of the lookup table are found through a :class:`FieldlistIndex`;
+    :meth:`from_CF` returns read-only views of the entries, which are shared
+    by all callers.
+
     TODO: implement more robust indexing/lookup scheme. standard_name is not
     a unique identifier, but should include cell_methods, etc. as well as
     dimensionality.
@@ -67,6 +117,7 @@ class Fieldlist:
     lut: util.WormDict = dc.field(default_factory=util.WormDict)
     env_vars: dict = dc.field(default_factory=dict)
     scalar_coord_templates: dict = dc.field(default_factory=dict)
+    index: FieldlistIndex = dc.field(default=None, compare=False)
 
     @classmethod
     def from_struct(cls, d: dict, code_root: str, log=None):
@@ -127,6 +178,7 @@ class Fieldlist:
         d['lut_standard_names'] = []
         for sn in d['lut'].values():
             d['lut_standard_names'].append(sn['standard_name'])
+        d['index'] = FieldlistIndex(d['lut'])
         return cls(**d)
 
     def to_CF(self, var_or_name) -> util.WormDict:
@@ -153,17 +205,13 @@ class Fieldlist:
         # search the lookup table for the variable with the specified standard_name
         # realm, modifier, and long_name attributes
 
-        for var_name, var_dict in self.lut.items():
-            if var_dict['standard_name'] == standard_name \
-                    and var_dict['realm'] == realm\
-                    and var_dict['modifier'] == modifier:
-                # if not var_dict['long_name'] or var_dict['long_name'].lower() == long_name.lower():
-                return var_name
-            else:
-                if var_dict['standard_name'] in precip_vars and standard_name in precip_vars:
-                    return var_name
-                else:
-                    continue
+        # return the first entry with the specified standard_name, realm and
+        # modifier attributes, or any precipitation entry for precipitation
+        names = list(self.index.by_key.get((standard_name, realm, modifier), ())[:1])
+        if standard_name in precip_vars:
+            for sn in precip_vars:
+                names.extend(self.index.by_standard_name.get(sn, ())[:1])
+        return self.index.first(names)
 
     def from_CF(self,
                 standard_name: str,
@@ -172,9 +220,11 @@ class Fieldlist:
                 long_name: str = "",
                 num_dims: int = 0,
                 has_scalar_coords_att: bool = False,
-                name_only: bool = False) -> dict:
+                name_only: bool = False,
+                ndim: int = None) -> dict:
         """Look up Fieldlist lookup table entries corresponding to the given standard
-        name, optionally providing a modifier to resolve ambiguity.
+        name, optionally providing a modifier to resolve ambiguity. Entries are
+        returned as read-only views, with the ``name`` of the entry added.
 
         TODO: expand with more ways to uniquely identify variable (eg cell methods).
         Args:
@@ -188,30 +238,34 @@ class Fieldlist:
             attribute, and therefore requires a level from a 4-D field
             name_only: boolean indicating to not return a modifier--hacky way to accommodate
             a from_CF_name call that does not provide other metadata
+            ndim: (optional) only return entries with this number of dimensions
         """
         # self.lut corresponds to POD convention
-        assert standard_name in self.lut_standard_names, f'{standard_name} not found in Fieldlist lut_standard_names'
-        lut1 = dict()
-        for k, v in self.lut.items():
-            if v['standard_name'] == standard_name and v['realm'] == realm and v['modifier'] == modifier:
-                if 'long_name' not in v or v['long_name'].strip('') == '':
-                    v['long_name'] = long_name
-                v['name'] = k
-                lut1.update({k: v})
-
-        entries = tuple(lut1.values())
-        if len(entries) > 1:
+        assert standard_name in self.index.by_standard_name, \
+            f'{standard_name} not found in Fieldlist lut_standard_names'
+        names = self.index.by_key.get((standard_name, realm, modifier), ())
+        if ndim is not None:
+            names = tuple(k for k in names if k in self.index.by_ndim.get(ndim, ()))
+        if len(names) > 1:
             _log.error(f'Found multiple entries in {self.name} Fieldlist for {standard_name}')
-        fl_entries = dict()
-        for e in entries:
-            fl_entries.update({e['name']: copy.deepcopy(e)})
-        return fl_entries
+        return {k: self.entry_view(k, long_name=long_name) for k in names}
+
+    def entry_view(self, name: str, long_name: str = "") -> types.MappingProxyType:
+        """Return a read-only view of the lookup table entry *name*, with its
+        ``name`` added and, if the entry doesn't define one, *long_name*.
+        """
+        entry = self.lut[name]
+        extra = {'name': name}
+        if entry.get('long_name', '') == '':
+            extra['long_name'] = long_name
+        return types.MappingProxyType(collections.ChainMap(extra, entry))
 
     def from_CF_name(self,
                      var_or_name: str,
                      realm: str,
                      long_name: str = "",
-                     modifier: str = "") -> dict:
+                     modifier: str = "",
+                     ndim: int = None) -> dict:
         """Like :meth:`from_CF`, but only return the variable's name in this
         convention.
 
@@ -221,13 +275,15 @@ class Fieldlist:
             long_name: str (optional): long_name attribute of the variable
             modifier:optional string to distinguish a 3-D field from a 4-D field with
             the same var_or_name value
+            ndim: (optional) only return entries with this number of dimensions
         """
 
         return self.from_CF(var_or_name,
                             modifier=modifier,
                             long_name=long_name,
                             name_only=True,
-                            realm=realm)
+                            realm=realm,
+                            ndim=ndim)
 
     def get_variable_long_name(self, var, has_scalar_coords: bool) -> str:
         if not var.long_name and has_scalar_coords:
@@ -489,14 +545,17 @@ class NoTranslationFieldlist:
         fieldlist_obj = VariableTranslator().get_convention(data_convention)
         fieldlist_entry = dict()
         var_id = ""
-        for variable_id, variable_id_dict in fieldlist_obj.lut.items():
-            if variable_id_dict.get('standard_name', None) == var.standard_name \
-                or var.standard_name in variable_id_dict.get('alternate_standard_names'):
-                    if variable_id_dict.get('realm', None) == var.realm \
-                        and variable_id_dict.get('units', None) == var.units.units:
-                            fieldlist_entry = variable_id_dict
-                            var_id = variable_id
-                    break
+        # first entry with the standard_name, or with it as an alternate
+        variable_id = fieldlist_obj.index.first(
+            fieldlist_obj.index.by_standard_name.get(var.standard_name, ())[:1]
+            + fieldlist_obj.index.by_alternate_name.get(var.standard_name, ())[:1]
+        )
+        if variable_id is not None:
+            variable_id_dict = fieldlist_obj.lut[variable_id]
+            if variable_id_dict.get('realm', None) == var.realm \
+                    and variable_id_dict.get('units', None) == var.units.units:
+                fieldlist_entry = variable_id_dict
+                var_id = variable_id
         if len(fieldlist_entry.keys()) < 1:
             var.log.error(f'No {data_convention} fieldlist entry found for variable {var.name}')
             return None
@@ -514,6 +573,11 @@ class NoTranslationFieldlist:
         )
 
 
+# modules defining the objects kept in the Fieldlist cache; cached objects are
+# rebuilt if these change
+_fieldlist_code_paths = (__file__, data_model.__file__, util.basic.__file__)
+
+
 class VariableTranslator(metaclass=util.Singleton):
     """The use of class:`~util.Singleton` means that the VariableTranslator is not a
     base class. Instead, it is a metaclass that needs to be created only once (done
@@ -535,13 +599,25 @@ class VariableTranslator(metaclass=util.Singleton):
 
     def add_convention(self, d: dict, file_path: str, log=None):
         conv_name = d['name'].lower()
+        models = d.pop('models', [])
+        self.add_fieldlist(conv_name, models, Fieldlist.from_struct(d, file_path, log=log))
+
+    def add_fieldlist(self, conv_name: str, models: list, fieldlist: Fieldlist):
+        """Register the :class:`Fieldlist` *fieldlist* under *conv_name* and the
+        aliases in *models*.
+        """
         _log.debug("Adding variable name convention '%s'", conv_name)
-        for model in d.pop('models', []):
+        for model in models:
             self.aliases[model] = conv_name
-        self.conventions[conv_name] = Fieldlist.from_struct(d, file_path, log=log)
-
-    def read_conventions(self, code_root: str, unittest=False):
-        """ Read in the conventions from the Fieldlists and populate the convention attribute. """
+        self.conventions[conv_name] = fieldlist
+
+    def read_conventions(self, code_root: str, unittest=False, cache_dir: str = ""):
+        """ Read in the conventions from the Fieldlists and populate the convention attribute.
+        If *cache_dir* is given, the Fieldlist objects built from each file are
+        kept in a :class:`~src.util.cache.CompiledCache` there, and reused by
+        later runs until the file, the coordinate file it refers to, or the code
+        defining Fieldlists changes.
+        """
         if unittest:
             # value not used, when we're testing will mock out call to read_json
             # below with actual translation table to use for test
@@ -551,10 +627,21 @@ class VariableTranslator(metaclass=util.Singleton):
                 code_root, 'data', 'fieldlist_*.jsonc'
             )
             config_files = glob.glob(glob_pattern)
+        cache = util.CompiledCache(cache_dir, log=_log) if cache_dir else None
         for f in config_files:
             try:
-                d = util.read_json(f, log=_log)
-                self.add_convention(d, code_root, log=_log)
+                entry = cache.get('fieldlist', [f]) if cache is not None else None
+                if entry is None:
+                    d = util.read_json(f, log=_log)
+                    source_paths = [f] + list(_fieldlist_code_paths)
+                    ref_file = d.get('coords', dict()).get('$ref', None)
+                    if ref_file:
+                        source_paths.append(os.path.join(code_root, 'data', ref_file))
+                    entry = (d['name'].lower(), d.pop('models', []),
+                             Fieldlist.from_struct(d, code_root, log=_log))
+                    if cache is not None:
+                        cache.put('fieldlist', [f], entry, source_paths=source_paths)
+                self.add_fieldlist(*entry)
             except Exception as exc:
                 _log.exception("Caught exception loading fieldlist file %s: %r",
                                f, exc)
@@ -620,9 +707,12 @@ class VariableTranslator(metaclass=util.Singleton):
                                       name_only,
                                       modifier=modifier)
 
-    def from_CF_name(self, conv_name: str, standard_name: str, realm: str, modifier=None):
+    def from_CF_name(self, conv_name: str, standard_name: str, realm: str, modifier=None, ndim=None):
+        kwargs = {'modifier': modifier}
+        if ndim is not None:
+            kwargs['ndim'] = ndim
         return self._fieldlist_method(conv_name, 'from_CF_name',
-                                      standard_name, realm, modifier=modifier)
+                                      standard_name, realm, **kwargs)
 
     def to_CF_standard_name(self, conv_name: str, standard_name: str, realm: str, modifier=None):
         return self._fieldlist_method(conv_name, 'to_CF_standard_name',
@@ -4,9 +4,14 @@
 import cfunits
 import re
 import logging
+import threading
 
 _log = logging.getLogger(__name__)
 
+# The UDUnits-2 parser called by cfunits isn't reentrant, so unit strings are
+# parsed one at a time when variables are preprocessed in worker threads.
+_udunits_parse_lock = threading.RLock()
+
 
 class Units(cfunits.Units):
     """Wrap `Units <https://ncas-cms.github.io/cfunits/cfunits.Units.html>`__
@@ -14,6 +19,10 @@ class Units(cfunits.Units):
     third-party dependency to the code in this module.
     """
 
+    def __init__(self, *args, **kwargs):
+        with _udunits_parse_lock:
+            super().__init__(*args, **kwargs)
+
     def reftime_base_eq(self, other):
         """Comparison function that recognizes reference time units (e.g.,
         'days since 1970-01-01') as being equal to unqualified time units
@@ -141,6 +150,23 @@ def conversion_factor(source_unit, dest_unit):
     return Units.conform(1.0, source_unit, dest_unit)
 
 
+def conversion_affine(source_unit, dest_unit):
+    """Return the (scale, offset) floats of the affine transformation which
+    implements a given unit conversion, defined so that (scale) * (quantity in
+    *source_units*) + (offset) = (quantity in *dest_units*). Unlike
+    :func:`conversion_factor`, this handles conversions between units with
+    different zero points (e.g., 'K' and 'degC').
+
+    *source_unit*, *dest_unit* are coerced to :class:`Units` objects via
+    :func:`to_cfunits`.
+    """
+    if str(source_unit) == str(dest_unit):
+        return 1.0, 0.0
+    source_unit, dest_unit = to_equivalent_units(source_unit, dest_unit)
+    offset = Units.conform(0.0, source_unit, dest_unit)
+    return Units.conform(1.0, source_unit, dest_unit) - offset, offset
+
+
 # --------------------------------------------------------------------
 
 def convert_scalar_coord(coord, dest_units: str, log=_log):
@@ -164,28 +190,16 @@ def convert_scalar_coord(coord, dest_units: str, log=_log):
     return dest_value
 
 
-def convert_dataarray(ds, da_name: str, src_unit=None, dest_unit=None, log=_log):
-    """Wrapper for cfunits `conform()
-    <https://ncas-cms.github.io/cfunits/generated/cfunits.Units.conform.html#cfunits.Units.conform>`__
-    that does unit conversion in-place on a member of an xarray Dataset,
-    updating its units attribute.
-
-    Args:
-        ds (Dataset): xarray Dataset containing the DataArray to convert.
-        da_name (str): variable name or standard_name of the associated DataArray to do the unit conversion on.
-        src_unit: Current units of *da_name*. Coerced to a :class:`Units` object
-            via :func:`to_cfunits`. Optional; if not given this is populated from
-            the ``units`` attribute of *da_name*, if it exists.
-        dest_unit: Desired units for *da_name*. Coerced to a :class:`Units` object
-            via :func:`to_cfunits`.
-
-    Raises:
-        ValueError: if *da_name* not in *ds*.
-        TypeError: if *src_unit* or *dest_unit* not correctly defined, or if
-            *da_name* lacks units metadata.
+def plan_dataarray_conversion(ds, da_name: str, src_unit=None, dest_unit=None, log=_log):
+    """Update the metadata of a member of an xarray Dataset for a unit
+    conversion, without changing its values: the ``units`` attribute is set to
+    *dest_unit* and the coefficients of the conversion are returned, so the
+    caller can apply it (possibly fused with other elementwise operations.)
+    Arguments and exceptions are the same as for :func:`convert_dataarray`.
 
     Returns:
-        Dataset *ds*, with *da_name* modified in-place.
+        Tuple of the name of the DataArray in *ds* (None if it wasn't found),
+        and the scale and offset returned by :func:`conversion_affine`.
     """
     da = ds.get(da_name, None)
 
@@ -208,7 +222,7 @@ def convert_dataarray(ds, da_name: str, src_unit=None, dest_unit=None, log=_log)
     if da is None:
         log.warning(f"units.convert_dataarray: standard_name attribute '{da_name}' not found in dataset. "
                     f"Skipping the unit conversion for the variable/coordinate associated with {da_name}")
-        return ds
+        return None, 1.0, 0.0
     if src_unit is None:
         try:
             src_unit = da.attrs['units']
@@ -236,14 +250,48 @@ def convert_dataarray(ds, da_name: str, src_unit=None, dest_unit=None, log=_log)
     if units_equal(src_unit, dest_unit):
         log.debug(("Source, dest units of '%s'%s identical (%s); no conversion "
                    "done."), da.name, std_name, dest_unit)
-        return ds
+        return da_name, 1.0, 0.0
 
     log.debug("Convert units of '%s'%s from '%s' to '%s'.",
               da.name, std_name, src_unit, dest_unit
               )
-    da_attrs = da.attrs.copy()
-    fac = conversion_factor(src_unit, dest_unit)
-    ds = ds.assign({da_name: fac * ds[da_name]})
-    ds[da_name].attrs = da_attrs
+    scale, offset = conversion_affine(src_unit, dest_unit)
     ds[da_name].attrs['units'] = str(dest_unit)
+    return da_name, scale, offset
+
+
+def convert_dataarray(ds, da_name: str, src_unit=None, dest_unit=None, log=_log):
+    """Wrapper for cfunits `conform()
+    <https://ncas-cms.github.io/cfunits/generated/cfunits.Units.conform.html#cfunits.Units.conform>`__
+    that does unit conversion in-place on a member of an xarray Dataset,
+    updating its units attribute.
+
+    Args:
+        ds (Dataset): xarray Dataset containing the DataArray to convert.
+        da_name (str): variable name or standard_name of the associated DataArray to do the unit conversion on.
+        src_unit: Current units of *da_name*. Coerced to a :class:`Units` object
+            via :func:`to_cfunits`. Optional; if not given this is populated from
+            the ``units`` attribute of *da_name*, if it exists.
+        dest_unit: Desired units for *da_name*. Coerced to a :class:`Units` object
+            via :func:`to_cfunits`.
+
+    Raises:
+        ValueError: if *da_name* not in *ds*.
+        TypeError: if *src_unit* or *dest_unit* not correctly defined, or if
+            *da_name* lacks units metadata.
+
+    Returns:
+        Dataset *ds*, with *da_name* modified in-place.
+    """
+    da_name, scale, offset = plan_dataarray_conversion(
+        ds, da_name, src_unit=src_unit, dest_unit=dest_unit, log=log
+    )
+    if da_name is None or (scale == 1.0 and offset == 0.0):
+        return ds
+    da_attrs = ds[da_name].attrs.copy()
+    converted = scale * ds[da_name]
+    if offset != 0.0:
+        converted = converted + offset
+    ds = ds.assign({da_name: converted})
+    ds[da_name].attrs = da_attrs
     return ds
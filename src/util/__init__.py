@@ -30,7 +30,7 @@ from .datelabel import (
 
 from .filesystem import (
     abbreviate_path, resolve_path, recursive_copy, _DoubleBraceTemplate,
-    check_executable, find_files, check_dir, bump_version,
+    check_executable, find_files, check_dir, path_size, remove_path, bump_version,
     append_html_template, TempDirManager
 )
 
@@ -46,3 +46,5 @@ from .path_utils import (
 )
 
 from .catalog import *
+
+from .cache import *
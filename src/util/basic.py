@@ -179,6 +179,12 @@ class WormDict(collections.UserDict, dict):
         raise exceptions.WormKeyError(("Attempting to delete entry for "
                                        f"'{key}'. Existing value: '{self[key]}'."))
 
+    def __reduce__(self):
+        # entries are restored through __init__, since unpickling as a dict
+        # subclass would call __setitem__ before self.data exists
+        state = {k: v for k, v in self.__dict__.items() if k != 'data'}
+        return self.__class__, (dict(self.data),), (state or None)
+
     @classmethod
     def from_struct(cls, d):
         """Construct a WormDict from a dict *d*. Intended to be used for automatic
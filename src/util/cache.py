@@ -0,0 +1,298 @@
+"""Content-addressed cache of preprocessed data files, so that runs with the same
+inputs and preprocessing settings can reuse the output of a previous run instead
+of redoing the work.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import stat
+import sys
+import uuid
+import logging
+from .filesystem import path_size, remove_path
+from .json_utils import read_json
+
+_log = logging.getLogger(__name__)
+
+__all__ = ['file_signature', 'file_hash', 'hash_key', 'PPDataCache', 'CompiledCache',
+           'read_json_cached']
+
+
+def file_signature(path: str) -> list:
+    """Return [absolute path, size in bytes, modification time in ns] of the
+    file *path*, which identifies a version of the file without reading it.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+def file_hash(path: str) -> str:
+    """Return a hex SHA-256 digest of the contents of the file *path*."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hash_key(obj) -> str:
+    """Return a hex SHA-256 digest of the JSON-serializable object *obj*; dict
+    keys are sorted so the digest doesn't depend on insertion order.
+    """
+    s = json.dumps(obj, sort_keys=True, default=str)
+    return hashlib.sha256(s.encode('utf-8')).hexdigest()
+
+
+def _make_read_only(path: str):
+    """Remove write permission from the file *path*, or from all files in the
+    directory tree *path*.
+    """
+    mode = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+    if os.path.isdir(path) and not os.path.islink(path):
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                os.chmod(os.path.join(dir_path, file_name), mode)
+    else:
+        os.chmod(path, mode)
+
+
+class PPDataCache:
+    """Cache of preprocessed data files, addressed by a hash of everything that
+    determines their contents (see :func:`hash_key`).
+
+    Each entry is a data file (or directory) named ``<key><ext>`` and a JSON file
+    ``<key>.json`` of metadata about it, stored in a subdirectory of *cache_dir*
+    named after the first two characters of the key. The modification time of
+    the JSON file records when the entry was last used; if the data in the cache
+    exceeds *max_size* bytes, the least recently used entries are deleted by
+    :meth:`evict`.
+
+    Cached data files are made read-only (mode 0o444). They're hardlinked into
+    and out of the cache where possible, so the files in the working directory
+    are the same (read-only) files as the cache entries: preprocessed files must
+    be replaced, not modified in place.
+    """
+    _meta_suffix = '.json'
+
+    def __init__(self, cache_dir: str, max_size: int = 0, log=_log):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_size = max_size
+        self.log = log
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self._meta_suffix)
+
+    def _data_path(self, key: str, metadata: dict) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + metadata.get('data_ext', ''))
+
+    def get(self, key: str):
+        """Return the metadata dict stored for *key*, or None if *key* isn't in
+        the cache. Marks the entry as recently used.
+        """
+        meta_path = self._meta_path(key)
+        try:
+            with open(meta_path, 'r') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._data_path(key, metadata)):
+            return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return metadata
+
+    def link(self, key: str, metadata: dict, dest_path: str) -> str:
+        """Make *dest_path* point to the data cached for *key*, replacing any
+        existing file. Files are hardlinked if possible (so the cache entry
+        survives if *dest_path* is later deleted) and symlinked otherwise.
+
+        Returns:
+            'hardlink' or 'symlink', depending on the kind of link made.
+        """
+        data_path = self._data_path(key, metadata)
+        try:
+            # entries added before cached files were made read-only
+            _make_read_only(data_path)
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        remove_path(dest_path)
+        if not os.path.isdir(data_path):
+            try:
+                os.link(data_path, dest_path)
+                return 'hardlink'
+            except OSError:
+                pass
+        os.symlink(data_path, dest_path)
+        return 'symlink'
+
+    def put(self, key: str, src_path: str, metadata: dict):
+        """Add the data file or directory *src_path* to the cache under *key*,
+        along with the JSON-serializable dict *metadata*. Files are hardlinked
+        into the cache if possible and copied otherwise, and made read-only, so
+        *src_path* itself becomes read-only if it was hardlinked.
+        """
+        metadata = dict(metadata)
+        metadata['data_ext'] = os.path.splitext(src_path)[1]
+        data_path = self._data_path(key, metadata)
+        meta_path = self._meta_path(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        # stage under temporary names and rename into place, so that concurrent
+        # readers never see a partially written entry
+        tmp_suffix = f".tmp_{uuid.uuid4().hex}"
+        tmp_data_path = data_path + tmp_suffix
+        try:
+            if os.path.isdir(src_path):
+                shutil.copytree(src_path, tmp_data_path)
+            else:
+                try:
+                    os.link(src_path, tmp_data_path)
+                except OSError:
+                    shutil.copy2(src_path, tmp_data_path)
+            _make_read_only(tmp_data_path)
+            remove_path(data_path)
+            os.replace(tmp_data_path, data_path)
+            with open(meta_path + tmp_suffix, 'w') as f:
+                json.dump(metadata, f, default=str)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except OSError as exc:
+            self.log.warning("Couldn't add %s to preprocessed data cache %s: %r",
+                             src_path, self.cache_dir, exc)
+            remove_path(tmp_data_path)
+            remove_path(meta_path + tmp_suffix)
+
+    def entries(self) -> list:
+        """Return a list of (last use time, size in bytes, key) tuples for all
+        entries in the cache.
+        """
+        entries = []
+        for sub_dir in os.scandir(self.cache_dir):
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir.path):
+                if not entry.name.endswith(self._meta_suffix):
+                    continue
+                key = entry.name[:-len(self._meta_suffix)]
+                try:
+                    with open(entry.path, 'r') as f:
+                        metadata = json.load(f)
+                    entries.append((entry.stat().st_mtime_ns,
+                                    path_size(self._data_path(key, metadata)),
+                                    key))
+                except (OSError, ValueError):
+                    continue
+        return entries
+
+    def remove(self, key: str):
+        """Delete the entry for *key* from the cache."""
+        metadata = self.get(key)
+        remove_path(self._meta_path(key))
+        if metadata is not None:
+            remove_path(self._data_path(key, metadata))
+
+    def evict(self):
+        """Delete the least recently used entries until the cached data takes up
+        no more than ``max_size`` bytes. Does nothing if ``max_size`` is 0.
+        """
+        if not self.max_size:
+            return
+        entries = sorted(self.entries())
+        total_size = sum(size for _, size, _ in entries)
+        n_evicted = 0
+        for _, size, key in entries:
+            if total_size <= self.max_size:
+                break
+            self.remove(key)
+            total_size -= size
+            n_evicted += 1
+        if n_evicted:
+            self.log.info("Evicted %d entries from preprocessed data cache %s (%.1f MB in use).",
+                          n_evicted, self.cache_dir, total_size / (1024 * 1024))
+
+
+class CompiledCache:
+    """Cache of Python objects built from source files, such as parsed JSONC
+    tables, pickled in *cache_dir* so that later runs can skip the parsing.
+
+    Each entry records the :func:`file_signature` and :func:`file_hash` of the
+    files the object was built from, and is only used if each of them still
+    has the same signature or, failing that, the same contents. Entries are
+    named after *name* and the paths of the files that identify them.
+    """
+    _suffix = '.pickle'
+
+    def __init__(self, cache_dir: str, log=_log):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.log = log
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, name: str, key_paths: list) -> str:
+        key = hash_key([sys.version_info[:2], sorted(os.path.abspath(p) for p in key_paths)])
+        return os.path.join(self.cache_dir, f"{name}_{key[:16]}{self._suffix}")
+
+    @staticmethod
+    def _is_current(source) -> bool:
+        path, size, mtime_ns, digest = source
+        try:
+            if file_signature(path)[1:] == [size, mtime_ns]:
+                return True
+            return file_hash(path) == digest
+        except OSError:
+            return False
+
+    def get(self, name: str, key_paths: list):
+        """Return the object cached under *name* for the files *key_paths*, or
+        None if there's no current entry for it.
+        """
+        entry_path = self._entry_path(name, key_paths)
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            # unreadable or written by incompatible code
+            self.log.debug("Ignoring cache entry %s: %r", entry_path, exc)
+            return None
+        if not all(self._is_current(source) for source in entry['sources']):
+            return None
+        return entry['value']
+
+    def put(self, name: str, key_paths: list, value, source_paths: list = None):
+        """Cache the picklable object *value* under *name* for the files
+        *key_paths*. *source_paths* lists all the files *value* depends on, if
+        there are others besides *key_paths*.
+        """
+        entry_path = self._entry_path(name, key_paths)
+        tmp_path = entry_path + f".tmp_{uuid.uuid4().hex}"
+        try:
+            sources = [file_signature(p) + [file_hash(p)] for p in (source_paths or key_paths)]
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'sources': sources, 'value': value}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except Exception as exc:
+            # unpicklable values are a bug, but shouldn't stop the run
+            self.log.warning("Couldn't add %s to table cache %s: %r",
+                             name, self.cache_dir, exc)
+            remove_path(tmp_path)
+
+
+def read_json_cached(file_path: str, cache_dir: str = "", log=_log):
+    """Same as :func:`~src.util.json_utils.read_json`, but the parsed contents
+    are kept in a :class:`CompiledCache` in *cache_dir*, if given.
+    """
+    if not cache_dir:
+        return read_json(file_path, log=log)
+    cache = CompiledCache(cache_dir, log=log)
+    struct = cache.get('json', [file_path])
+    if struct is None:
+        struct = read_json(file_path, log=log)
+        cache.put('json', [file_path], struct)
+    return struct
@@ -2,21 +2,38 @@
  Source:
  https://gitlab.dkrz.de/data-infrastructure-services/intake-esm/-/blob/master/builder/notebooks/dkrz_era5_disk_catalog.ipynb
 """
+import ast
 import fnmatch
 import datetime
 import dask
+import intake
 from intake.source.utils import reverse_format
+from intake_esm._search import is_pattern
+import json
+import numpy as np
 import os
+import pandas as pd
 import re
 import subprocess
+import urllib.parse
 from pathlib import Path
 import itertools
 import logging
 from src import cli
 from . import ClassMaker
+from .cache import read_json_cached
 
 _log = logging.getLogger(__name__)
 
+# key in the parquet schema metadata recording the catalog csv file the sidecar
+# index was built from
+_CATALOG_INDEX_KEY = b'mdtf_catalog_source'
+# key in the parquet schema metadata listing the columns holding lists of values
+_CATALOG_INDEX_ITERABLES_KEY = b'mdtf_catalog_iterables'
+_CATALOG_INDEX_SUFFIX = '.index.parquet'
+# incremented when the layout of the index changes, so that older indexes are rebuilt
+_CATALOG_INDEX_VERSION = 2
+
 
 def get_file_list(output_dir: str) -> list:
     """Get a list of files in a directory"""
@@ -47,11 +64,18 @@ def get_file_list(output_dir: str) -> list:
     return new_filelist
 
 
-def define_pp_catalog_assets(config, cat_file_name: str) -> dict:
-    """ Define the version and attributes for the post-processed data catalog"""
-    cmip6_cv_info = cli.read_config_file(config.CODE_ROOT,
-                                         "data/cmip6-cmor-tables/Tables",
-                                         "CMIP6_CV.json")
+def define_pp_catalog_assets(config, cat_file_name: str, cache_dir: str = "") -> dict:
+    """ Define the version and attributes for the post-processed data catalog.
+    If *cache_dir* is given, the parsed CMIP6 CV table is kept in a
+    :class:`~src.util.cache.CompiledCache` there.
+    """
+    if cache_dir:
+        cmip6_cv_info = read_json_cached(os.path.join(config.CODE_ROOT, "data/cmip6-cmor-tables/Tables",
+                                                      "CMIP6_CV.json"), cache_dir)
+    else:
+        cmip6_cv_info = cli.read_config_file(config.CODE_ROOT,
+                                             "data/cmip6-cmor-tables/Tables",
+                                             "CMIP6_CV.json")
 
     cat_dict = {'esmcat_version': datetime.datetime.today().strftime('%Y-%m-%d'),
                 'description': 'Post-processed dataset for MDTF-diagnostics package',
@@ -77,7 +101,7 @@ def define_pp_catalog_assets(config, cat_file_name: str) -> dict:
 
     cat_dict["assets"] = {
         "column_name": "path",
-        "format": "netcdf"
+        "format": "zarr" if getattr(config, 'output_format', 'netcdf') == 'zarr' else "netcdf"
     }
     cat_dict["aggregation_control"] = {
         "variable_column_name": "variable_id",
@@ -111,3 +135,350 @@ def define_pp_catalog_assets(config, cat_file_name: str) -> dict:
 
 
     return cat_dict
+
+
+def _catalog_csv_path(catalog_path: str, esmcat: dict):
+    """Return the local path to the csv file referenced by the catalog header
+    *esmcat*, or None if the catalog entries are defined inline or stored remotely.
+    Relative paths are resolved the same way as intake-esm: first relative to the
+    current directory, then relative to the directory containing the header file.
+    """
+    csv_path = esmcat.get('catalog_file', None)
+    if not csv_path:
+        return None
+    url = urllib.parse.urlparse(csv_path)
+    if url.scheme == 'file':
+        csv_path = url.path
+    elif url.scheme:
+        return None
+    if not os.path.isfile(csv_path):
+        csv_path = os.path.join(os.path.dirname(catalog_path), csv_path)
+    if not os.path.isfile(csv_path):
+        return None
+    return os.path.abspath(csv_path)
+
+
+def _catalog_csv_signature(csv_path: str, read_options=None) -> bytes:
+    """Identify the current state of the catalog csv file by its path, size and
+    modification time, and the (json-serializable) *read_options* it's parsed with.
+    """
+    stat = os.stat(csv_path)
+    return json.dumps([_CATALOG_INDEX_VERSION, csv_path, stat.st_size, stat.st_mtime_ns, read_options],
+                      sort_keys=True, default=repr).encode('utf-8')
+
+
+def _catalog_header_columns(esmcat: dict):
+    """Return the names of the columns declared in the catalog header *esmcat*
+    (attributes, assets and aggregation control), or None if the header doesn't
+    declare any attributes.
+    """
+    if not esmcat.get('attributes', None):
+        return None
+    columns = [att['column_name'] for att in esmcat['attributes'] if 'column_name' in att]
+    assets = esmcat.get('assets', None) or dict()
+    columns.extend(assets.get(k) for k in ('column_name', 'format_column_name'))
+    agg = esmcat.get('aggregation_control', None) or dict()
+    columns.append(agg.get('variable_column_name', None))
+    columns.extend(agg.get('groupby_attrs', None) or [])
+    columns.extend(a.get('attribute_name', None) for a in agg.get('aggregations', None) or [])
+    return list(dict.fromkeys(c for c in columns if c))
+
+
+def _categorical_columns(df: pd.DataFrame, exclude=()) -> list:
+    """Return the names of the string columns of *df* with few distinct values
+    (facets such as realm, frequency or variable_id), which are stored as
+    categoricals in the sidecar index.
+    """
+    max_categories = max(1, len(df) // 2)
+    columns = []
+    for column in df.select_dtypes(include='object').columns:
+        if column in exclude:
+            continue
+        values = df[column]
+        if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            continue
+        if values.nunique(dropna=True) <= max_categories:
+            columns.append(column)
+    return columns
+
+
+def _catalog_filter_expression(filters):
+    """Convert *filters*, given either as a :py:class:`pyarrow.compute.Expression`
+    or in the disjunctive normal form accepted by :py:func:`pyarrow.parquet.read_table`,
+    to an Expression.
+    """
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    if filters is None or isinstance(filters, pc.Expression):
+        return filters
+    return pq.filters_to_expression(filters)
+
+
+def catalog_substring_filter(column: str, substrings):
+    """Return a filter for :func:`open_esm_catalog` selecting the catalog entries
+    whose *column* contains any of the strings in *substrings*, or None if
+    pyarrow isn't installed.
+    """
+    try:
+        import pyarrow.compute as pc
+    except ImportError:
+        return None
+    expr = None
+    for substring in substrings:
+        term = pc.match_substring(pc.field(column), substring)
+        expr = term if expr is None else (expr | term)
+    return expr
+
+
+def read_catalog_index(index_path: str, signature: bytes, columns=None, filters=None):
+    """Read the sidecar index *index_path* into a DataFrame. Returns None if the
+    index doesn't exist, can't be read, or was built from a different version
+    of the catalog csv file than the one identified by *signature*.
+
+    Only the *columns* present in the index are read (all columns if None), and
+    *filters* (see :func:`open_esm_catalog`) are pushed down to the parquet
+    reader. Filters that can't be evaluated against the index are ignored.
+    """
+    import pyarrow.parquet as pq
+
+    if not os.path.isfile(index_path):
+        return None
+    try:
+        schema = pq.read_schema(index_path, memory_map=True)
+        metadata = schema.metadata or dict()
+        if metadata.get(_CATALOG_INDEX_KEY, None) != signature:
+            return None
+        if columns is not None:
+            columns = [c for c in columns if c in schema.names]
+        iterables = json.loads(metadata.get(_CATALOG_INDEX_ITERABLES_KEY, b'[]'))
+        try:
+            table = pq.read_table(index_path, columns=columns, memory_map=True,
+                                  filters=_catalog_filter_expression(filters))
+        except Exception as exc:
+            if filters is None:
+                raise
+            _log.debug("Ignoring filters %r for catalog index %s: %r", filters, index_path, exc)
+            table = pq.read_table(index_path, columns=columns, memory_map=True)
+        df = table.to_pandas()
+    except Exception as exc:
+        _log.debug("Unable to read catalog index %s: %r", index_path, exc)
+        return None
+    # arrow restores missing strings as None; use NaN as pd.read_csv does
+    str_cols = df.select_dtypes(include='object').columns.difference(iterables)
+    df[str_cols] = df[str_cols].where(df[str_cols].notna(), np.nan)
+    # arrow restores list columns as numpy arrays; use lists as the csv converters do
+    for column in df.columns.intersection(iterables):
+        df[column] = [v.tolist() if isinstance(v, np.ndarray) else v for v in df[column]]
+    return df
+
+
+def write_catalog_index(df: pd.DataFrame, index_path: str, signature: bytes, log=_log,
+                        categorical_columns=(), columns_with_iterables=()):
+    """Write the catalog DataFrame *df* to the parquet sidecar index *index_path*,
+    tagged with the *signature* of the csv file it was read from. The
+    *categorical_columns* are stored dictionary-encoded, and read back as
+    categoricals; *columns_with_iterables* are stored as lists. Failures (e.g.
+    a read-only catalog directory) are logged and otherwise ignored.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        if categorical_columns:
+            df = df.astype({c: 'category' for c in categorical_columns})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or dict())
+        metadata[_CATALOG_INDEX_KEY] = signature
+        metadata[_CATALOG_INDEX_ITERABLES_KEY] = json.dumps(list(columns_with_iterables)).encode('utf-8')
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, index_path)
+        log.debug("Wrote catalog index %s", index_path)
+    except Exception as exc:
+        log.warning("Unable to write catalog index %s: %r", index_path, exc)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def open_esm_catalog(catalog_path: str, log=_log, columns=None, filters=None):
+    """Open the ESM-intake catalog defined by the header file *catalog_path*.
+
+    Parsing the catalog csv file dominates startup time for large catalogs, so
+    the parsed entries are cached in a columnar (parquet) sidecar index
+    written next to the csv file. The index records the size and modification
+    time of the csv file it was built from, and is rebuilt whenever the csv
+    file changes. Low-cardinality string columns (facets such as realm or
+    frequency) are stored dictionary-encoded and returned as categoricals.
+    The ``read_csv_kwargs`` and ``columns_with_iterables`` entries of the header,
+    if present, are applied when the csv file is parsed, as in
+    :py:func:`intake.open_esm_datastore`. If pyarrow isn't installed, or the
+    catalog is stored remotely or defined inline in the header, this falls back
+    to :py:func:`intake.open_esm_datastore`.
+
+    Args:
+        catalog_path: path to the catalog header (json) file.
+        log: log to write messages to.
+        columns: optional names of columns to read in addition to the ones
+            declared in the header. All columns are read if the header doesn't
+            declare any attributes.
+        filters: optional :py:class:`pyarrow.compute.Expression`, or filters in
+            the form accepted by :py:func:`pyarrow.parquet.read_table`, selecting
+            the catalog entries to read. Filters only narrow down the entries
+            loaded from the index, and are ignored if they can't be evaluated;
+            searches on the catalog must still apply the corresponding terms.
+
+    Returns:
+        :py:class:`intake_esm.core.esm_datastore` for the catalog.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return intake.open_esm_datastore(catalog_path)
+    try:
+        with open(catalog_path, 'r') as file_:
+            esmcat = json.load(file_)
+    except (OSError, ValueError):
+        return intake.open_esm_datastore(catalog_path)
+    csv_path = _catalog_csv_path(catalog_path, esmcat)
+    if csv_path is None:
+        return intake.open_esm_datastore(catalog_path)
+
+    read_csv_kwargs = esmcat.pop('read_csv_kwargs', None) or dict()
+    columns_with_iterables = esmcat.pop('columns_with_iterables', None) or []
+    read_columns = _catalog_header_columns(esmcat)
+    if read_columns is not None and columns is not None:
+        read_columns = list(dict.fromkeys(read_columns + list(columns)))
+    index_path = os.path.splitext(csv_path)[0] + _CATALOG_INDEX_SUFFIX
+    read_options = None
+    if read_csv_kwargs or columns_with_iterables:
+        read_options = [read_csv_kwargs, columns_with_iterables]
+    signature = _catalog_csv_signature(csv_path, read_options)
+    df = read_catalog_index(index_path, signature, columns=read_columns, filters=filters)
+    if df is None:
+        log.info("Building catalog index %s", index_path)
+        if columns_with_iterables:
+            read_csv_kwargs = dict(read_csv_kwargs)
+            converters = dict(read_csv_kwargs.get('converters', None) or dict())
+            converters.update({c: ast.literal_eval for c in columns_with_iterables})
+            read_csv_kwargs['converters'] = converters
+        df = pd.read_csv(csv_path, **read_csv_kwargs)
+        exclude = set(columns_with_iterables)
+        exclude.add((esmcat.get('assets', None) or dict()).get('column_name', None))
+        write_catalog_index(df, index_path, signature, log=log,
+                            categorical_columns=_categorical_columns(df, exclude=exclude),
+                            columns_with_iterables=columns_with_iterables)
+        # read the entries back, so that they're the same as on later calls
+        index_df = read_catalog_index(index_path, signature, columns=read_columns, filters=filters)
+        if index_df is not None:
+            df = index_df
+        elif read_columns is not None:
+            df = df[df.columns.intersection(read_columns, sort=False)]
+    esmcat['catalog_file'] = None
+    cat = intake.open_esm_datastore(dict(esmcat=esmcat, df=df))
+    cat.esmcat._cast_agg_columns_with_iterables()
+    return cat
+
+
+class CatalogSearchIndex:
+    """Inverted index over the rows of an ESM-intake catalog DataFrame, used to
+    resolve many queries against the same catalog without rescanning it for
+    each one.
+
+    Queries follow the semantics of :py:meth:`intake_esm.core.esm_datastore.search`:
+    values for the same column are OR'ed together, and columns are AND'ed.
+    Exact-match terms are looked up in a per-column mapping from values to row
+    positions, which is built with a single pass over the column the first
+    time it's queried; regex terms are evaluated once per (column, pattern)
+    pair and cached. Resolving a query after that only touches the matching
+    rows.
+    """
+    def __init__(self, df: pd.DataFrame, columns_with_iterables=None):
+        self.df = df
+        if columns_with_iterables is None:
+            columns_with_iterables = set()
+        self.columns_with_iterables = set(columns_with_iterables)
+        self._inverted = dict()
+        self._term_cache = dict()
+        self._empty = np.array([], dtype=np.intp)
+
+    @classmethod
+    def from_datastore(cls, cat):
+        """Build the index for the entries in the esm_datastore *cat*."""
+        return cls(cat.df, columns_with_iterables=cat.esmcat.columns_with_iterables)
+
+    def _column_index(self, column: str) -> dict:
+        if column not in self._inverted:
+            self._inverted[column] = self.df.groupby(column, sort=False, dropna=True, observed=True).indices
+        return self._inverted[column]
+
+    def _term_positions(self, column: str, value) -> np.ndarray:
+        """Sorted row positions where *column* matches the query term *value*."""
+        try:
+            key = (column, value)
+            hash(key)
+        except TypeError:
+            key = None
+        if key is not None and key in self._term_cache:
+            return self._term_cache[key]
+
+        if column in self.columns_with_iterables:
+            mask = self.df[column].str.contains(value, regex=False)
+        elif is_pattern(value):
+            mask = self.df[column].str.contains(value, regex=True, case=True, flags=0)
+        elif pd.isna(value):
+            mask = self.df[column].isnull()
+        else:
+            mask = None
+        if mask is None:
+            positions = self._column_index(column).get(value, self._empty)
+        else:
+            positions = np.flatnonzero(mask.fillna(False).to_numpy(dtype=bool))
+        positions = np.sort(np.asarray(positions, dtype=np.intp))
+        if key is not None:
+            self._term_cache[key] = positions
+        return positions
+
+    def search_positions(self, **query) -> np.ndarray:
+        """Return the sorted row positions in the catalog matching *query*."""
+        if not query:
+            return self._empty
+        result = None
+        for column, values in query.items():
+            if column not in self.df.columns:
+                raise ValueError(f'Column {column} not in columns {list(self.df.columns)}')
+            if isinstance(values, (str, int, float, bool)) or values is None or values is pd.NA:
+                values = [values]
+            col_positions = [self._term_positions(column, v) for v in values]
+            if len(col_positions) == 1:
+                col_positions = col_positions[0]
+            elif col_positions:
+                col_positions = np.unique(np.concatenate(col_positions))
+            else:
+                col_positions = self._empty
+            if result is None:
+                result = col_positions
+            else:
+                result = np.intersect1d(result, col_positions, assume_unique=True)
+            if result.size == 0:
+                break
+        return result
+
+    def search(self, **query) -> pd.DataFrame:
+        """Return the catalog entries matching *query* as a DataFrame."""
+        return self.df.iloc[self.search_positions(**query)].reset_index(drop=True)
+
+
+def subset_esm_catalog(cat, df: pd.DataFrame):
+    """Return a new esm_datastore with the same catalog definition as *cat*,
+    containing only the entries in *df* (e.g., the result of
+    :meth:`CatalogSearchIndex.search`). Categorical columns are converted back
+    to plain values, since the subset is processed (and grouped by intake-esm)
+    row by row.
+    """
+    cat_cols = df.select_dtypes(include='category').columns
+    if len(cat_cols):
+        df = df.astype({c: object for c in cat_cols})
+    subset = cat.__class__({'esmcat': cat.esmcat.model_dump(), 'df': df})
+    subset.esmcat.catalog_file = None
+    return subset
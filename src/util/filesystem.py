@@ -202,6 +202,26 @@ def check_dir(dir_path: str, attr_name: str = "", create: bool = False):
                 from exc
 
 
+def path_size(path: str) -> int:
+    """Return the size in bytes of the file *path*, or the total size of the
+    files under *path* if it's a directory (e.g. a Zarr store).
+    """
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def remove_path(path: str):
+    """Remove the file, link or directory tree at *path*, if it exists. Links
+    are removed without following them.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
 def bump_version(path: str, new_v=None, extra_dirs=None):
     """Append a version number to *path*, if necessary, so that it doesn't
     conflict with existing files.
@@ -3,6 +3,7 @@
 import os
 import io
 import collections
+import functools
 import json
 import re
 from . import exceptions
@@ -23,37 +24,64 @@ def get_config_file_type(file_path: str) -> str:
     return ext
 
 
+# Regexes for the single scan of a JSONC string done by strip_jsonc. Strings
+# (a '"' after a backslash outside a string doesn't start one) and commas
+# that aren't trailing are matched as part of runs of text that is kept, so
+# that only comments and trailing commas need to be replaced. Comments can
+# only match whole, so the lookahead for trailing commas can't end inside one.
+_JSONC_STRING = r'(?<!\\)"[^"\\\n]*+(?:\\.[^"\\\n]*+)*+"'
+_JSONC_COMMENT = r'//[^\n]*+|/\*[^*]*+(?:\*(?!/)[^*]*+)*+\*/'
+_JSONC_TOKENS = re.compile(
+    rf'(?P<keep>(?:[^"/,]++|{_JSONC_STRING}|/(?![/*])|,(?!(?:\s|{_JSONC_COMMENT})*+[\]}}])|")++)'
+    rf'|(?P<comment>{_JSONC_COMMENT})'
+    rf'|(?P<comma>,)'
+    rf'|/'
+)
+
+
+def _blank_jsonc_token(match):
+    kind = match.lastgroup
+    text = match.group()
+    if kind == 'keep' or kind is None:
+        # kept text, or a '/*' without a matching '*/'
+        return text
+    elif kind == 'comma':
+        return ' '
+    elif '\n' not in text:
+        return ' ' * len(text)
+    # keep the newlines in block comments, so that line numbers don't change
+    return '\n'.join(' ' * len(line) for line in text.split('\n'))
+
+
+def strip_jsonc(str_: str) -> str:
+    """Convert the JSONC string *str_* to JSON in a single scan, replacing
+    ``//`` and ``/* */`` comments and trailing commas in objects and arrays by
+    whitespace. Every remaining character keeps its position (and so its line
+    and column number) in *str_*.
+    """
+    return _JSONC_TOKENS.sub(_blank_jsonc_token, str_)
+
+
+@functools.lru_cache(maxsize=None)
+def _comment_regex(delimiter: str):
+    return re.compile(
+        rf'(?P<string>{_JSONC_STRING})|(?P<comment>{re.escape(delimiter)}[^\n]*)'
+    )
+
+
 def strip_comments(str_, delimiter=None):
     """Remove comments from *str_*. Comments are taken to start with an
     arbitrary *delimiter* and run to the end of the line.
-    """
-    # would be better to use shlex, but that doesn't support multi-character
-    # comment delimiters like '//'
-    ESCAPED_QUOTE_PLACEHOLDER = '\v'  # no one uses vertical tab
 
+    Returns:
+        tuple of *str_* with comments and blank lines removed, and a list of
+        the (0-based) line numbers in *str_* of the lines that were kept.
+    """
     if not delimiter:
         return str_
-    lines = str_.splitlines()
-    for i in range(len(lines)):
-        # get rid of lines starting with delimiter
-        if lines[i].startswith(delimiter):
-            lines[i] = ''
-            continue
-        # handle delimiters midway through a line:
-        # If delimiter appears quoted in a string, don't want to treat it as
-        # a comment. So for each occurrence of delimiter, count number of
-        # "s to its left and only truncate when that's an even number.
-        # First we get rid of -escaped single "s.
-        replaced_line = lines[i].replace('\\\"', ESCAPED_QUOTE_PLACEHOLDER)
-        line_parts = replaced_line.split(delimiter)
-        quote_counts = [s.count('"') for s in line_parts]
-        j = 1
-        while sum(quote_counts[:j]) % 2 != 0:
-            if j >= len(quote_counts):
-                raise ValueError(f"Couldn't parse line {i+1} of string.")
-            j += 1
-        replaced_line = delimiter.join(line_parts[:j])
-        lines[i] = replaced_line.replace(ESCAPED_QUOTE_PLACEHOLDER, '\\\"')
+    lines = _comment_regex(delimiter).sub(
+        lambda m: m.group() if m.lastgroup == 'string' else '', str_
+    ).splitlines()
     # make lookup table of correct line numbers, taking into account lines we
     # dropped
     line_nos = [i for i, s in enumerate(lines) if (s and not s.isspace())]
@@ -63,30 +91,21 @@ def strip_comments(str_, delimiter=None):
 
 
 def parse_json(str_):
-    """Parse JSONC (JSON with ``//``-comments) string *str_* into a Python object.
-    Comments are discarded. Wraps standard library :py:func:`json.loads`.
+    """Parse JSONC (JSON with ``//`` and ``/* */`` comments, and trailing commas)
+    string *str_* into a Python object. Comments are discarded. Wraps standard
+    library :py:func:`json.loads`, after converting *str_* with :func:`strip_jsonc`.
 
     Syntax errors in the input (:py:class:`~json.JSONDecodeError`) are passed
-    through from the Python standard library parser. We correct the line numbers
-    mentioned in the errors to refer to the original file (i.e., with comments.)
+    through from the Python standard library parser. Since :func:`strip_jsonc`
+    doesn't move any characters, the line numbers mentioned in the errors refer
+    to the original file (i.e., with comments.)
     """
-    def _pos_from_lc(lineno, colno, str_):
-        # fix line number, since we stripped commented-out lines. JSONDecodeError
-        # computes line/col no. in error message from character position in string.
-        lines = str_.splitlines()
-        return (colno - 1) + sum((len(line) + 1) for line in lines[:lineno])
-
-    (strip_str, line_nos) = strip_comments(str_, delimiter='//')
+    strip_str = strip_jsonc(str_)
     try:
         parsed_json = json.loads(strip_str,
                                  object_pairs_hook=collections.OrderedDict)
     except json.JSONDecodeError as exc:
-        # fix reported line number, since we stripped commented-out lines.
-        assert exc.lineno <= len(line_nos)
-        raise json.JSONDecodeError(
-            msg=exc.msg, doc=str_,
-            pos=_pos_from_lc(line_nos[exc.lineno-1], exc.colno, str_)
-        )
+        raise json.JSONDecodeError(msg=exc.msg, doc=str_, pos=exc.pos)
     except UnicodeDecodeError as exc:
         raise json.JSONDecodeError(
             msg=f"parse_json received UnicodeDecodeError:\n{exc}",
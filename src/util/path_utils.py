@@ -123,12 +123,15 @@ class ModelDataPathManager(PathManagerBase):
     MODEL_DATA_DIR: dict
     MODEL_WORK_DIR: dict
     MODEL_OUTPUT_DIR: dict
+    output_format: str = "netcdf"
 
     def __init__(self, config: NameSpace,
                  env=None,
                  unittest: bool = False,
                  new_work_dir: bool = False):
         super().__init__(config, env, unittest, new_work_dir)
+        # file format of the preprocessed data: 'netcdf' or 'zarr'
+        self.output_format = getattr(config, 'output_format', 'netcdf') or 'netcdf'
 
         if hasattr(config, "MODEL_DATA_ROOT"):
             self.MODEL_DATA_ROOT = self._init_path('MODEL_DATA_ROOT', config, env=env)
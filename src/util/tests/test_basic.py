@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from src.util import basic as util
 from src.util import exceptions
@@ -142,6 +143,14 @@ class TestWormDict(unittest.TestCase):
         with self.assertRaises(exceptions.WormKeyError):
             _ = foo.popitem()
 
+    def test_worm_pickle(self):
+        foo = util.WormDict(a=1, b=2)
+        bar = pickle.loads(pickle.dumps(foo))
+        self.assertIsInstance(bar, util.WormDict)
+        self.assertEqual(bar, foo)
+        with self.assertRaises(exceptions.WormKeyError):
+            bar['a'] = 3
+
     def test_consistentD_normal_operation(self):
         foo = util.ConsistentDict(a=1, b=2)
         self.assertTrue(isinstance(foo, dict))  # should really be testing for MutableMapping
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.util import cache as util
+
+
+class TestHashKey(unittest.TestCase):
+    def test_hash_key_order(self):
+        self.assertEqual(util.hash_key({'a': 1, 'b': [1, 2]}),
+                         util.hash_key({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(util.hash_key({'a': 1, 'b': [1, 2]}),
+                            util.hash_key({'a': 1, 'b': [2, 1]}))
+
+    def test_file_signature(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'a.nc')
+        with open(path, 'w') as f:
+            f.write('abc')
+        sig = util.file_signature(path)
+        self.assertEqual(sig[:2], [path, 3])
+        os.utime(path, ns=(0, sig[2] + 1000))
+        self.assertNotEqual(util.file_signature(path), sig)
+        with self.assertRaises(OSError):
+            util.file_signature(os.path.join(temp_dir, 'missing.nc'))
+
+
+class TestCompiledCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.cache = util.CompiledCache(os.path.join(self.temp_dir, 'cache'))
+        self.path = os.path.join(self.temp_dir, 'table.jsonc')
+        self.write('{"a": 1}')
+
+    def write(self, contents):
+        with open(self.path, 'w') as f:
+            f.write(contents)
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get('json', [self.path]))
+        self.cache.put('json', [self.path], {'a': 1})
+        self.assertEqual(self.cache.get('json', [self.path]), {'a': 1})
+        self.assertIsNone(self.cache.get('fieldlist', [self.path]))
+
+    def test_touched_source(self):
+        self.cache.put('json', [self.path], {'a': 1})
+        sig = util.file_signature(self.path)
+        os.utime(self.path, ns=(0, sig[2] + 1000))
+        self.assertEqual(self.cache.get('json', [self.path]), {'a': 1})
+
+    def test_changed_source(self):
+        other_path = os.path.join(self.temp_dir, 'other.jsonc')
+        with open(other_path, 'w') as f:
+            f.write('{}')
+        self.cache.put('json', [self.path], {'a': 1}, source_paths=[self.path, other_path])
+        with open(other_path, 'w') as f:
+            f.write('{"b": 2}')
+        self.assertIsNone(self.cache.get('json', [self.path]))
+        os.remove(other_path)
+        self.assertIsNone(self.cache.get('json', [self.path]))
+
+    def test_corrupt_entry(self):
+        self.cache.put('json', [self.path], {'a': 1})
+        with open(self.cache._entry_path('json', [self.path]), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertIsNone(self.cache.get('json', [self.path]))
+
+    def test_read_json_cached(self):
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        self.assertEqual(util.read_json_cached(self.path, cache_dir), {'a': 1})
+        self.assertEqual(self.cache.get('json', [self.path]), {'a': 1})
+
+
+class TestPPDataCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.cache = util.PPDataCache(os.path.join(self.temp_dir, 'cache'))
+
+    def make_file(self, name, size=10):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        return path
+
+    def test_put_get_link(self):
+        key = util.hash_key('tas')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, self.make_file('tas.nc'), {'translation_name': 'tas'})
+        metadata = self.cache.get(key)
+        self.assertEqual(metadata['translation_name'], 'tas')
+        dest_path = os.path.join(self.temp_dir, 'wk', 'tas.nc')
+        self.assertIn(self.cache.link(key, metadata, dest_path), ('hardlink', 'symlink'))
+        with open(dest_path, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 10)
+        # cached data, and links to it, can't be modified in place
+        data_path = self.cache._data_path(key, metadata)
+        self.assertEqual(os.stat(data_path).st_mode & 0o777, 0o444)
+        self.assertEqual(os.stat(dest_path).st_mode & 0o777, 0o444)
+        # entry survives deleting the linked file
+        os.remove(dest_path)
+        self.assertIsNotNone(self.cache.get(key))
+
+    def test_put_directory(self):
+        key = util.hash_key('tas.zarr')
+        src_path = os.path.join(self.temp_dir, 'tas.zarr')
+        os.makedirs(os.path.join(src_path, 'tas'))
+        with open(os.path.join(src_path, 'tas', '0'), 'wb') as f:
+            f.write(b'x' * 10)
+        self.cache.put(key, src_path, {})
+        data_path = self.cache._data_path(key, self.cache.get(key))
+        self.assertEqual(os.stat(os.path.join(data_path, 'tas', '0')).st_mode & 0o777, 0o444)
+        # directories are copied, so the original stays writable
+        self.assertTrue(os.stat(os.path.join(src_path, 'tas', '0')).st_mode & 0o200)
+        self.cache.remove(key)
+        self.assertFalse(os.path.exists(data_path))
+
+    def test_missing_data(self):
+        key = util.hash_key('tas')
+        self.cache.put(key, self.make_file('tas.nc'), {})
+        metadata = self.cache.get(key)
+        os.remove(self.cache._data_path(key, metadata))
+        self.assertIsNone(self.cache.get(key))
+
+    def test_evict_lru(self):
+        self.cache.max_size = 25
+        keys = [util.hash_key(i) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, self.make_file(f'{i}.nc'), {})
+            # make entries' last use times distinct, oldest first
+            os.utime(self.cache._meta_path(key), ns=(0, (i + 1) * 10**9))
+        # using the oldest entry makes the second one least recently used
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+        self.assertEqual(sum(size for _, size, _ in self.cache.entries()), 20)
+
+    def test_evict_no_limit(self):
+        for i in range(3):
+            self.cache.put(util.hash_key(i), self.make_file(f'{i}.nc'), {})
+        self.cache.evict()
+        self.assertEqual(len(self.cache.entries()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
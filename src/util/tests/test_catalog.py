@@ -0,0 +1,158 @@
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.util import catalog
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+_CSV_CONTENTS = """activity_id,frequency,realm,variable_id,standard_name,time_range,path
+CMIP,day,atmos,tas,air_temperature,19800101-19801231,/dummy/tas_1980.nc
+CMIP,day,atmos,tas,air_temperature,19810101-19811231,/dummy/tas_1981.nc
+CMIP,day,atmos,pr,,19800101-19801231,/dummy/pr_1980.nc
+"""
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow not installed")
+class TestCatalogIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'test_catalog.csv')
+        self.index_path = os.path.join(self.tmp_dir, 'test_catalog.index.parquet')
+        self.json_path = os.path.join(self.tmp_dir, 'test_catalog.json')
+        with open(self.csv_path, 'w') as f:
+            f.write(_CSV_CONTENTS)
+        header = {
+            "esmcat_version": "0.0.1",
+            "attributes": [{"column_name": c} for c in _CSV_CONTENTS.splitlines()[0].split(',')],
+            "assets": {"column_name": "path", "format": "netcdf"},
+            "aggregation_control": {
+                "variable_column_name": "variable_id",
+                "groupby_attrs": ["activity_id", "frequency", "realm"],
+                "aggregations": [{"type": "union", "attribute_name": "variable_id", "options": {}}]
+            },
+            "id": "test_catalog",
+            "catalog_file": "test_catalog.csv"
+        }
+        with open(self.json_path, 'w') as f:
+            json.dump(header, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_index_matches_csv(self):
+        cat = catalog.open_esm_catalog(self.json_path)
+        self.assertTrue(os.path.isfile(self.index_path))
+        # second call is served from the index
+        cat2 = catalog.open_esm_catalog(self.json_path)
+        pd.testing.assert_frame_equal(cat.df, cat2.df)
+        # facets are returned as categoricals, with the same values
+        pd.testing.assert_frame_equal(cat2.df.astype(object), pd.read_csv(self.csv_path).astype(object))
+        self.assertEqual(len(cat2.search(variable_id='tas').df), 2)
+
+    def test_categorical_columns(self):
+        cat = catalog.open_esm_catalog(self.json_path)
+        self.assertIsInstance(cat.df['realm'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(cat.df['standard_name'].dtype, pd.CategoricalDtype)
+        # asset paths are never categorical
+        self.assertEqual(cat.df['path'].dtype, object)
+        subset = catalog.subset_esm_catalog(cat, cat.df.iloc[:2])
+        self.assertEqual(subset.df['realm'].dtype, object)
+        self.assertEqual(list(subset.df['standard_name']), ['air_temperature', 'air_temperature'])
+
+    def test_header_columns(self):
+        with open(self.json_path, 'r') as f:
+            header = json.load(f)
+        header['attributes'] = [a for a in header['attributes'] if a['column_name'] != 'time_range']
+        with open(self.json_path, 'w') as f:
+            json.dump(header, f)
+        cat = catalog.open_esm_catalog(self.json_path)
+        self.assertNotIn('time_range', cat.df.columns)
+        self.assertIn('path', cat.df.columns)
+        cat = catalog.open_esm_catalog(self.json_path, columns=['time_range'])
+        self.assertIn('time_range', cat.df.columns)
+
+    def test_filters(self):
+        cat = catalog.open_esm_catalog(self.json_path, filters=[('variable_id', '==', 'tas')])
+        self.assertEqual(list(cat.df['path']), ['/dummy/tas_1980.nc', '/dummy/tas_1981.nc'])
+        # served from the index on the second call
+        filters = catalog.catalog_substring_filter('path', ['pr_', 'tas_1981'])
+        cat = catalog.open_esm_catalog(self.json_path, filters=filters)
+        self.assertEqual(list(cat.df['path']), ['/dummy/tas_1981.nc', '/dummy/pr_1980.nc'])
+        # filters on columns that don't exist are ignored
+        cat = catalog.open_esm_catalog(self.json_path, filters=[('no_such_column', '==', 'x')])
+        self.assertEqual(len(cat.df), 3)
+
+    def test_read_csv_kwargs(self):
+        with open(self.csv_path, 'w') as f:
+            f.write("activity_id,frequency,realm,variable_id,standard_name,time_range,path\n"
+                    "CMIP,day,atmos,\"['tas', 'pr']\",air_temperature,19800101-19801231,/dummy/a.nc\n"
+                    "CMIP,day,atmos,\"['tas']\",air_temperature,19810101-19811231,/dummy/b.nc\n")
+        with open(self.json_path, 'r') as f:
+            header = json.load(f)
+        header['read_csv_kwargs'] = {'dtype': {'activity_id': 'string'}}
+        header['columns_with_iterables'] = ['variable_id']
+        with open(self.json_path, 'w') as f:
+            json.dump(header, f)
+        for _ in range(2):
+            # first call builds the index, second call reads it
+            cat = catalog.open_esm_catalog(self.json_path)
+            self.assertEqual(cat.df['activity_id'].dtype, 'string')
+            self.assertEqual([list(v) for v in cat.df['variable_id']], [['tas', 'pr'], ['tas']])
+            self.assertIn('variable_id', cat.esmcat.columns_with_iterables)
+            self.assertEqual(len(cat.search(variable_id='pr').df), 1)
+
+    def test_index_rebuilt(self):
+        catalog.open_esm_catalog(self.json_path)
+        with open(self.csv_path, 'a') as f:
+            f.write("CMIP,day,atmos,pr,,19810101-19811231,/dummy/pr_1981.nc\n")
+        cat = catalog.open_esm_catalog(self.json_path)
+        self.assertEqual(len(cat.df), 4)
+        signature = catalog._catalog_csv_signature(self.csv_path)
+        self.assertEqual(len(catalog.read_catalog_index(self.index_path, signature)), 4)
+
+    def test_stale_index_ignored(self):
+        catalog.open_esm_catalog(self.json_path)
+        self.assertIsNone(catalog.read_catalog_index(self.index_path, b'stale'))
+
+
+class TestCatalogSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(io.StringIO(_CSV_CONTENTS))
+        self.index = catalog.CatalogSearchIndex(self.df)
+
+    def test_search_exact(self):
+        result = self.index.search(variable_id='tas', frequency=['day', 'mon'])
+        self.assertEqual(list(result.path), ['/dummy/tas_1980.nc', '/dummy/tas_1981.nc'])
+        result = self.index.search(variable_id=['tas', 'pr'], time_range='19800101-19801231')
+        self.assertEqual(list(result.path), ['/dummy/tas_1980.nc', '/dummy/pr_1980.nc'])
+
+    def test_search_regex(self):
+        result = self.index.search(path=[re.compile(r'(1981)')], realm='atmos')
+        self.assertEqual(list(result.variable_id), ['tas'])
+        result = self.index.search(variable_id='^t.*')
+        self.assertEqual(len(result), 2)
+
+    def test_search_missing(self):
+        self.assertTrue(self.index.search(variable_id='psl').empty)
+        self.assertTrue(self.index.search(variable_id='tas', realm='ocean').empty)
+        result = self.index.search(standard_name=float('nan'))
+        self.assertEqual(list(result.variable_id), ['pr'])
+        with self.assertRaises(ValueError):
+            self.index.search(modeling_realm='atmos')
+
+    def test_search_cached(self):
+        self.index.search(variable_id='tas', realm='atmos')
+        self.index.search(variable_id='pr', realm='atmos')
+        self.assertEqual(set(self.index._inverted), {'variable_id', 'realm'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,17 @@
+import glob
 import json
+import os
 import textwrap
+import time
 import unittest
 import unittest.mock as mock
 from src.util import filesystem as util
+from src.util import json_utils
 from src.util import exceptions
 
+# Benchmarks are skipped in normal test runs; set MDTF_BENCHMARK=1 to run them.
+_RUN_BENCHMARKS = bool(os.environ.get('MDTF_BENCHMARK', ''))
+
 
 class TestCheckDirs(unittest.TestCase):
     @mock.patch('os.path.isdir', return_value=True)
@@ -125,7 +132,7 @@ class TestJSONC(unittest.TestCase):
             }
         }
         """
-        d = util.parse_json(s)
+        d = json_utils.parse_json(s)
         self.assertEqual(set(d.keys()), {'a', 'b', 'c', 'd', 'e'})
         self.assertEqual(d['a'], "test_string")
         self.assertEqual(d['b'], 3)
@@ -153,7 +160,7 @@ class TestJSONC(unittest.TestCase):
         } // comment 7
 
         """
-        d = util.parse_json(s)
+        d = json_utils.parse_json(s)
         self.assertEqual(set(d.keys()), {'a', 'b // c', 'e', 'f'})
         self.assertEqual(d['a'], 1)
         self.assertEqual(d['b // c'], "// d x ////")
@@ -164,7 +171,7 @@ class TestJSONC(unittest.TestCase):
         s = 'SYNTAX_ERROR\n{"a": 1, "e": false}'
         try:
             flag = False
-            _ = util.parse_json(textwrap.dedent(s))
+            _ = json_utils.parse_json(textwrap.dedent(s))
         except json.JSONDecodeError as exc:
             flag = True
             self.assertEqual(exc.lineno, 1)
@@ -175,7 +182,7 @@ class TestJSONC(unittest.TestCase):
         # missing ',' triggers on first " in "e"
         try:
             flag = False
-            _ = util.parse_json(textwrap.dedent(s))
+            _ = json_utils.parse_json(textwrap.dedent(s))
         except json.JSONDecodeError as exc:
             flag = True
             self.assertEqual(exc.lineno, 1)
@@ -186,7 +193,7 @@ class TestJSONC(unittest.TestCase):
         # missing ',' triggers on first " in "e"
         try:
             flag = False
-            _ = util.parse_json(textwrap.dedent(s))
+            _ = json_utils.parse_json(textwrap.dedent(s))
         except json.JSONDecodeError as exc:
             flag = True
             self.assertEqual(exc.lineno, 2)
@@ -205,7 +212,7 @@ class TestJSONC(unittest.TestCase):
         """
         try:
             flag = False
-            _ = util.parse_json(textwrap.dedent(s))
+            _ = json_utils.parse_json(textwrap.dedent(s))
         except json.JSONDecodeError as exc:
             flag = True
             self.assertEqual(exc.lineno, 9)
@@ -223,7 +230,7 @@ class TestJSONC(unittest.TestCase):
         # missing ',' triggers on first " in "e"
         try:
             flag = False
-            _ = util.parse_json(textwrap.dedent(s))
+            _ = json_utils.parse_json(textwrap.dedent(s))
         except json.JSONDecodeError as exc:
             flag = True
             self.assertEqual(exc.lineno, 6)
@@ -233,21 +240,86 @@ class TestJSONC(unittest.TestCase):
     def test_strip_comments_quote_escape(self):
         str_ = '"foo": "bar\\\"ba//z\\\""'
         self.assertEqual(
-            util.strip_comments(str_, delimiter='//'),
+            json_utils.strip_comments(str_, delimiter='//'),
             ('"foo": "bar\\"ba//z\\""', [0])
         )
         str_ = '"foo": "bar\\\"ba//z\\\"" //comment \\\" '
         self.assertEqual(
-            util.strip_comments(str_, delimiter='//'),
+            json_utils.strip_comments(str_, delimiter='//'),
             ('"foo": "bar\\"ba//z\\"" ', [0])
         )
         # old code breaks on this case - unbalanced
         str_ = '"foo": bar\\\"ba//z\\\""'
         self.assertEqual(
-            util.strip_comments(str_, delimiter='//'),
+            json_utils.strip_comments(str_, delimiter='//'),
             ('"foo": bar\\"ba', [0])
         )
 
+    def test_parse_json_block_comments_trailing_commas(self):
+        s = """
+        /* comment 1
+           "a": 2, */
+        {
+            "a" : [1, 2, /* comment 2 */ 3,],
+            "b // c" : "/* d */ x,]", /* comment 3 */
+            "e" : {"f": false, // comment 4 ]
+            },
+            "g" : [1, /* ] */ 2, /* comment 5 */ 3], /* ] */
+        }
+        """
+        d = json_utils.parse_json(s)
+        self.assertEqual(d, {'a': [1, 2, 3], 'b // c': "/* d */ x,]", 'e': {'f': False}, 'g': [1, 2, 3]})
+
+    def test_strip_jsonc_positions(self):
+        s = '{"a": 1, /* x\ny */ "b": [2,], // z\n"c": "//,}"}'
+        strip_str = json_utils.strip_jsonc(s)
+        self.assertEqual(len(strip_str), len(s))
+        self.assertEqual(strip_str.splitlines(), ['{"a": 1,     ', '     "b": [2 ],     ', '"c": "//,}"}'])
+
+    def test_parse_json_block_comment_lineno(self):
+        s = '/* comment 1\n\n*/ {"a": 1,\n /* , */ "b" 2}'
+        try:
+            flag = False
+            _ = json_utils.parse_json(s)
+        except json.JSONDecodeError as exc:
+            flag = True
+            self.assertEqual(exc.lineno, 4)
+            self.assertEqual(exc.colno, 14)
+        self.assertTrue(flag)
+
+
+@unittest.skipUnless(_RUN_BENCHMARKS, "set MDTF_BENCHMARK=1 to run benchmarks")
+class BenchmarkParseJSONC(unittest.TestCase):
+    def test_repo_files(self):
+        # fieldlists and POD settings files shipped with the framework
+        code_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        for pattern in ('data/fieldlist_*.jsonc', 'diagnostics/*/settings.jsonc'):
+            strs = []
+            for path in sorted(glob.glob(os.path.join(code_root, pattern))):
+                with open(path, 'r', encoding='utf-8') as f:
+                    s = f.read()
+                try:
+                    json_utils.parse_json(s)
+                except json.JSONDecodeError:
+                    # skip files with syntax errors
+                    continue
+                strs.append(s)
+            n_reps = 20
+            start = time.perf_counter()
+            for _ in range(n_reps):
+                for s in strs:
+                    json_utils.strip_jsonc(s)
+            t_strip = (time.perf_counter() - start) / n_reps
+            start = time.perf_counter()
+            for _ in range(n_reps):
+                for s in strs:
+                    json_utils.parse_json(s)
+            t_parse = (time.perf_counter() - start) / n_reps
+            n_bytes = sum(len(s) for s in strs)
+            print(f"{pattern}: {len(strs)} files, {n_bytes / 1024:.0f} kB; strip_jsonc {1000 * t_strip:.2f} ms, "
+                  f"parse_json {1000 * t_parse:.2f} ms")
+            self.assertLess(t_strip, t_parse)
+
 
 class TestDoubleBraceTemplate(unittest.TestCase):
     def sub(self, template_text, template_dict=dict()):
@@ -154,6 +154,14 @@ class VarlistEntry(VarlistEntryBase, util.MDTFObjectBase, data_model.DMVariable,
         path_variable: Name of env var containing path to local data.
         dest_path: Path to local data.
         alternates: List of lists of VarlistEntries.
+        cell_methods: CF ``cell_methods`` of the requested data. The ``time``
+            method (``mean``, ``sum``, ``maximum``, ``minimum`` or ``point``) is
+            used if the data has to be resampled to the requested frequency.
+        output_encoding: Encoding settings for the preprocessed output file,
+            overriding those in the ``output_encoding`` runtime option.
+            The latitude and longitude bounds of the region requested with the
+            ``region``, ``lat_bounds`` and ``lon_bounds`` settings are stored in
+            the ``range`` of the Y and X coordinates.
         translation: :class:`translation.TranslatedVarlistEntry`, populated by DataSource.
         data: dict mapping experiment_keys to DataKeys. Populated by DataSource.
     """
@@ -179,6 +187,8 @@ class VarlistEntry(VarlistEntryBase, util.MDTFObjectBase, data_model.DMVariable,
         default=VarlistEntryRequirement.REQUIRED, compare=False
     )
     alternates: list = dc.field(default_factory=list, compare=False)
+    cell_methods: str = dc.field(default="", compare=False)
+    output_encoding: dict = dc.field(default_factory=dict, compare=False)
     translation: typing.Any = dc.field(default=None, compare=False)
     data: util.ConsistentDict = dc.field(default_factory=util.ConsistentDict,
                                          compare=False)
@@ -295,14 +305,46 @@ class VarlistEntry(VarlistEntryBase, util.MDTFObjectBase, data_model.DMVariable,
                                       f"entry for {name}."))
                 new_kw['coords'].append(dims_d[d_name].make_scalar(scalar_val))
 
+        # lat/lon region: set for all variables in the "data" section, or for
+        # this variable; lat_bounds and lon_bounds override the region's entries
+        region = dict(parent.pod_data.get('region', None) or dict())
+        region.update(kwargs.pop('region', None) or dict())
+        for key in ('lat_bounds', 'lon_bounds'):
+            if key in kwargs:
+                region[key] = kwargs.pop(key)
+
         filter_kw = util.filter_dataclass(kwargs, cls, init=True)
         obj = cls(name=name, _parent=parent, **new_kw, **filter_kw)
         # specialize time coord
         time_kw = util.filter_dataclass(kwargs, _VarlistTimeSettings)
         if time_kw:
             obj.change_coord('T', None, **time_kw)
+        # specialize horizontal coords
+        for ax, key in (('Y', 'lat_bounds'), ('X', 'lon_bounds')):
+            if region.get(key, None) is not None and getattr(obj, ax, None) is not None:
+                obj.change_coord(ax, None, range=cls.region_bounds(name, key, region[key]))
         return obj
 
+    @staticmethod
+    def region_bounds(name: str, key: str, bounds) -> tuple:
+        """Validate the *key* ('lat_bounds' or 'lon_bounds') entry *bounds* of
+        the region requested for the varlist entry *name*, and return it as a
+        (min, max) tuple. Longitude bounds may cross the 0/360 meridian, in which
+        case the second value is less than the first.
+        """
+        try:
+            lo, hi = (float(b) for b in bounds)
+        except (TypeError, ValueError):
+            raise ValueError((f"{key} for varlist entry {name} must be a list of "
+                              f"two numbers (got {bounds})."))
+        if key == 'lat_bounds' and not (-90. <= lo < hi <= 90.):
+            raise ValueError((f"Invalid lat_bounds {bounds} for varlist entry {name}: "
+                              f"values must be increasing and between -90 and 90."))
+        if key == 'lon_bounds' and (lo == hi or abs(hi - lo) > 360.):
+            raise ValueError((f"Invalid lon_bounds {bounds} for varlist entry {name}: "
+                              f"values must be distinct and at most 360 degrees apart."))
+        return lo, hi
+
     def set_env_vars(self):
         """Get env var definitions for:
 
@@ -480,12 +522,14 @@ class VarlistCoordinate(data_model.DMCoordinate):
 
 @util.mdtf_dataclass
 class VarlistXCoordinate(data_model.DMXCoordinate):
-    range: tuple = None
+    # bounds of the region requested by the POD; the same dimension can be
+    # subset differently for each variable
+    range: tuple = dc.field(default=None, compare=False)
 
 
 @util.mdtf_dataclass
 class VarlistYCoordinate(data_model.DMYCoordinate):
-    range: tuple = None
+    range: tuple = dc.field(default=None, compare=False)
 
 
 @util.mdtf_dataclass
@@ -612,12 +656,14 @@ class Varlist(data_model.DMDataSet):
         the file containing the requested dataset. Files not following this
         convention won't be found by the POD.
         """
+        # Zarr stores are directories named like the netCDF files they replace
+        ext = '.zarr' if getattr(model_paths, 'output_format', 'netcdf') == 'zarr' else '.nc'
         if var.is_static:
-            f_name = f"{case_name}.{var.name}.static.nc"
+            f_name = f"{case_name}.{var.name}.static{ext}"
             return os.path.join(model_paths.MODEL_WORK_DIR[case_name], f_name)
         else:
             freq = var.T.frequency.format_local()
-            f_name = f"{case_name}.{var.name}.{freq}.nc"
+            f_name = f"{case_name}.{var.name}.{freq}{ext}"
             return os.path.join(model_paths.MODEL_WORK_DIR[case_name], freq, f_name)
 
     @classmethod
@@ -8,6 +8,7 @@ import collections
 import functools
 import itertools
 import re
+import threading
 import warnings
 
 import cftime  # believe explict import needed for cf_xarray date parsing?
@@ -112,6 +113,83 @@ def patch_cf_xarray_accessor(mod):
 patch_cf_xarray_accessor(cf_xarray.accessor)
 
 
+# Attributes cf_xarray uses to assign coordinates to axes
+_axis_attr_names = tuple(sorted(
+    set(itertools.chain.from_iterable(
+        d.keys() for d in cf_xarray.criteria.coordinate_criteria.values()
+    )).union(('cf_role',))
+))
+
+
+class AxesCache:
+    """Memoizes the axis resolution done by
+    :meth:`MDTFCFAccessorMixin._old_axes_dict`. Entries are keyed by the
+    variable name and a version of the coordinate set: the names, dimensions
+    and axis-related attributes of the coordinates, which are all the
+    resolution depends on. Changing any of these gives a new version, so stale
+    entries are never returned.
+
+    The cache is shared, rather than stored on each object, since DataArrays
+    obtained by indexing a Dataset are created anew on every access. Least
+    recently used entries are discarded when *max_entries* is reached.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _attr_key(value):
+        return value if isinstance(value, (str, type(None))) else repr(value)
+
+    @classmethod
+    def coords_version(cls, obj) -> tuple:
+        """Return a hashable version of the coordinate set of the Dataset or
+        DataArray *obj*.
+        """
+        return tuple(
+            (name, v.dims, tuple(cls._attr_key(v.attrs.get(a, None)) for a in _axis_attr_names))
+            for name, v in obj.coords.variables.items()
+        )
+
+    @classmethod
+    def key(cls, obj, var_name=None) -> tuple:
+        """Return the cache key for resolving the axes of *obj*, or of its
+        variable *var_name* if given.
+        """
+        if var_name is None:
+            var = obj.variable if isinstance(obj, xr.DataArray) else obj
+            dims = obj.dims if isinstance(obj, xr.DataArray) else None
+        else:
+            var = obj.variables[var_name]
+            dims = var.dims
+        coordinates = (var.attrs.get('coordinates', None), var.encoding.get('coordinates', None))
+        return (type(obj).__name__, var_name, dims, tuple(cls._attr_key(c) for c in coordinates),
+                cls.coords_version(obj))
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key, None)
+            if value is not None:
+                self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_axes_cache = AxesCache()
+
+
 class MDTFCFAccessorMixin(object):
     """Properties we add to both xarray Dataset and DataArray objects via the
     accessor `extension mechanism
@@ -123,7 +201,7 @@ class MDTFCFAccessorMixin(object):
         """Returns bool according to whether the Dataset/DataArray has/is a time
         coordinate.
         """
-        return bool(cf_xarray.accessor._get_axis_coord(self._obj, "T"))
+        return bool(self._old_axes_dict().get('T', []))
 
     @property
     def calendar(self):
@@ -132,7 +210,7 @@ class MDTFCFAccessorMixin(object):
         no time axis.
         """
         ds = self._obj  # abbreviate
-        t_names = cf_xarray.accessor._get_axis_coord(ds, "T")
+        t_names = self._old_axes_dict().get('T', [])
         if not t_names:
             return None
         assert len(t_names) == 1
@@ -150,8 +228,18 @@ class MDTFCFAccessorMixin(object):
 
         Returns:
             Dict mapping axes labels to lists of names of variables in the
-            Dataset that the accessor has mapped to that axis.
+            Dataset that the accessor has mapped to that axis. Results are
+            memoized in an :class:`AxesCache`.
         """
+        key = _axes_cache.key(self._obj, var_name)
+        axes_d = _axes_cache.get(key)
+        if axes_d is None:
+            axes_d = self._resolve_axes(var_name)
+            _axes_cache.put(key, axes_d)
+        return {k: list(v) for k, v in axes_d.items()}
+
+    def _resolve_axes(self, var_name=None):
+        """Axis resolution for :meth:`_old_axes_dict`, without memoization."""
         if var_name is None:
             axes_obj = self._obj
         else:
@@ -187,13 +275,16 @@ class MDTFCFAccessorMixin(object):
             else:
                 dims_list = subset_dims
 
+        cf_coord_names = None
         for k, v in vardict.items():
             # handle variables with 2-D X,Y coordinates (e.g., [lon, nlon], [lat, nlat])
             # TODO: This is kluge-y AF, but it works for now. Will aim to better handle 2-D coordinates
             # when refactoring the prepocessor
             if len(v) > 1 and var_name is not None:
-                ax = [c for c in v if c in itertools.chain.from_iterable(axes_obj.cf.coordinates.values())]
-                del_ax = [d for d in v if d not in itertools.chain.from_iterable(axes_obj.cf.coordinates.values())]
+                if cf_coord_names is None:
+                    cf_coord_names = set(itertools.chain.from_iterable(axes_obj.cf.coordinates.values()))
+                ax = [c for c in v if c in cf_coord_names]
+                del_ax = [d for d in v if d not in cf_coord_names]
                 if del_ax is not None and len(del_ax) > 0:  # remove the entries that are not in the cf.coordinates.values dict
                     # append entries that are in the cf.coordinates.values dict if they are missing in coords_list
                     # and dims_list
@@ -605,11 +696,15 @@ class DefaultDatasetParser:
         made in :meth:`munge_ds_attrs`, but only if the attribute was deleted.
         """
 
-        def _restore_one(name, attrs_d):
+        def _restore_one(name, attrs_d, encoding_d=None):
             backup_d = self.attrs_backup.get(name, dict())
             for k, v in backup_d.items():
                 if v is ATTR_NOT_FOUND:
                     continue
+                if encoding_d is not None and k in encoding_d:
+                    # attribute was moved to encoding by decode_cf (e.g. _FillValue,
+                    # time units); restoring it would conflict on subsequent decoding
+                    continue
                 if k in attrs_d:
                     if isinstance(v, np.ndarray):
                         for vv in v:
@@ -625,7 +720,7 @@ class DefaultDatasetParser:
 
         _restore_one('Dataset', ds.attrs)
         for var in ds.variables:
-            _restore_one(var, ds[var].attrs)
+            _restore_one(var, ds[var].attrs, ds[var].encoding)
 
 
     def restore_vars_backup(self, ds, drop_vars: list):
@@ -1035,7 +1130,7 @@ class DefaultDatasetParser:
             # "attribute" to compare is tuple of (numerical value, units string),
             # which is converted to unit-ful object by src.units.to_cfunits()
             our_attr = (our_var.value, our_var.units)
-            for i in ds_var.values:
+            for i in np.atleast_1d(ds_var.values):
                 ds_attr = (float(i), ds_var.attrs.get('units', ATTR_NOT_FOUND))
                 try:
                     self.compare_attr(
@@ -1362,13 +1457,11 @@ class DefaultDatasetParser:
 
     # --- Top-level methods -----------------------------------------------
 
-    def parse(self, var, ds: xr.Dataset):
-        """Calls the above metadata parsing functions in the intended order;
-        intended to be called immediately after the Dataset *ds* is opened.
-
-        .. note::
-           ``decode_cf=False`` should be passed to the xarray open_dataset
-           method, since that parsing is done here instead.
+    def parse_dataset(self, ds: xr.Dataset):
+        """Per-Dataset phase of :meth:`parse`, which doesn't depend on the
+        variables being requested from *ds*. Its result can be shared by all
+        the variables read from the same Dataset, which only need to be passed
+        through :meth:`parse_variable`.
 
         - Calls :meth:`normalize_pre_decode` to do basic cleaning of metadata
           attributes.
@@ -1376,21 +1469,13 @@ class DefaultDatasetParser:
           <http://xarray.pydata.org/en/stable/generated/xarray.decode_cf.html>`__,
           using `cftime <https://unidata.github.io/cftime/>`__ to decode
           CF-compliant date/time axes.
-        - Assign axis labels to dimension coordinates using cf_xarray.
         - Verify that calendar is set correctly (:meth:`check_calendar`).
-        - Reconcile metadata in *var* and *ds* (``reconcile_*`` methods).
-        - Verify that the name, standard_name and units for the variable and its
-            coordinates are set correctly (``check_*`` methods).
 
         Args:
-            var (:class:`~src.diagnostic.VarlistEntry`): VerlistEntry describing
-                metadata we expect to find in *ds*.
             ds (Dataset): xarray Dataset of locally downloaded model data.
 
         Returns:
-            *ds*, with data unchanged but metadata normalized to expected values.
-            Except in specific cases, attributes of *var* are updated to reflect
-            the 'ground truth' of data in *ds*.
+            Decoded Dataset, with metadata attributes cleaned.
         """
         drop_vars = ["time_bnds"]
         self.normalize_pre_decode(ds, drop_vars)
@@ -1403,8 +1488,28 @@ class DefaultDatasetParser:
         # ds = ds.cf.guess_coord_axis()  # may not need this
         self.restore_attrs_backup(ds)
         self.restore_vars_backup(ds, drop_vars)
-        # self.normalize_metadata(var, ds)
         self.check_calendar(ds)
+        return ds
+
+    def parse_variable(self, var, ds: xr.Dataset):
+        """Per-variable phase of :meth:`parse`, run on a Dataset returned by
+        :meth:`parse_dataset`. Only reads the metadata of *var*'s dependent
+        variable and coordinates.
+
+        - Reconcile metadata in *var* and *ds* (``reconcile_*`` methods).
+        - Verify that the name, standard_name and units for the variable and its
+            coordinates are set correctly (``check_*`` methods).
+
+        Args:
+            var (:class:`~src.diagnostic.VarlistEntry`): VerlistEntry describing
+                metadata we expect to find in *ds*.
+            ds (Dataset): Dataset returned by :meth:`parse_dataset`. Its metadata
+                is modified in place.
+
+        Returns:
+            *ds*, with metadata normalized to expected values.
+        """
+        # self.normalize_metadata(var, ds)
         self.check_time_units(var, ds)
         # self._post_normalize_hook(var, ds)
 
@@ -1417,6 +1522,27 @@ class DefaultDatasetParser:
             self.check_ds_attrs(None, ds)
         return ds
 
+    def parse(self, var, ds: xr.Dataset):
+        """Calls the above metadata parsing functions in the intended order;
+        intended to be called immediately after the Dataset *ds* is opened.
+        Equivalent to :meth:`parse_dataset` followed by :meth:`parse_variable`.
+
+        .. note::
+           ``decode_cf=False`` should be passed to the xarray open_dataset
+           method, since that parsing is done here instead.
+
+        Args:
+            var (:class:`~src.diagnostic.VarlistEntry`): VerlistEntry describing
+                metadata we expect to find in *ds*.
+            ds (Dataset): xarray Dataset of locally downloaded model data.
+
+        Returns:
+            *ds*, with data unchanged but metadata normalized to expected values.
+            Except in specific cases, attributes of *var* are updated to reflect
+            the 'ground truth' of data in *ds*.
+        """
+        return self.parse_variable(var, self.parse_dataset(ds))
+
     @staticmethod
     def get_unmapped_names(ds):
         """Get a dict whose keys are variable or attribute names referred to by
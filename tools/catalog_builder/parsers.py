@@ -2,11 +2,8 @@ import xarray as xr
 import traceback
 import pathlib
 import os
-import io
 import sys
-import json
 import logging
-import collections
 import cftime
 from ecgtools.builder import INVALID_ASSET, TRACEBACK
 
@@ -15,6 +12,10 @@ from ecgtools.builder import INVALID_ASSET, TRACEBACK
 _log = logging.getLogger(__name__)
 
 ROOT_DIR = os.path.dirname(os.path.realpath(__file__)).split('/tools/catalog_builder')[0]
+# use the framework's JSONC reader
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from src.util.json_utils import read_json  # noqa: E402
 
 freq_opts = ['mon',
              'day',
@@ -51,89 +52,6 @@ catalog_keys = [
                 'path'
             ]
 
-def strip_comments(str_: str, delimiter=None):
-    """ Remove comments from *str_*. Comments are taken to start with an
-    arbitrary *delimiter* and run to the end of the line.
-    """
-    # would be better to use shlex, but that doesn't support multi-character
-    # comment delimiters like '//'
-    escaped_quote_placeholder = '\v'  # no one uses vertical tab
-
-    if not delimiter:
-        return str_
-    lines = str_.splitlines()
-    for i in range(len(lines)):
-        # get rid of lines starting with delimiter
-        if lines[i].startswith(delimiter):
-            lines[i] = ''
-            continue
-        # handle delimiters midway through a line:
-        # If delimiter appears quoted in a string, don't want to treat it as
-        # a comment. So for each occurrence of delimiter, count number of
-        # 's to its left and only truncate when that's an even number.
-        # First we get rid of -escaped single "s.
-        replaced_line = lines[i].replace('\\\"', escaped_quote_placeholder)
-        line_parts = replaced_line.split(delimiter)
-        quote_counts = [s.count('"') for s in line_parts]
-        j = 1
-        while sum(quote_counts[:j]) % 2 != 0:
-            if j >= len(quote_counts):
-                raise ValueError(f"Couldn't parse line {i+1} of string.")
-            j += 1
-        replaced_line = delimiter.join(line_parts[:j])
-        lines[i] = replaced_line.replace(escaped_quote_placeholder, '\\\"')
-    # make lookup table of correct line numbers, taking into account lines we
-    # dropped
-    line_nos = [i for i, s in enumerate(lines) if (s and not s.isspace())]
-    # join lines, stripping blank lines
-    new_str = '\n'.join([s for s in lines if (s and not s.isspace())])
-    return new_str, line_nos
-def parse_json(str_: str):
-    """Parse JSONC (JSON with ``//``-comments) string *str_* into a Python object.
-    Comments are discarded. Wraps standard library :py:func:`json.loads`.
-
-    Syntax errors in the input (:py:class:`~json.JSONDecodeError`) are passed
-    through from the Python standard library parser. We correct the line numbers
-    mentioned in the errors to refer to the original file (i.e., with comments.)
-    """
-    def _pos_from_lc(lineno, colno, str_):
-        # fix line number, since we stripped commented-out lines. JSONDecodeError
-        # computes line/col no. in error message from character position in string.
-        lines = str_.splitlines()
-        return (colno - 1) + sum((len(line) + 1) for line in lines[:lineno])
-
-    (strip_str, line_nos) = strip_comments(str_, delimiter='//')
-    try:
-        parsed_json = json.loads(strip_str,
-                                 object_pairs_hook=collections.OrderedDict)
-    except json.JSONDecodeError as exc:
-        # fix reported line number, since we stripped commented-out lines.
-        assert exc.lineno <= len(line_nos)
-        raise json.JSONDecodeError(
-            msg=exc.msg, doc=str_,
-            pos=_pos_from_lc(line_nos[exc.lineno-1], exc.colno, str_)
-        )
-    except UnicodeDecodeError as exc:
-        raise json.JSONDecodeError(
-            msg=f"parse_json received UnicodeDecodeError:\n{exc}",
-            doc=strip_str, pos=0
-        )
-
-    return parsed_json
-def read_json(file_path: str, log=_log) -> dict:
-    """Reads a struct from a JSONC file at *file_path*.
-    """
-    log.debug('Reading file %s', file_path)
-    try:
-        with io.open(file_path, 'r', encoding='utf-8') as file_:
-            str_ = file_.read()
-    except Exception as exc:
-        # something more serious than missing file
-        _log.critical("Caught exception when trying to read %s: %r", file_path, exc)
-        exit(1)
-    return parse_json(str_)
-
-
 def parse_nc_file(file_path: pathlib.Path, catalog_info: dict) -> dict:
     # call to xr.open_dataset required by ecgtools.builder.Builder
     exclude_vars = ('time', 'time_bnds', 'date', 'hyam', 'hybm')